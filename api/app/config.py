@@ -1,4 +1,5 @@
 import os
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -7,16 +8,98 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./postly.db"
+    async_db: bool = False  # serve requests through AsyncSession (aiosqlite/asyncpg)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800  # seconds, -1 disables recycling
+    db_pool_pre_ping: bool = True
+    db_statement_timeout: int = 0  # milliseconds, 0 disables (Postgres only)
+    db_init_on_startup: bool = True  # create the schema in each worker's startup; run.py turns it off in production
+    
+    # Read replicas: feeds, single posts and principal lookups read from them, everything else uses database_url
+    database_replica_urls: List[str] = []  # a JSON list in the environment
+    db_replica_balancing: str = "round_robin"  # or "least_connections"
+    db_replica_health_interval: int = 10  # seconds between checks, failing replicas get no reads until they pass
+    db_read_your_writes_window: int = 5  # seconds a client reads from the primary after committing, above the usual replica lag
+    db_sticky_backend: str = "memory"  # where those pins are kept: "memory" or a shared "module.path:BackendClass"
+    
+    # SQLite pragmas applied to every new connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout: int = 5000  # milliseconds
+    sqlite_cache_size: int = -64000  # negative values are KiB, so 64MB
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # 256MB
     
     # Security
     secret_key: str = "your-secret-key-change-this-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    auth_cache_size: int = 10000  # cached principals, 0 disables the cache
+    auth_cache_ttl: int = 60  # seconds, capped by each token's exp
+    bcrypt_rounds: int = 12
+    hash_workers: Optional[int] = None  # password hashing processes, defaults to CPU count
+    hash_queue_limit: int = 32  # hashes waiting for a worker before returning 503
+    hash_retry_after: int = 1  # seconds, sent in Retry-After when saturated
+    
+    # Observability
+    metrics_enabled: bool = True  # request/SQL metrics at /metrics
+    admin_token: str = ""  # enables /debug endpoints and the X-Profile header, empty disables them
+    profile_sample_rate: float = 0.0  # fraction of requests profiled without the header
+    profile_buffer_size: int = 50  # profiles kept for GET /debug/profiles
+    slow_query_ms: int = 500  # statements at least this slow are logged with their plan, 0 disables
+    slow_query_log_parameters: bool = False  # also log their bound values, which include hashes, emails and post text
+    
+    # Response compression, negotiated from Accept-Encoding
+    compression_min_size: int = 1024  # bytes, smaller bodies are sent as is; 0 disables compression
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4  # used when the brotli package is installed
+    
+    # Batch endpoints
+    batch_max_posts: int = 100  # posts per POST /posts/batch
+    batch_max_ids: int = 100  # ids per GET /posts?ids=
+    
+    # Group commit: concurrent POST /posts requests are inserted in shared transactions
+    post_group_commit: bool = False
+    post_group_commit_window_ms: float = 0  # extra wait for more posts per batch; 0 takes what queued during the last commit
+    post_group_commit_max_rows: int = 100  # posts per transaction
+    
+    # Post read cache
+    post_cache_backend: str = "memory"  # "memory" (one process; run.py picks "none" for several workers), "none" or "module.path:BackendClass"
+    post_cache_size: int = 2048  # cached responses
+    post_cache_ttl: int = 30  # seconds, bounds staleness where invalidations do not reach
+    
+    # Hashtags and mentions, indexed from post text
+    trending_bucket_minutes: int = 60  # width of the per-tag usage counters
+    trending_window_hours: int = 24  # recent usage GET /posts/trending ranks tags by
+    
+    # Home timelines
+    timeline_workers: int = 2  # background threads fanning out new posts
+    timeline_celebrity_threshold: int = 10000  # followers above which posts are merged in at read time
+    timeline_backfill: int = 50  # recent posts copied into a timeline on follow
+    
+    # Live post stream, GET /posts/stream (SSE) and /posts/ws (WebSocket)
+    post_stream_broker: str = "local"  # "local" (events of this worker only) or "module.path:BrokerClass" to share them between workers
+    post_stream_queue_size: int = 256  # undelivered events per connection before it is dropped as too slow
+    post_stream_replay: int = 1000  # recent events kept for resuming from a cursor
+    post_stream_heartbeat: int = 15  # seconds between SSE keep-alive comments, 0 disables
     
     # File uploads
     upload_dir: str = "uploads"
     max_file_size: int = 10 * 1024 * 1024  # 10MB
     
+    # Image derivatives, generated in the background after upload
+    media_variant_widths: List[int] = [320, 640, 1280]
+    media_variant_quality: int = 80  # WebP quality
+    media_workers: int = 2
+    media_queue_limit: int = 100  # pending images before new ones are skipped
+    
+    # Media cleanup, done by a background janitor rather than in requests
+    blob_cleanup_enabled: bool = True  # run the janitor in this process; run.py runs a single one for all workers
+    blob_cleanup_interval: int = 5  # seconds between checks for files released by other processes
+    blob_gc_interval: int = 3600  # seconds between sweeps for orphaned files, 0 disables
+    blob_gc_grace: int = 3600  # seconds, younger files are never collected
+    blob_gc_batch_size: int = 1000  # files checked against the database at a time
+    
     class Config:
         env_file = ".env"
 
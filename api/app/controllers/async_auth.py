@@ -0,0 +1,14 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
+from app.services.async_auth_service import AsyncAuthService
+
+class AsyncAuthController:
+    @staticmethod
+    async def signup(user: UserCreate, db: AsyncSession) -> UserResponse:
+        db_user = await AsyncAuthService.create_user(db, user)
+        return UserResponse.from_orm(db_user)
+
+    @staticmethod
+    async def signin(user: UserLogin, db: AsyncSession) -> Token:
+        access_token = await AsyncAuthService.authenticate_user(db, user)
+        return Token(access_token=access_token, token_type="bearer")
@@ -0,0 +1,122 @@
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+from app.schemas.post import PostCreate, PostUpdate, PostResponse, PostPage, TrendingTag
+from app.services.async_post_service import AsyncPostService
+from app.services.search_service import SearchService
+from app.services.tag_service import TagService
+from app.services.timeline_service import TimelineService
+from app.controllers.posts import PostController
+from app.services.post_cache import PostCache, post_cache
+from app.models.user import User
+from app.database import on_replica
+
+class AsyncPostController:
+    @staticmethod
+    async def _read_through(db: AsyncSession, key: str, load: Callable[[], Awaitable[Tuple[Any, Set[str]]]]) -> Any:
+        cached = post_cache.get(key)
+        if cached is not None:
+            return cached
+        token = post_cache.begin(on_replica(db))
+        value, tags = await load()
+        post_cache.set(key, value, tags, token)
+        return value
+
+    @staticmethod
+    async def create_post(post: PostCreate, current_user: User, db: AsyncSession) -> PostResponse:
+        db_post = await AsyncPostService.create_post(db, post, current_user)
+        return PostController._to_response(db_post)
+
+    @staticmethod
+    async def create_posts(posts: List[PostCreate], current_user: User, db: AsyncSession) -> List[PostResponse]:
+        db_posts = await AsyncPostService.create_posts(db, posts, current_user)
+        return PostController._to_responses(db_posts)
+
+    @staticmethod
+    async def get_posts_by_ids(db: AsyncSession, post_ids: List[str]) -> List[PostResponse]:
+        found = {post_id: post_cache.get(PostCache.post_key(post_id)) for post_id in post_ids}
+        cached = {post_id for post_id, response in found.items() if response is not None}
+        token = post_cache.begin(on_replica(db))
+        for post in await AsyncPostService.get_posts_by_ids(db, post_ids, cached):
+            found[post.id] = PostController._to_response(post)
+            post_cache.set(PostCache.post_key(post.id), found[post.id], PostCache.tags_for([post]), token)
+        return [found[post_id] for post_id in post_ids if found[post_id] is not None]
+
+    @staticmethod
+    async def get_posts(db: AsyncSession, skip: int = 0, limit: int = 10) -> List[PostResponse]:
+        async def load():
+            posts = await AsyncPostService.get_posts(db, skip, limit)
+            return PostController._to_responses(posts), PostCache.tags_for(posts, "feed:offset")
+        return await AsyncPostController._read_through(db, PostCache.feed_key(skip, limit), load)
+
+    @staticmethod
+    async def get_posts_page(db: AsyncSession, limit: int = 10, cursor: Optional[str] = None) -> PostPage:
+        async def load():
+            posts, next_cursor = await AsyncPostService.get_posts_page(db, limit, cursor)
+            page = PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+            return page, PostCache.tags_for(posts, PostCache.feed_page_tag(cursor))
+        return await AsyncPostController._read_through(db, PostCache.feed_page_key(cursor, limit), load)
+
+    @staticmethod
+    async def search_posts(db: AsyncSession, query: str, limit: int = 10, cursor: Optional[str] = None, user_id: Optional[str] = None) -> PostPage:
+        posts, next_cursor = await SearchService.search_async(db, query, limit, cursor, user_id)
+        return PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+
+    @staticmethod
+    async def get_home_timeline(current_user: User, db: AsyncSession, limit: int = 10, cursor: Optional[str] = None) -> PostPage:
+        posts, next_cursor = await TimelineService.get_home_page_async(db, current_user.id, limit, cursor)
+        return PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+
+    @staticmethod
+    async def get_tag_page(tag: str, db: AsyncSession, limit: int = 10, cursor: Optional[str] = None) -> PostPage:
+        posts, next_cursor = await AsyncPostService.get_tag_page(db, tag, limit, cursor)
+        return PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+
+    @staticmethod
+    async def get_mention_page(user_id: str, db: AsyncSession, limit: int = 10, cursor: Optional[str] = None) -> PostPage:
+        posts, next_cursor = await AsyncPostService.get_mention_page(db, user_id, limit, cursor)
+        return PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+
+    @staticmethod
+    async def get_trending_tags(db: AsyncSession, limit: int = 10) -> List[TrendingTag]:
+        async def load():
+            return [TrendingTag(tag=tag, count=count) for tag, count in await TagService.trending_async(db, limit)], set()
+        return await AsyncPostController._read_through(db, PostCache.trending_key(limit), load)
+
+    @staticmethod
+    async def get_post(post_id: str, db: AsyncSession) -> PostResponse:
+        async def load():
+            post = await AsyncPostService.get_post_by_id(db, post_id)
+            return PostController._to_response(post), PostCache.tags_for([post])
+        return await AsyncPostController._read_through(db, PostCache.post_key(post_id), load)
+
+    @staticmethod
+    async def get_user_posts(db: AsyncSession, user_id: str, skip: int = 0, limit: int = 10) -> List[PostResponse]:
+        async def load():
+            posts = await AsyncPostService.get_user_posts(db, user_id, skip, limit)
+            return PostController._to_responses(posts), PostCache.tags_for(posts, f"user:{user_id}:offset")
+        return await AsyncPostController._read_through(db, PostCache.user_key(user_id, skip, limit), load)
+
+    @staticmethod
+    async def get_user_posts_page(db: AsyncSession, user_id: str, limit: int = 10, cursor: Optional[str] = None) -> PostPage:
+        async def load():
+            posts, next_cursor = await AsyncPostService.get_user_posts_page(db, user_id, limit, cursor)
+            page = PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+            return page, PostCache.tags_for(posts, PostCache.user_page_tag(user_id, cursor))
+        return await AsyncPostController._read_through(db, PostCache.user_page_key(user_id, cursor, limit), load)
+
+    @staticmethod
+    async def update_post(post_id: str, post_update: PostUpdate, current_user: User, db: AsyncSession) -> PostResponse:
+        updated_post = await AsyncPostService.update_post(db, post_id, post_update, current_user)
+        return PostController._to_response(updated_post)
+
+    @staticmethod
+    async def delete_post(post_id: str, current_user: User, db: AsyncSession) -> dict:
+        await AsyncPostService.delete_post(db, post_id, current_user)
+        return {"message": "Post deleted successfully"}
+
+    @staticmethod
+    async def upload_media(post_id: str, file: UploadFile, current_user: User, db: AsyncSession) -> dict:
+        file_path = await AsyncPostService.upload_media(db, post_id, file, current_user)
+        full_url = PostController._transform_blob_url(file_path)
+        return {"message": "File uploaded successfully", "blobUrl": full_url}
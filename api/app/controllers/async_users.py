@@ -0,0 +1,24 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app.schemas.user import UserResponse
+from app.services.async_follow_service import AsyncFollowService
+from app.models.user import User
+
+class AsyncUserController:
+    @staticmethod
+    async def follow(user_id: str, current_user: User, db: AsyncSession) -> dict:
+        created = await AsyncFollowService.follow(db, user_id, current_user)
+        return {"message": "User followed successfully" if created else "Already following this user"}
+
+    @staticmethod
+    async def unfollow(user_id: str, current_user: User, db: AsyncSession) -> dict:
+        removed = await AsyncFollowService.unfollow(db, user_id, current_user)
+        return {"message": "User unfollowed successfully" if removed else "Not following this user"}
+
+    @staticmethod
+    async def get_followers(user_id: str, db: AsyncSession, skip: int = 0, limit: int = 10) -> List[UserResponse]:
+        return [UserResponse.from_orm(user) for user in await AsyncFollowService.get_followers(db, user_id, skip, limit)]
+
+    @staticmethod
+    async def get_following(user_id: str, db: AsyncSession, skip: int = 0, limit: int = 10) -> List[UserResponse]:
+        return [UserResponse.from_orm(user) for user in await AsyncFollowService.get_following(db, user_id, skip, limit)]
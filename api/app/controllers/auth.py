@@ -5,13 +5,13 @@ from app.models.user import User
 
 class AuthController:
     @staticmethod
-    def signup(user: UserCreate, db: Session) -> UserResponse:
-        db_user = AuthService.create_user(db, user)
+    async def signup(user: UserCreate, db: Session) -> UserResponse:
+        db_user = await AuthService.create_user(db, user)
         return UserResponse.from_orm(db_user)
     
     @staticmethod
-    def signin(user: UserLogin, db: Session) -> Token:
-        access_token = AuthService.authenticate_user(db, user)
+    async def signin(user: UserLogin, db: Session) -> Token:
+        access_token = await AuthService.authenticate_user(db, user)
         return Token(access_token=access_token, token_type="bearer")
     
     @staticmethod
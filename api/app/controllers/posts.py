@@ -1,70 +1,180 @@
-from fastapi import UploadFile
+from fastapi import Response, UploadFile
 from sqlalchemy.orm import Session
-from typing import List
-from app.schemas.post import PostCreate, PostUpdate, PostResponse
+from typing import Any, Callable, List, Optional, Set, Tuple, Union
+from app.schemas.post import PostCreate, PostUpdate, PostResponse, PostPage, TrendingTag
 from app.services.post_service import PostService
+from app.services.search_service import SearchService
+from app.services.tag_service import TagService
+from app.services.timeline_service import TimelineService
+from app.services.post_cache import PostCache, post_cache
+from app.models.post import Post
 from app.models.user import User
+from app.database import on_replica
+from app.utils.http_cache import etag_matches, page_etag
+from app.utils.responses import FastJSONResponse
+
+MEDIA_BASE_URL = "http://localhost:8001"
 
 class PostController:
     @staticmethod
-    def _transform_blob_url(post_data: dict) -> dict:
+    def _transform_blob_url(blob_url: Optional[str]) -> Optional[str]:
         """Transform blob URL from filename to full URL"""
-        original_blob_url = post_data.get('blobUrl')
-        print(f"DEBUG: Original blobUrl: {repr(original_blob_url)}")
-        
-        if original_blob_url and not original_blob_url.startswith('http://localhost:8001'):
-            new_blob_url = f"http://localhost:8001/posts/media/{original_blob_url}"
-            print(f"DEBUG: Transformed blobUrl: {repr(new_blob_url)}")
-            post_data['blobUrl'] = new_blob_url
-        else:
-            print(f"DEBUG: No transformation needed for blobUrl: {repr(original_blob_url)}")
+        if blob_url and not blob_url.startswith(MEDIA_BASE_URL):
+            return f"{MEDIA_BASE_URL}/posts/media/{blob_url}"
+        return blob_url
+
+    @staticmethod
+    def _to_response(post: Post) -> PostResponse:
+        """Validate a post once and rewrite its media URLs in place"""
+        response = PostResponse.from_orm(post)
+        response.blobUrl = PostController._transform_blob_url(response.blobUrl)
+        response.variants = {
+            variant.width: PostController._transform_blob_url(variant.path)
+            for variant in post.mediaVariants
+        }
+        return response
+
+    @staticmethod
+    def _to_responses(posts: List[Post]) -> List[PostResponse]:
+        return [PostController._to_response(post) for post in posts]
+
+    @staticmethod
+    def compact(items: List[PostResponse], next_cursor: Optional[str] = None) -> dict:
+        """Move each distinct owner out of the posts into the users table.
         
-        return post_data
-    
+        Returns the CompactPostPage shape as plain data; the posts were
+        validated when they were built, so they are dumped rather than re-validated.
+        """
+        users = {}
+        compact_items = []
+        for item in items:
+            users.setdefault(item.userId, item.owner)
+            compact_items.append(item.model_dump(exclude={"owner"}))
+        return {"items": compact_items, "users": users, "next_cursor": next_cursor}
+
+    @staticmethod
+    def list_response(
+        result: Union[PostPage, List[PostResponse]], 
+        if_none_match: Optional[str], 
+        compact: bool = False
+    ) -> Response:
+        """Render a list of posts tagged with its ETag, or a 304 when the client already has it"""
+        items, next_cursor = (result.items, result.next_cursor) if isinstance(result, PostPage) else (result, None)
+        etag = page_etag(items, "compact" if compact else "full", next_cursor or "")
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        content = PostController.compact(items, next_cursor) if compact else result
+        return FastJSONResponse(content, headers=headers)
+
+    @staticmethod
+    def _read_through(db: Session, key: str, load: Callable[[], Tuple[Any, Set[str]]]) -> Any:
+        """Return the cached response for key, or load it and cache it under its tags"""
+        cached = post_cache.get(key)
+        if cached is not None:
+            return cached
+        token = post_cache.begin(on_replica(db))
+        value, tags = load()
+        post_cache.set(key, value, tags, token)
+        return value
+
     @staticmethod
     def create_post(post: PostCreate, current_user: User, db: Session) -> PostResponse:
         db_post = PostService.create_post(db, post, current_user)
-        post_dict = PostResponse.from_orm(db_post).dict()
-        return PostResponse(**PostController._transform_blob_url(post_dict))
-    
+        return PostController._to_response(db_post)
+
+    @staticmethod
+    def create_posts(posts: List[PostCreate], current_user: User, db: Session) -> List[PostResponse]:
+        db_posts = PostService.create_posts(db, posts, current_user)
+        return PostController._to_responses(db_posts)
+
+    @staticmethod
+    def get_posts_by_ids(db: Session, post_ids: List[str]) -> List[PostResponse]:
+        """Serve cached posts by id and load the rest in one query"""
+        found = {post_id: post_cache.get(PostCache.post_key(post_id)) for post_id in post_ids}
+        cached = {post_id for post_id, response in found.items() if response is not None}
+        token = post_cache.begin(on_replica(db))
+        for post in PostService.get_posts_by_ids(db, post_ids, cached):
+            found[post.id] = PostController._to_response(post)
+            post_cache.set(PostCache.post_key(post.id), found[post.id], PostCache.tags_for([post]), token)
+        return [found[post_id] for post_id in post_ids if found[post_id] is not None]
+
     @staticmethod
     def get_posts(db: Session, skip: int = 0, limit: int = 10) -> List[PostResponse]:
-        posts = PostService.get_posts(db, skip, limit)
-        transformed_posts = []
-        for post in posts:
-            post_dict = PostResponse.from_orm(post).dict()
-            transformed_posts.append(PostResponse(**PostController._transform_blob_url(post_dict)))
-        return transformed_posts
-    
+        def load():
+            posts = PostService.get_posts(db, skip, limit)
+            return PostController._to_responses(posts), PostCache.tags_for(posts, "feed:offset")
+        return PostController._read_through(db, PostCache.feed_key(skip, limit), load)
+
+    @staticmethod
+    def get_posts_page(db: Session, limit: int = 10, cursor: Optional[str] = None) -> PostPage:
+        def load():
+            posts, next_cursor = PostService.get_posts_page(db, limit, cursor)
+            page = PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+            return page, PostCache.tags_for(posts, PostCache.feed_page_tag(cursor))
+        return PostController._read_through(db, PostCache.feed_page_key(cursor, limit), load)
+
+    @staticmethod
+    def search_posts(db: Session, query: str, limit: int = 10, cursor: Optional[str] = None, user_id: Optional[str] = None) -> PostPage:
+        posts, next_cursor = SearchService.search(db, query, limit, cursor, user_id)
+        return PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+
+    @staticmethod
+    def get_home_timeline(current_user: User, db: Session, limit: int = 10, cursor: Optional[str] = None) -> PostPage:
+        posts, next_cursor = TimelineService.get_home_page(db, current_user.id, limit, cursor)
+        return PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+
+    @staticmethod
+    def get_tag_page(tag: str, db: Session, limit: int = 10, cursor: Optional[str] = None) -> PostPage:
+        posts, next_cursor = PostService.get_tag_page(db, tag, limit, cursor)
+        return PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+
+    @staticmethod
+    def get_mention_page(user_id: str, db: Session, limit: int = 10, cursor: Optional[str] = None) -> PostPage:
+        posts, next_cursor = PostService.get_mention_page(db, user_id, limit, cursor)
+        return PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+
+    @staticmethod
+    def get_trending_tags(db: Session, limit: int = 10) -> List[TrendingTag]:
+        def load():
+            return [TrendingTag(tag=tag, count=count) for tag, count in TagService.trending(db, limit)], set()
+        return PostController._read_through(db, PostCache.trending_key(limit), load)
+
     @staticmethod
     def get_post(post_id: str, db: Session) -> PostResponse:
-        post = PostService.get_post_by_id(db, post_id)
-        post_dict = PostResponse.from_orm(post).dict()
-        return PostResponse(**PostController._transform_blob_url(post_dict))
-    
+        def load():
+            post = PostService.get_post_by_id(db, post_id)
+            return PostController._to_response(post), PostCache.tags_for([post])
+        return PostController._read_through(db, PostCache.post_key(post_id), load)
+
     @staticmethod
     def get_user_posts(db: Session, user_id: str, skip: int = 0, limit: int = 10) -> List[PostResponse]:
-        posts = PostService.get_user_posts(db, user_id, skip, limit)
-        transformed_posts = []
-        for post in posts:
-            post_dict = PostResponse.from_orm(post).dict()
-            transformed_posts.append(PostResponse(**PostController._transform_blob_url(post_dict)))
-        return transformed_posts
-    
+        def load():
+            posts = PostService.get_user_posts(db, user_id, skip, limit)
+            return PostController._to_responses(posts), PostCache.tags_for(posts, f"user:{user_id}:offset")
+        return PostController._read_through(db, PostCache.user_key(user_id, skip, limit), load)
+
+    @staticmethod
+    def get_user_posts_page(db: Session, user_id: str, limit: int = 10, cursor: Optional[str] = None) -> PostPage:
+        def load():
+            posts, next_cursor = PostService.get_user_posts_page(db, user_id, limit, cursor)
+            page = PostPage(items=PostController._to_responses(posts), next_cursor=next_cursor)
+            return page, PostCache.tags_for(posts, PostCache.user_page_tag(user_id, cursor))
+        return PostController._read_through(db, PostCache.user_page_key(user_id, cursor, limit), load)
+
     @staticmethod
     def update_post(post_id: str, post_update: PostUpdate, current_user: User, db: Session) -> PostResponse:
         updated_post = PostService.update_post(db, post_id, post_update, current_user)
-        post_dict = PostResponse.from_orm(updated_post).dict()
-        return PostResponse(**PostController._transform_blob_url(post_dict))
-    
+        return PostController._to_response(updated_post)
+
     @staticmethod
     def delete_post(post_id: str, current_user: User, db: Session) -> dict:
         PostService.delete_post(db, post_id, current_user)
         return {"message": "Post deleted successfully"}
-    
+
     @staticmethod
     def upload_media(post_id: str, file: UploadFile, current_user: User, db: Session) -> dict:
         file_path = PostService.upload_media(db, post_id, file, current_user)
         # Return full URL instead of just filename
-        full_url = f"http://localhost:8001/posts/media/{file_path}"
-        return {"message": "File uploaded successfully", "blobUrl": full_url}
\ No newline at end of file
+        full_url = PostController._transform_blob_url(file_path)
+        return {"message": "File uploaded successfully", "blobUrl": full_url}
@@ -0,0 +1,80 @@
+import asyncio
+from typing import AsyncIterator, Optional
+from fastapi import WebSocket
+from fastapi.responses import StreamingResponse
+from app.services.post_events import post_events, Subscription
+
+SSE_RETRY_MS = 3000
+SSE_DROPPED = b"event: dropped\ndata: {}\n\n"
+SSE_HEARTBEAT = b": heartbeat\n\n"
+WS_TRY_AGAIN_LATER = 1013
+
+class StreamController:
+    """Live post events over Server-Sent Events and WebSocket"""
+
+    @staticmethod
+    async def _batches(subscription: Subscription) -> AsyncIterator[Optional[list]]:
+        """Yield queued events in batches, or None when a heartbeat is due.
+
+        Stops when the subscription is dropped or closed; the caller checks
+        which one to tell the client.
+        """
+        while True:
+            await subscription.wait()
+            subscription.heartbeat = False
+            if subscription.events:
+                batch = list(subscription.events)
+                subscription.events.clear()
+                yield batch
+            elif subscription.dropped or subscription.closed:
+                return
+            else:
+                yield None
+
+    @staticmethod
+    def sse(after_id: Optional[str]) -> StreamingResponse:
+        async def body():
+            # Subscribed inside the body, so a client gone before streaming leaks nothing
+            subscription = post_events.subscribe(after_id)
+            try:
+                yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+                async for batch in StreamController._batches(subscription):
+                    yield SSE_HEARTBEAT if batch is None else b"".join(item.sse for item in batch)
+                if subscription.dropped:
+                    # No id, so EventSource resumes from the last event it received
+                    yield SSE_DROPPED
+            finally:
+                post_events.unsubscribe(subscription)
+
+        return StreamingResponse(
+            body(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @staticmethod
+    async def websocket(websocket: WebSocket, after_id: Optional[str]) -> None:
+        await websocket.accept()
+        subscription = post_events.subscribe(after_id)
+
+        async def watch_disconnect():
+            # Messages from the client are ignored; this only notices it leaving
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+            subscription.closed = True
+            subscription.wake()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            # WebSocket pings are sent by the server, so heartbeats are skipped
+            async for batch in StreamController._batches(subscription):
+                for item in batch or ():
+                    await websocket.send_text(item.json)
+            if subscription.dropped:
+                await websocket.close(code=WS_TRY_AGAIN_LATER, reason="Too slow, resume with the last id")
+        except (RuntimeError, OSError):
+            # The client went away mid-send
+            pass
+        finally:
+            watcher.cancel()
+            post_events.unsubscribe(subscription)
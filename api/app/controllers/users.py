@@ -0,0 +1,24 @@
+from sqlalchemy.orm import Session
+from typing import List
+from app.schemas.user import UserResponse
+from app.services.follow_service import FollowService
+from app.models.user import User
+
+class UserController:
+    @staticmethod
+    def follow(user_id: str, current_user: User, db: Session) -> dict:
+        created = FollowService.follow(db, user_id, current_user)
+        return {"message": "User followed successfully" if created else "Already following this user"}
+    
+    @staticmethod
+    def unfollow(user_id: str, current_user: User, db: Session) -> dict:
+        removed = FollowService.unfollow(db, user_id, current_user)
+        return {"message": "User unfollowed successfully" if removed else "Not following this user"}
+    
+    @staticmethod
+    def get_followers(user_id: str, db: Session, skip: int = 0, limit: int = 10) -> List[UserResponse]:
+        return [UserResponse.from_orm(user) for user in FollowService.get_followers(db, user_id, skip, limit)]
+    
+    @staticmethod
+    def get_following(user_id: str, db: Session, skip: int = 0, limit: int = 10) -> List[UserResponse]:
+        return [UserResponse.from_orm(user) for user in FollowService.get_following(db, user_id, skip, limit)]
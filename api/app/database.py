@@ -1,23 +1,279 @@
-from sqlalchemy import create_engine
+import uuid
+from sqlalchemy import create_engine, event, inspect, text, Uuid
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, sessionmaker
+from fastapi import Depends, Request
 from app.config import settings
+from app.models.types import CompactUUID
+from app.utils.replicas import Replica, ReplicaRouter, build_sticky_backend
 
-engine = create_engine(
-    settings.database_url, 
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
-)
+IS_SQLITE = "sqlite" in settings.database_url
+
+def upsert(model):
+    """INSERT for the configured database that takes on_conflict_do_update/on_conflict_do_nothing"""
+    return sqlite.insert(model) if IS_SQLITE else postgresql.insert(model)
+
+def _connect_args(use_async: bool = False, database_url: str = settings.database_url) -> dict:
+    if "sqlite" in database_url:
+        return {} if use_async else {"check_same_thread": False}
+    if settings.db_statement_timeout:
+        if use_async:
+            return {"server_settings": {"statement_timeout": str(settings.db_statement_timeout)}}
+        return {"options": f"-c statement_timeout={settings.db_statement_timeout}"}
+    return {}
+
+def _engine_options(use_async: bool = False, database_url: str = settings.database_url) -> dict:
+    if "sqlite" in database_url and ":memory:" in database_url:
+        # In-memory databases use a single-connection pool that takes no sizing options
+        return {"connect_args": _connect_args(use_async, database_url)}
+    return {
+        "connect_args": _connect_args(use_async, database_url),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Enable WAL and a busy timeout so concurrent writers wait instead of failing"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}")
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.close()
+
+engine = create_engine(settings.database_url, **_engine_options())
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def get_async_database_url(database_url: str) -> str:
+    """Swap the sync driver of a database URL for its asyncio counterpart"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.async_db:
+    async_engine = create_async_engine(
+        get_async_database_url(settings.database_url), **_engine_options(use_async=True)
+    )
+    if IS_SQLITE:
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    # Keep attributes loaded after commit, lazy refreshes cannot run on the event loop
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+def _replica(index: int, database_url: str) -> Replica:
+    replica_engine = create_engine(database_url, **_engine_options(database_url=database_url))
+    if "sqlite" in database_url:
+        event.listen(replica_engine, "connect", _set_sqlite_pragmas)
+    replica_async_engine = async_sessions = None
+    if settings.async_db:
+        replica_async_engine = create_async_engine(
+            get_async_database_url(database_url), **_engine_options(use_async=True, database_url=database_url)
+        )
+        if "sqlite" in database_url:
+            event.listen(replica_async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+        async_sessions = async_sessionmaker(
+            bind=replica_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return Replica(
+        f"replica{index}",
+        replica_engine,
+        sessionmaker(autocommit=False, autoflush=False, bind=replica_engine),
+        replica_async_engine,
+        async_sessions,
+    )
+
+# Read replicas, used by get_read_db; empty unless DATABASE_REPLICA_URLS is set
+replica_router = ReplicaRouter(
+    [_replica(index, url) for index, url in enumerate(settings.database_replica_urls)],
+    settings.db_replica_balancing,
+    settings.db_read_your_writes_window,
+    settings.db_replica_health_interval,
+    build_sticky_backend(),
+)
+
 Base = declarative_base()
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+# PRAGMA user_version of a SQLite database whose keys are stored as 16 bytes
+SQLITE_COMPACT_KEYS_VERSION = 1
+
+def _uuid_bytes(value):
+    try:
+        return uuid.UUID(value).bytes
+    except (TypeError, ValueError):
+        # Leave ids that are not UUIDs as they are rather than fail the upgrade
+        return value
+
+def upgrade_key_columns():
+    """Convert id columns created as text by earlier versions to CompactUUID storage.
+
+    Runs in place and before create_tables, so new tables never reference a
+    text key. A no-op once the database has been converted.
+    """
+    with engine.begin() as connection:
+        existing = set(inspect(connection).get_table_names())
+        columns = [
+            (table.name, column.name)
+            for table in Base.metadata.sorted_tables if table.name in existing
+            for column in table.columns if isinstance(column.type, CompactUUID)
+        ]
+        quote = connection.dialect.identifier_preparer.quote
+        if connection.dialect.name == "sqlite":
+            if connection.exec_driver_sql("PRAGMA user_version").scalar() >= SQLITE_COMPACT_KEYS_VERSION:
+                return
+            # Column affinity is left alone: a TEXT column stores blobs unchanged
+            connection.connection.dbapi_connection.create_function("uuid_bytes", 1, _uuid_bytes, deterministic=True)
+            for table, column in columns:
+                connection.execute(text(
+                    f"UPDATE {quote(table)} SET {quote(column)} = uuid_bytes({quote(column)}) "
+                    f"WHERE typeof({quote(column)}) = 'text'"
+                ))
+            connection.exec_driver_sql(f"PRAGMA user_version = {SQLITE_COMPACT_KEYS_VERSION}")
+        elif connection.dialect.name == "postgresql":
+            inspector = inspect(connection)
+            types = {
+                (table, column["name"]): column["type"]
+                for table in {table for table, _ in columns} for column in inspector.get_columns(table)
+            }
+            pending = [key for key in columns if not isinstance(types[key], Uuid)]
+            if not pending:
+                return
+            # Foreign keys cannot span a uuid and a varchar column, so drop the
+            # ones touching converted tables and add them back afterwards
+            converted = {table for table, _ in pending}
+            foreign_keys = [
+                (table, foreign_key)
+                for table in existing for foreign_key in inspector.get_foreign_keys(table)
+                if table in converted or foreign_key["referred_table"] in converted
+            ]
+            for table, foreign_key in foreign_keys:
+                connection.execute(text(f"ALTER TABLE {quote(table)} DROP CONSTRAINT {quote(foreign_key['name'])}"))
+            for table, column in pending:
+                connection.execute(text(
+                    f"ALTER TABLE {quote(table)} ALTER COLUMN {quote(column)} TYPE uuid USING {quote(column)}::uuid"
+                ))
+            for table, foreign_key in foreign_keys:
+                constrained = ", ".join(quote(name) for name in foreign_key["constrained_columns"])
+                referred = ", ".join(quote(name) for name in foreign_key["referred_columns"])
+                connection.execute(text(
+                    f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(foreign_key['name'])} "
+                    f"FOREIGN KEY ({constrained}) REFERENCES {quote(foreign_key['referred_table'])} ({referred})"
+                ))
+
+def add_missing_columns():
+    """Add nullable columns introduced by newer models to existing tables.
+    
+    create_all only creates whole tables. Columns that are not nullable or
+    have a server default need a hand-written migration instead.
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        existing = set(inspector.get_table_names())
+        quote = connection.dialect.identifier_preparer.quote
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present or not column.nullable or column.server_default is not None:
+                    continue
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def on_replica(db) -> bool:
+    """Whether a session reads from a replica, whose data may lag the primary's"""
+    return "replica" in db.info
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """Session for read-only endpoints: a replica when one is healthy, otherwise the request's primary session.
+    
+    The primary session is the one get_db gives the rest of the request, and
+    remembers the client so that committing on it pins the client to the
+    primary for a while (read-your-writes).
+    """
+    client = replica_router.client_key(request.headers.get("authorization"))
+    db.info["client"] = client
+    replica = replica_router.choose(client)
+    replica_router.acquire(replica)
+    if replica is None:
+        yield db
+        return
+    read_db = replica.sessions(info={"replica": replica.name})
+    try:
+        yield read_db
+    except DBAPIError:
+        replica_router.eject(replica)
+        raise
+    finally:
+        read_db.close()
+        replica_router.release(replica)
+
+async def get_async_read_db(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """AsyncSession counterpart of get_read_db"""
+    client = replica_router.client_key(request.headers.get("authorization"))
+    db.info["client"] = client
+    replica = replica_router.choose(client)
+    replica_router.acquire(replica)
+    if replica is None:
+        yield db
+        return
+    try:
+        async with replica.async_sessions(info={"replica": replica.name}) as read_db:
+            yield read_db
+    except DBAPIError:
+        replica_router.eject(replica)
+        raise
+    finally:
+        replica_router.release(replica)
+
+if not replica_router.enabled:
+    # Without replicas, reads share the request's primary session at no extra cost
+    get_read_db = get_db
+    get_async_read_db = get_async_db
+
+def pin_writer(db) -> None:
+    """Send the request's client to the primary for a while, as after a commit on its session"""
+    client = db.info.get("client")
+    if client is not None and replica_router.enabled:
+        replica_router.pin(client)
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer(session):
+    # A client that wrote reads from the primary until replicas have caught up
+    pin_writer(session)
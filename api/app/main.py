@@ -1,14 +1,67 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.config import settings
-from app.database import create_tables
-from app.routes import auth, posts
+from app.utils.metrics import MetricsMiddleware, instrument_engine, metrics, record_startup
+from app.database import create_tables, add_missing_columns, upgrade_key_columns, engine, async_engine, replica_router
+from app.routes import auth, posts, users, debug, async_auth, async_posts, async_users
+from app.services.blob_cleanup import blob_janitor
+from app.services.media_derivatives import derivative_worker
+from app.services.post_cache import post_cache
+from app.services.post_events import post_events
+from app.services.post_group_commit import post_group_commit
+from app.services.search_service import SearchService
+from app.services.timeline_fanout import timeline_fanout
+from app.utils.compression import CompressionMiddleware
+from app.utils.hashing import password_hasher
+from app.utils.principal_cache import principal_cache
+from app.utils.profiling import ProfilingMiddleware, watch_engine
+from app.utils.responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+def init_database() -> None:
+    """Convert legacy text keys, then create missing tables, columns, indexes and the full-text index.
+    
+    Run once per deployment, before workers start: run.py does this in the
+    parent process when launching several workers.
+    """
+    upgrade_key_columns()
+    create_tables()
+    add_missing_columns()
+    SearchService.install_index(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.db_init_on_startup:
+        init_database()
+    post_events.start(asyncio.get_running_loop())
+    replica_router.start()
+    if settings.blob_cleanup_enabled:
+        blob_janitor.start()
+    logger.info("Worker %d ready %.0f ms after import", os.getpid(), record_startup("ready") * 1000)
+    yield
+    post_events.shutdown()
+    replica_router.shutdown()
+    # Let queued background work finish before the worker exits; queued posts
+    # first, since their commit queues timeline fan-out
+    post_group_commit.shutdown()
+    derivative_worker.shutdown()
+    timeline_fanout.shutdown()
+    blob_janitor.shutdown()
+    password_hasher.shutdown()
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title=settings.app_name,
         version=settings.version,
-        description="A modern social media API built with FastAPI"
+        description="A modern social media API built with FastAPI",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse
     )
 
     # Add CORS middleware
@@ -19,10 +72,32 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    
+    if settings.compression_min_size > 0:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_min_size,
+            gzip_level=settings.compression_gzip_level,
+            brotli_quality=settings.compression_brotli_quality
+        )
+    
+    if settings.admin_token:
+        app.add_middleware(ProfilingMiddleware)
+    
+    # Outermost, so latency includes the other middleware
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
 
-    # Include routers
-    app.include_router(auth.router)
-    app.include_router(posts.router)
+    # Include routers, async_db swaps in the AsyncSession implementations
+    if settings.async_db:
+        app.include_router(async_auth.router)
+        app.include_router(async_posts.router)
+        app.include_router(async_users.router)
+    else:
+        app.include_router(auth.router)
+        app.include_router(posts.router)
+        app.include_router(users.router)
+    app.include_router(debug.router)
 
     # Health check endpoint
     @app.get("/", tags=["Health"])
@@ -32,11 +107,33 @@ def create_app() -> FastAPI:
     @app.get("/health", tags=["Health"])
     def health_check():
         return {"status": "healthy", "version": settings.version}
+    
+    @app.get("/health/cache", tags=["Health"])
+    def cache_stats():
+        return {"posts": post_cache.stats(), "principals": principal_cache.stats()}
+    
+    @app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+    def read_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
     return app
 
-# Create tables on startup
-create_tables()
+if settings.metrics_enabled:
+    instrument_engine(engine, "sync")
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine, "async")
+    for replica in replica_router.replicas:
+        instrument_engine(replica.engine, replica.name)
+        if replica.async_engine is not None:
+            instrument_engine(replica.async_engine.sync_engine, f"{replica.name}-async")
+watch_engine(engine)
+if async_engine is not None:
+    watch_engine(async_engine.sync_engine)
+for replica in replica_router.replicas:
+    watch_engine(replica.engine)
+    if replica.async_engine is not None:
+        watch_engine(replica.async_engine.sync_engine)
 
-# Create app instance
-app = create_app()
\ No newline at end of file
+# Create app instance; the schema is set up by init_database(), not on import
+app = create_app()
+record_startup("import")
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, DateTime, Integer, Boolean, ForeignKey, Index
+from datetime import datetime
+from app.database import Base
+from app.models.types import CompactUUID
+
+class Follow(Base):
+    __tablename__ = "follows"
+    __table_args__ = (
+        # Followers of an account, scanned when a post is fanned out
+        Index("ix_follows_followeeId_followerId", "followeeId", "followerId"),
+    )
+    
+    followerId = Column(CompactUUID, ForeignKey("users.id"), primary_key=True)
+    followeeId = Column(CompactUUID, ForeignKey("users.id"), primary_key=True)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+
+
+class FollowStats(Base):
+    __tablename__ = "follow_stats"
+    
+    userId = Column(CompactUUID, ForeignKey("users.id"), primary_key=True)
+    followerCount = Column(Integer, nullable=False, default=0)
+    # Set once followerCount reaches the celebrity threshold. It is never cleared
+    # automatically, posts written while it was set are only in the posts table.
+    fanoutOnRead = Column(Boolean, nullable=False, default=False)
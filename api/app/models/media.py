@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index
+from datetime import datetime
+from app.database import Base
+
+class MediaBlob(Base):
+    __tablename__ = "media_blobs"
+    
+    # Content-addressed path relative to the upload dir, e.g. "ab/cd/<sha256>.jpg"
+    path = Column(String, primary_key=True)
+    size = Column(Integer, nullable=False)
+    refCount = Column(Integer, nullable=False, default=1)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+
+
+class MediaVariant(Base):
+    __tablename__ = "media_variants"
+    __table_args__ = (
+        # Lets the orphaned-file sweep look up variant files by name
+        Index("ix_media_variants_path", "path"),
+    )
+    
+    blobPath = Column(String, ForeignKey("media_blobs.path"), primary_key=True)
+    width = Column(Integer, primary_key=True)
+    path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+
+
+class BlobDeletion(Base):
+    __tablename__ = "blob_deletions"
+    
+    # Files to remove once the transaction that released them commits,
+    # written in that transaction and drained by the blob janitor
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    path = Column(String, nullable=False, index=True)
+    createdAt = Column(DateTime, default=datetime.utcnow)
@@ -1,16 +1,32 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 from app.database import Base
+from app.models.types import CompactUUID
+from app.models.media import MediaVariant  # noqa: F401 (mediaVariants target)
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_createdAt_id", "createdAt", "id"),
+        Index("ix_posts_userId_createdAt_id", "userId", "createdAt", "id"),
+        Index("ix_posts_blobUrl", "blobUrl"),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    userId = Column(String, ForeignKey("users.id"))
+    id = Column(CompactUUID, primary_key=True, default=lambda: str(uuid.uuid4()))
+    userId = Column(CompactUUID, ForeignKey("users.id"))
     blobUrl = Column(String, nullable=True)
     text = Column(Text)
     createdAt = Column(DateTime, default=datetime.utcnow)
+    # Null until the first edit; feeds derive their ETags from it
+    updatedAt = Column(DateTime, nullable=True, onupdate=datetime.utcnow)
     
-    owner = relationship("User", back_populates="posts")
\ No newline at end of file
+    owner = relationship("User", back_populates="posts")
+    # Resized copies of the attached image, rows appear once the background job finishes
+    mediaVariants = relationship(
+        "MediaVariant",
+        primaryjoin="foreign(MediaVariant.blobPath) == Post.blobUrl",
+        order_by="MediaVariant.width",
+        viewonly=True,
+    )
\ No newline at end of file
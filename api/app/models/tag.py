@@ -0,0 +1,41 @@
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index
+from app.database import Base
+from app.models.types import CompactUUID
+
+class PostTag(Base):
+    """A hashtag used in a post, stored lowercased without the "#" """
+    __tablename__ = "post_tags"
+    __table_args__ = (
+        # Tag feeds are a range scan on this index
+        Index("ix_post_tags_tag_createdAt_postId", "tag", "createdAt", "postId"),
+    )
+
+    postId = Column(CompactUUID, ForeignKey("posts.id"), primary_key=True)
+    tag = Column(String, primary_key=True)
+    # Copy of the post's createdAt so pages never touch the posts index
+    createdAt = Column(DateTime, nullable=False)
+
+
+class PostMention(Base):
+    """A user mentioned in a post as "@<user id>" """
+    __tablename__ = "post_mentions"
+    __table_args__ = (
+        Index("ix_post_mentions_userId_createdAt_postId", "userId", "createdAt", "postId"),
+    )
+
+    postId = Column(CompactUUID, ForeignKey("posts.id"), primary_key=True)
+    userId = Column(CompactUUID, ForeignKey("users.id"), primary_key=True)
+    createdAt = Column(DateTime, nullable=False)
+
+
+class TagCount(Base):
+    """Uses of a tag by the posts created in one time bucket, summed for trending tags"""
+    __tablename__ = "tag_counts"
+    __table_args__ = (
+        # Trending reads the recent buckets from this index alone
+        Index("ix_tag_counts_bucket_tag_count", "bucket", "tag", "count"),
+    )
+
+    tag = Column(String, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)  # start of the bucket
+    count = Column(Integer, nullable=False, default=0)
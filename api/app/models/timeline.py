@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index
+from app.database import Base
+from app.models.types import CompactUUID
+
+class TimelineEntry(Base):
+    """A post materialized into a follower's home timeline"""
+    __tablename__ = "timeline_entries"
+    __table_args__ = (
+        # Home timeline pages are a range scan on this index
+        Index("ix_timeline_entries_userId_createdAt_postId", "userId", "createdAt", "postId"),
+        Index("ix_timeline_entries_postId", "postId"),
+    )
+    
+    userId = Column(CompactUUID, ForeignKey("users.id"), primary_key=True)
+    postId = Column(CompactUUID, ForeignKey("posts.id"), primary_key=True)
+    authorId = Column(CompactUUID, ForeignKey("users.id"), nullable=False)
+    # Copy of the post's createdAt so pages never touch the posts index
+    createdAt = Column(DateTime, nullable=False)
@@ -3,11 +3,12 @@ from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 from app.database import Base
+from app.models.types import CompactUUID
 
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(CompactUUID, primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String, unique=True, index=True)
     firstName = Column(String)
     lastName = Column(String)
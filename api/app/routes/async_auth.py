@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.controllers.auth import AuthController
+from app.controllers.async_auth import AsyncAuthController
+from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
+from app.utils.dependencies import get_current_user_async
+from app.models.user import User
+from app.database import get_async_db
+from app.utils.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=ProfiledRoute)
+
+@router.post("/signup", response_model=UserResponse)
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return await AsyncAuthController.signup(user, db)
+
+@router.post("/signin", response_model=Token)
+async def signin(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    return await AsyncAuthController.signin(user, db)
+
+@router.get("/me", response_model=UserResponse)
+async def get_current_user_info(current_user: User = Depends(get_current_user_async)):
+    return AuthController.get_current_user_info(current_user)
@@ -0,0 +1,165 @@
+from fastapi import APIRouter, Depends, File, Header, Query, UploadFile
+from typing import List, Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.controllers.async_posts import AsyncPostController
+from app.controllers.posts import PostController
+from app.routes.posts import serve_media, stream_posts, stream_posts_ws
+from app.schemas.post import PostBatchCreate, PostCreate, PostUpdate, PostResponse, PostPage, CompactPostPage, TrendingTag
+from app.utils.dependencies import get_current_user_async
+from app.models.user import User
+from app.database import get_async_db, get_async_read_db
+from app.utils.profiling import ProfiledRoute
+from app.utils.responses import FastJSONResponse
+
+router = APIRouter(prefix="/posts", tags=["Posts"], route_class=ProfiledRoute)
+
+@router.post("", response_model=PostResponse)
+async def create_post(
+    post: PostCreate, 
+    current_user: User = Depends(get_current_user_async), 
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await AsyncPostController.create_post(post, current_user, db)
+
+@router.get("", response_model=Union[PostPage, List[PostResponse], CompactPostPage])
+async def get_posts(
+    skip: int = 0, 
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    ids: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """List posts newest first; passing `cursor` (empty for the first page) switches to keyset pagination.
+    
+    `ids` (comma-separated) fetches those posts instead, in the order given.
+    `compact` lists each owner once in `users` instead of inside every post.
+    """
+    if ids is not None:
+        result = await AsyncPostController.get_posts_by_ids(db, [post_id for post_id in ids.split(",") if post_id])
+    elif cursor is not None:
+        result = await AsyncPostController.get_posts_page(db, limit, cursor)
+    else:
+        result = await AsyncPostController.get_posts(db, skip, limit)
+    return PostController.list_response(result, if_none_match, compact)
+
+@router.post("/batch", response_model=List[PostResponse])
+async def create_posts(
+    batch: PostBatchCreate, 
+    current_user: User = Depends(get_current_user_async), 
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create several posts in one transaction"""
+    return await AsyncPostController.create_posts(batch.posts, current_user, db)
+
+@router.get("/search", response_model=Union[PostPage, CompactPostPage])
+async def search_posts(
+    q: str = Query(..., min_length=1), 
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    userId: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Full-text search over post text, best matches first, paginated with `next_cursor`"""
+    result = await AsyncPostController.search_posts(db, q, limit, cursor, userId)
+    return PostController.list_response(result, if_none_match, compact)
+
+@router.get("/timeline", response_model=Union[PostPage, CompactPostPage])
+async def get_home_timeline(
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    current_user: User = Depends(get_current_user_async), 
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Posts by the current user and the accounts they follow, newest first"""
+    result = await AsyncPostController.get_home_timeline(current_user, db, limit, cursor)
+    return PostController.list_response(result, if_none_match, compact)
+
+@router.get("/trending", response_model=List[TrendingTag])
+async def get_trending_tags(limit: int = 10, db: AsyncSession = Depends(get_async_read_db)):
+    """Hashtags used most by posts created in the trending window"""
+    return await AsyncPostController.get_trending_tags(db, limit)
+
+@router.get("/tags/{tag}", response_model=Union[PostPage, CompactPostPage])
+async def get_tag_posts(
+    tag: str, 
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Posts using a hashtag (with or without the "#", any case), newest first"""
+    result = await AsyncPostController.get_tag_page(tag, db, limit, cursor)
+    return PostController.list_response(result, if_none_match, compact)
+
+@router.get("/mentions/{user_id}", response_model=Union[PostPage, CompactPostPage])
+async def get_mention_posts(
+    user_id: str, 
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Posts mentioning a user as "@<user id>", newest first"""
+    result = await AsyncPostController.get_mention_page(user_id, db, limit, cursor)
+    return PostController.list_response(result, if_none_match, compact)
+
+router.add_api_route("/stream", stream_posts, methods=["GET"])
+router.add_api_websocket_route("/ws", stream_posts_ws)
+
+@router.get("/{post_id}", response_model=PostResponse)
+async def get_post(post_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    return FastJSONResponse(await AsyncPostController.get_post(post_id, db))
+
+@router.put("/{post_id}", response_model=PostResponse)
+async def update_post(
+    post_id: str, 
+    post_update: PostUpdate, 
+    current_user: User = Depends(get_current_user_async), 
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await AsyncPostController.update_post(post_id, post_update, current_user, db)
+
+@router.delete("/{post_id}")
+async def delete_post(
+    post_id: str, 
+    current_user: User = Depends(get_current_user_async), 
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await AsyncPostController.delete_post(post_id, current_user, db)
+
+@router.post("/{post_id}/upload")
+async def upload_media(
+    post_id: str, 
+    file: UploadFile = File(...), 
+    current_user: User = Depends(get_current_user_async), 
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await AsyncPostController.upload_media(post_id, file, current_user, db)
+
+@router.get("/users/{user_id}", response_model=Union[PostPage, List[PostResponse], CompactPostPage])
+async def get_user_posts(
+    user_id: str, 
+    skip: int = 0, 
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """List a user's posts newest first; passing `cursor` switches to keyset pagination"""
+    if cursor is not None:
+        result = await AsyncPostController.get_user_posts_page(db, user_id, limit, cursor)
+    else:
+        result = await AsyncPostController.get_user_posts(db, user_id, skip, limit)
+    return PostController.list_response(result, if_none_match, compact)
+
+# Serving files does not touch the database, reuse the sync handler
+router.add_api_route("/media/{filename:path}", serve_media, methods=["GET"])
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.controllers.async_users import AsyncUserController
+from app.schemas.user import UserResponse
+from app.utils.dependencies import get_current_user_async
+from app.models.user import User
+from app.database import get_async_db
+from app.utils.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/users", tags=["Users"], route_class=ProfiledRoute)
+
+@router.post("/{user_id}/follow")
+async def follow_user(
+    user_id: str, 
+    current_user: User = Depends(get_current_user_async), 
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await AsyncUserController.follow(user_id, current_user, db)
+
+@router.delete("/{user_id}/follow")
+async def unfollow_user(
+    user_id: str, 
+    current_user: User = Depends(get_current_user_async), 
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await AsyncUserController.unfollow(user_id, current_user, db)
+
+@router.get("/{user_id}/followers", response_model=List[UserResponse])
+async def get_followers(user_id: str, skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_async_db)):
+    return await AsyncUserController.get_followers(user_id, db, skip, limit)
+
+@router.get("/{user_id}/following", response_model=List[UserResponse])
+async def get_following(user_id: str, skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_async_db)):
+    return await AsyncUserController.get_following(user_id, db, skip, limit)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from app.utils.dependencies import require_admin
+from app.utils.profiling import profile_buffer
+
+router = APIRouter(prefix="/debug", tags=["Debug"], dependencies=[Depends(require_admin)])
+
+@router.get("/profiles")
+def get_profiles(limit: int = 10):
+    """Latest request profiles, newest first"""
+    return profile_buffer.list()[:max(limit, 0)]
+
+@router.delete("/profiles")
+def clear_profiles():
+    profile_buffer.clear()
+    return {"message": "Profiles cleared"}
@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, Header, Query, UploadFile, HTTPException, Request, Response, WebSocket
 from fastapi.responses import FileResponse
-from typing import List
+from email.utils import formatdate
+from typing import List, Optional, Union
 import os
+import stat
 from sqlalchemy.orm import Session
 from app.controllers.posts import PostController
-from app.schemas.post import PostCreate, PostUpdate, PostResponse
+from app.controllers.stream import StreamController
+from app.services.media_storage import MediaStorage
+from app.services.media_derivatives import derivative_worker
+from app.schemas.post import PostBatchCreate, PostCreate, PostUpdate, PostResponse, PostPage, CompactPostPage, TrendingTag
 from app.utils.dependencies import get_current_user
-from app.models.user import User
-from app.database import get_db
+from app.utils.http_cache import etag_matches, not_modified_since
 from app.config import settings
+from app.models.user import User
+from app.database import get_db, get_read_db
+from app.utils.profiling import ProfiledRoute
+from app.utils.responses import FastJSONResponse
 
-router = APIRouter(prefix="/posts", tags=["Posts"])
+router = APIRouter(prefix="/posts", tags=["Posts"], route_class=ProfiledRoute)
 
 @router.post("", response_model=PostResponse)
 def create_post(
@@ -20,13 +28,113 @@ def create_post(
 ):
     return PostController.create_post(post, current_user, db)
 
-@router.get("", response_model=List[PostResponse])
-def get_posts(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return PostController.get_posts(db, skip, limit)
+@router.get("", response_model=Union[PostPage, List[PostResponse], CompactPostPage])
+def get_posts(
+    skip: int = 0, 
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    ids: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    db: Session = Depends(get_read_db)
+):
+    """List posts newest first; passing `cursor` (empty for the first page) switches to keyset pagination.
+    
+    `ids` (comma-separated) fetches those posts instead, in the order given.
+    `compact` lists each owner once in `users` instead of inside every post.
+    """
+    if ids is not None:
+        result = PostController.get_posts_by_ids(db, [post_id for post_id in ids.split(",") if post_id])
+    elif cursor is not None:
+        result = PostController.get_posts_page(db, limit, cursor)
+    else:
+        result = PostController.get_posts(db, skip, limit)
+    return PostController.list_response(result, if_none_match, compact)
+
+@router.post("/batch", response_model=List[PostResponse])
+def create_posts(
+    batch: PostBatchCreate, 
+    current_user: User = Depends(get_current_user), 
+    db: Session = Depends(get_db)
+):
+    """Create several posts in one transaction"""
+    return PostController.create_posts(batch.posts, current_user, db)
+
+@router.get("/search", response_model=Union[PostPage, CompactPostPage])
+def search_posts(
+    q: str = Query(..., min_length=1), 
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    userId: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    db: Session = Depends(get_db)
+):
+    """Full-text search over post text, best matches first, paginated with `next_cursor`"""
+    result = PostController.search_posts(db, q, limit, cursor, userId)
+    return PostController.list_response(result, if_none_match, compact)
+
+@router.get("/timeline", response_model=Union[PostPage, CompactPostPage])
+def get_home_timeline(
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    current_user: User = Depends(get_current_user), 
+    db: Session = Depends(get_db)
+):
+    """Posts by the current user and the accounts they follow, newest first"""
+    result = PostController.get_home_timeline(current_user, db, limit, cursor)
+    return PostController.list_response(result, if_none_match, compact)
+
+@router.get("/trending", response_model=List[TrendingTag])
+def get_trending_tags(limit: int = 10, db: Session = Depends(get_read_db)):
+    """Hashtags used most by posts created in the trending window"""
+    return PostController.get_trending_tags(db, limit)
+
+@router.get("/tags/{tag}", response_model=Union[PostPage, CompactPostPage])
+def get_tag_posts(
+    tag: str, 
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    db: Session = Depends(get_read_db)
+):
+    """Posts using a hashtag (with or without the "#", any case), newest first"""
+    result = PostController.get_tag_page(tag, db, limit, cursor)
+    return PostController.list_response(result, if_none_match, compact)
+
+@router.get("/mentions/{user_id}", response_model=Union[PostPage, CompactPostPage])
+def get_mention_posts(
+    user_id: str, 
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    db: Session = Depends(get_read_db)
+):
+    """Posts mentioning a user as "@<user id>", newest first"""
+    result = PostController.get_mention_page(user_id, db, limit, cursor)
+    return PostController.list_response(result, if_none_match, compact)
+
+@router.get("/stream")
+async def stream_posts(cursor: Optional[str] = None, last_event_id: Optional[str] = Header(None)):
+    """Server-Sent Events for posts created, updated and deleted from now on.
+    
+    `cursor`, or the Last-Event-ID header EventSource sends when it
+    reconnects, replays the retained events after that id first.
+    """
+    return StreamController.sse(cursor if cursor is not None else last_event_id)
+
+@router.websocket("/ws")
+async def stream_posts_ws(websocket: WebSocket, cursor: Optional[str] = None):
+    """The events of GET /posts/stream as JSON text messages"""
+    await StreamController.websocket(websocket, cursor)
 
 @router.get("/{post_id}", response_model=PostResponse)
-def get_post(post_id: str, db: Session = Depends(get_db)):
-    return PostController.get_post(post_id, db)
+def get_post(post_id: str, db: Session = Depends(get_read_db)):
+    return FastJSONResponse(PostController.get_post(post_id, db))
 
 @router.put("/{post_id}", response_model=PostResponse)
 def update_post(
@@ -54,24 +162,75 @@ def upload_media(
 ):
     return PostController.upload_media(post_id, file, current_user, db)
 
-@router.get("/users/{user_id}", response_model=List[PostResponse])
-def get_user_posts(user_id: str, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return PostController.get_user_posts(db, user_id, skip, limit)
+@router.get("/users/{user_id}", response_model=Union[PostPage, List[PostResponse], CompactPostPage])
+def get_user_posts(
+    user_id: str, 
+    skip: int = 0, 
+    limit: int = 10, 
+    cursor: Optional[str] = None, 
+    compact: bool = False, 
+    if_none_match: Optional[str] = Header(None), 
+    db: Session = Depends(get_read_db)
+):
+    """List a user's posts newest first; passing `cursor` switches to keyset pagination"""
+    if cursor is not None:
+        result = PostController.get_user_posts_page(db, user_id, limit, cursor)
+    else:
+        result = PostController.get_user_posts(db, user_id, skip, limit)
+    return PostController.list_response(result, if_none_match, compact)
 
-@router.get("/media/{filename}")
-def serve_media(filename: str):
-    """Serve uploaded media files"""
-    file_path = os.path.join(settings.upload_dir, filename)
+@router.get("/media/{filename:path}")
+def serve_media(filename: str, request: Request, w: Optional[int] = None):
+    """Serve uploaded media files with validators, 304s and Range support.
+    
+    `w` asks for the smallest resized copy at least that wide, the original is
+    served until the background job has produced it, and for good when no copy
+    will be made (the image is no wider than the copy, or not an image).
+    """
+    variant_pending = False
+    if w is not None and MediaStorage.content_hash(filename):
+        widths = sorted(width for width in settings.media_variant_widths if width >= w)
+        if widths:
+            variant = MediaStorage.variant_path(filename, widths[0])
+            variant_file = MediaStorage.resolve(variant)
+            if variant_file and os.path.isfile(variant_file):
+                filename = variant
+            else:
+                variant_pending = derivative_worker.can_produce(filename, widths[0])
     
-    if not os.path.exists(file_path):
+    file_path = MediaStorage.resolve(filename)
+    
+    try:
+        stat_result = os.stat(file_path) if file_path else None
+    except OSError:
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
         raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(
-        file_path,
-        headers={
-            "Cache-Control": "public, max-age=3600",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET",
-            "Access-Control-Allow-Headers": "*"
-        }
-    )
\ No newline at end of file
+    content_hash = MediaStorage.content_hash(filename)
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET",
+        "Access-Control-Allow-Headers": "*"
+    }
+    if content_hash:
+        # Content-addressed names never change content
+        headers["ETag"] = f'"{content_hash}"'
+        headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        if variant_pending:
+            # The resized copy may exist soon, do not pin the original to this URL
+            headers["Cache-Control"] = "public, max-age=60"
+    else:
+        headers["ETag"] = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        headers["Cache-Control"] = "public, max-age=3600"
+    headers["Last-Modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+    
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, headers["ETag"]) or (
+        if_none_match is None
+        and not_modified_since(request.headers.get("if-modified-since"), stat_result.st_mtime)
+    ):
+        return Response(status_code=304, headers=headers)
+    
+    # FileResponse answers single and multi-range requests with 206 and honours If-Range
+    return FileResponse(file_path, headers=headers, stat_result=stat_result)
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+from typing import List
+from sqlalchemy.orm import Session
+from app.controllers.users import UserController
+from app.schemas.user import UserResponse
+from app.utils.dependencies import get_current_user
+from app.models.user import User
+from app.database import get_db
+from app.utils.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/users", tags=["Users"], route_class=ProfiledRoute)
+
+@router.post("/{user_id}/follow")
+def follow_user(
+    user_id: str, 
+    current_user: User = Depends(get_current_user), 
+    db: Session = Depends(get_db)
+):
+    return UserController.follow(user_id, current_user, db)
+
+@router.delete("/{user_id}/follow")
+def unfollow_user(
+    user_id: str, 
+    current_user: User = Depends(get_current_user), 
+    db: Session = Depends(get_db)
+):
+    return UserController.unfollow(user_id, current_user, db)
+
+@router.get("/{user_id}/followers", response_model=List[UserResponse])
+def get_followers(user_id: str, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+    return UserController.get_followers(user_id, db, skip, limit)
+
+@router.get("/{user_id}/following", response_model=List[UserResponse])
+def get_following(user_id: str, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+    return UserController.get_following(user_id, db, skip, limit)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from app.schemas.user import UserResponse
 
 class PostBase(BaseModel):
@@ -9,6 +9,9 @@ class PostBase(BaseModel):
 class PostCreate(PostBase):
     pass
 
+class PostBatchCreate(BaseModel):
+    posts: List[PostCreate]
+
 class PostUpdate(BaseModel):
     text: Optional[str] = None
 
@@ -17,11 +20,22 @@ class PostResponse(PostBase):
     userId: str
     blobUrl: Optional[str] = None
     createdAt: datetime
+    updatedAt: Optional[datetime] = None
     owner: UserResponse
+    variants: Dict[int, str] = {}  # width -> URL of the resized copy
     
     class Config:
         from_attributes = True
 
+class CompactPostResponse(PostBase):
+    """A post without its owner, which is listed once in CompactPostPage.users"""
+    id: str
+    userId: str
+    blobUrl: Optional[str] = None
+    createdAt: datetime
+    updatedAt: Optional[datetime] = None
+    variants: Dict[int, str] = {}
+
 class PostListResponse(BaseModel):
     id: str
     userId: str
@@ -30,4 +44,17 @@ class PostListResponse(BaseModel):
     createdAt: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PostPage(BaseModel):
+    items: List[PostResponse]
+    next_cursor: Optional[str] = None
+
+class CompactPostPage(BaseModel):
+    items: List[CompactPostResponse]
+    users: Dict[str, UserResponse] = {}  # userId -> owner of the items
+    next_cursor: Optional[str] = None
+
+class TrendingTag(BaseModel):
+    tag: str
+    count: int  # uses by posts created in the trending window
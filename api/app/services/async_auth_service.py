@@ -0,0 +1,71 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+from datetime import timedelta
+from app.models.user import User
+from app.schemas.user import UserCreate, UserLogin
+from app.utils.security import create_access_token
+from app.utils.hashing import password_hasher
+from app.config import settings
+
+class AsyncAuthService:
+    """AsyncSession counterpart of AuthService, used when settings.async_db is on"""
+
+    @staticmethod
+    async def create_user(db: AsyncSession, user: UserCreate) -> User:
+        # Check if user exists
+        db_user = await db.scalar(select(User).where(User.email == user.email))
+        if db_user:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+
+        hashed_password = await password_hasher.hash_async(user.password)
+        db_user = User(
+            email=user.email,
+            firstName=user.firstName,
+            lastName=user.lastName,
+            password=hashed_password,
+            birthday=user.birthday
+        )
+
+        db.add(db_user)
+        await db.commit()
+
+        return db_user
+
+    @staticmethod
+    async def authenticate_user(db: AsyncSession, user_login: UserLogin) -> str:
+        user = await db.scalar(select(User).where(User.email == user_login.email))
+        if user:
+            verified, new_hash = await password_hasher.verify_and_update_async(user_login.password, user.password)
+        if not user or not verified:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect email or password",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        # Upgrade hashes made with a different bcrypt cost
+        if new_hash:
+            user.password = new_hash
+            await db.commit()
+
+        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+        access_token = create_access_token(
+            data={"sub": user.id},
+            expires_delta=access_token_expires
+        )
+
+        return access_token
+
+    @staticmethod
+    async def get_user_by_id(db: AsyncSession, user_id: str) -> User:
+        user = await db.get(User, user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        return user
@@ -0,0 +1,61 @@
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app.models.follow import Follow
+from app.models.user import User
+from app.services.follow_service import FollowService
+from app.services.timeline_fanout import TimelineFanout
+from app.config import settings
+
+class AsyncFollowService:
+    """AsyncSession counterpart of FollowService"""
+
+    @staticmethod
+    async def add_follow(db: AsyncSession, follower_id: str, followee_id: str) -> bool:
+        db.add(Follow(followerId=follower_id, followeeId=followee_id))
+        try:
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            return False
+        return True
+
+    @staticmethod
+    async def follow(db: AsyncSession, followee_id: str, current_user: User) -> bool:
+        FollowService._check_followee(followee_id, current_user)
+        if await db.get(User, followee_id) is None:
+            raise FollowService._user_not_found()
+        if await db.get(Follow, (current_user.id, followee_id)) is not None:
+            return False
+
+        if not await AsyncFollowService.add_follow(db, current_user.id, followee_id):
+            return False
+        await db.execute(FollowService.increment_stmt(followee_id))
+        await db.execute(TimelineFanout.backfill_stmt(current_user.id, followee_id, settings.timeline_backfill))
+        await db.commit()
+
+        return True
+
+    @staticmethod
+    async def unfollow(db: AsyncSession, followee_id: str, current_user: User) -> bool:
+        follow = await db.get(Follow, (current_user.id, followee_id))
+        if follow is None:
+            return False
+
+        await db.delete(follow)
+        await db.execute(FollowService.decrement_stmt(followee_id))
+        await db.execute(TimelineFanout.prune_stmt(current_user.id, followee_id))
+        await db.commit()
+
+        return True
+
+    @staticmethod
+    async def get_followers(db: AsyncSession, user_id: str, skip: int = 0, limit: int = 10) -> List[User]:
+        stmt = select(User).join(Follow, Follow.followerId == User.id).where(Follow.followeeId == user_id)
+        return list(await db.scalars(stmt.order_by(Follow.createdAt.desc()).offset(skip).limit(limit)))
+
+    @staticmethod
+    async def get_following(db: AsyncSession, user_id: str, skip: int = 0, limit: int = 10) -> List[User]:
+        stmt = select(User).join(Follow, Follow.followeeId == User.id).where(Follow.followerId == user_id)
+        return list(await db.scalars(stmt.order_by(Follow.createdAt.desc()).offset(skip).limit(limit)))
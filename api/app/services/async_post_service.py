@@ -0,0 +1,219 @@
+import asyncio
+from sqlalchemy import select, tuple_, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from fastapi import HTTPException, status, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from typing import Collection, List, Optional, Tuple
+from app.models.post import Post
+from app.models.tag import PostMention, PostTag
+from app.models.user import User
+from app.schemas.post import PostCreate, PostUpdate
+from app.services.media_storage import MediaStorage, StagedMedia
+from app.services.post_service import PostService
+from app.services.media_derivatives import derivative_worker
+from app.services.blob_cleanup import blob_janitor
+from app.services.post_group_commit import post_group_commit
+from app.services.tag_service import TagService
+from app.services.timeline_fanout import TimelineFanout, timeline_fanout
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.database import pin_writer
+from app.config import settings
+
+class AsyncPostService:
+    """AsyncSession counterpart of PostService, used when settings.async_db is on"""
+
+    @staticmethod
+    def _with_owner() -> Select:
+        return select(Post).options(joinedload(Post.owner), selectinload(Post.mediaVariants))
+
+    @staticmethod
+    def _newest_first(stmt: Select, key=(Post.createdAt, Post.id)) -> Select:
+        return stmt.order_by(*(column.desc() for column in key))
+
+    @staticmethod
+    async def _keyset_page(db: AsyncSession, stmt: Select, limit: int, cursor: Optional[str], key=(Post.createdAt, Post.id)) -> Tuple[List[Post], Optional[str]]:
+        limit = max(limit, 1)
+        position = decode_cursor(cursor)
+        if position is not None:
+            stmt = stmt.where(tuple_(*key) < position)
+
+        result = await db.scalars(AsyncPostService._newest_first(stmt, key).limit(limit + 1))
+        posts = list(result)
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = encode_cursor(posts[-1].createdAt, posts[-1].id)
+        return posts, next_cursor
+
+    @staticmethod
+    async def _get_owned_post(db: AsyncSession, post_id: str, current_user: User, action: str) -> Post:
+        stmt = AsyncPostService._with_owner().where(Post.id == post_id, Post.userId == current_user.id)
+        post = await db.scalar(stmt)
+        if not post:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Post not found or you don't have permission to {action} it"
+            )
+        return post
+
+    @staticmethod
+    async def create_post(db: AsyncSession, post: PostCreate, current_user: User) -> Post:
+        row = PostService._new_post_rows([post], current_user)[0]
+        if settings.post_group_commit:
+            # The shared transactions run on the group commit thread's own session
+            db_post = await asyncio.wrap_future(post_group_commit.submit(row))
+            pin_writer(db)
+        else:
+            db_post = Post(**row)
+            db.add(db_post)
+            await TagService.index_new_async(db, [row])
+            await db.commit()
+            timeline_fanout.submit([row["id"]])
+        PostService._mark_loaded(db_post, row, current_user)
+
+        return db_post
+
+    @staticmethod
+    async def create_posts(db: AsyncSession, posts: List[PostCreate], current_user: User) -> List[Post]:
+        PostService._check_batch_size(len(posts), settings.batch_max_posts)
+        rows = PostService._new_post_rows(posts, current_user)
+        db_posts = [Post(**row) for row in rows]
+
+        db.add_all(db_posts)
+        await TagService.index_new_async(db, rows)
+        await db.commit()
+        for db_post in db_posts:
+            set_committed_value(db_post, "owner", current_user)
+            set_committed_value(db_post, "mediaVariants", [])
+        timeline_fanout.submit([row["id"] for row in rows])
+
+        return db_posts
+
+    @staticmethod
+    async def get_posts_by_ids(db: AsyncSession, post_ids: List[str], cached: Collection[str] = ()) -> List[Post]:
+        PostService._check_batch_size(len(post_ids), settings.batch_max_ids)
+        missing = [post_id for post_id in dict.fromkeys(post_ids) if post_id not in cached]
+        if not missing:
+            return []
+        posts = await db.scalars(AsyncPostService._with_owner().where(Post.id.in_(missing)))
+        by_id = {post.id: post for post in posts}
+        return [by_id[post_id] for post_id in missing if post_id in by_id]
+
+    @staticmethod
+    async def get_post_by_id(db: AsyncSession, post_id: str) -> Post:
+        post = await db.scalar(AsyncPostService._with_owner().where(Post.id == post_id))
+        if not post:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+        return post
+
+    @staticmethod
+    async def get_posts(db: AsyncSession, skip: int = 0, limit: int = 10) -> List[Post]:
+        stmt = AsyncPostService._newest_first(AsyncPostService._with_owner()).offset(skip).limit(limit)
+        return list(await db.scalars(stmt))
+
+    @staticmethod
+    async def get_posts_page(db: AsyncSession, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        return await AsyncPostService._keyset_page(db, AsyncPostService._with_owner(), limit, cursor)
+
+    @staticmethod
+    async def get_user_posts(db: AsyncSession, user_id: str, skip: int = 0, limit: int = 10) -> List[Post]:
+        stmt = AsyncPostService._with_owner().where(Post.userId == user_id)
+        stmt = AsyncPostService._newest_first(stmt).offset(skip).limit(limit)
+        return list(await db.scalars(stmt))
+
+    @staticmethod
+    async def get_user_posts_page(db: AsyncSession, user_id: str, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        stmt = AsyncPostService._with_owner().where(Post.userId == user_id)
+        return await AsyncPostService._keyset_page(db, stmt, limit, cursor)
+
+    @staticmethod
+    async def get_tag_page(db: AsyncSession, tag: str, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        tag = TagService.normalize_tag(tag)
+        if tag is None:
+            return [], None
+        stmt = AsyncPostService._with_owner().join(PostTag, PostTag.postId == Post.id).where(PostTag.tag == tag)
+        return await AsyncPostService._keyset_page(db, stmt, limit, cursor, (PostTag.createdAt, PostTag.postId))
+
+    @staticmethod
+    async def get_mention_page(db: AsyncSession, user_id: str, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        stmt = AsyncPostService._with_owner().join(PostMention, PostMention.postId == Post.id).where(PostMention.userId == user_id)
+        return await AsyncPostService._keyset_page(db, stmt, limit, cursor, (PostMention.createdAt, PostMention.postId))
+
+    @staticmethod
+    async def update_post(db: AsyncSession, post_id: str, post_update: PostUpdate, current_user: User) -> Post:
+        post = await AsyncPostService._get_owned_post(db, post_id, current_user, "modify")
+
+        if post_update.text is not None:
+            await TagService.reindex_async(db, post.id, post.createdAt, post.text, post_update.text)
+            post.text = post_update.text
+
+        await db.commit()
+
+        return post
+
+    @staticmethod
+    async def delete_post(db: AsyncSession, post_id: str, current_user: User) -> bool:
+        post = await AsyncPostService._get_owned_post(db, post_id, current_user, "delete")
+
+        blob_url = post.blobUrl
+        unlink_blob = bool(blob_url) and await AsyncPostService._release_blob(db, blob_url)
+
+        await db.execute(TimelineFanout.delete_post_stmt(post.id))
+        await TagService.unindex_async(db, post.id, post.createdAt)
+        await db.delete(post)
+        await db.commit()
+
+        if unlink_blob:
+            blob_janitor.wake()
+
+        return True
+
+    @staticmethod
+    async def _acquire_blob(db: AsyncSession, staged: StagedMedia) -> None:
+        await db.execute(MediaStorage.acquire_stmt(staged))
+
+    @staticmethod
+    async def _release_blob(db: AsyncSession, path: str) -> bool:
+        remaining = (await db.execute(MediaStorage.decrement_stmt(path))).scalar()
+        if remaining is not None and remaining > 0:
+            return False
+        if remaining is not None:
+            await db.execute(MediaStorage.delete_variants_stmt(path))
+            await db.execute(MediaStorage.delete_unreferenced_stmt(path))
+        await db.execute(MediaStorage.schedule_removal_stmt(path))
+        return True
+
+    @staticmethod
+    async def upload_media(db: AsyncSession, post_id: str, file: UploadFile, current_user: User) -> str:
+        post = await AsyncPostService._get_owned_post(db, post_id, current_user, "modify")
+
+        # File I/O stays off the event loop
+        staged = await run_in_threadpool(MediaStorage.stage, file.file, file.filename)
+        previous = post.blobUrl
+        if previous == staged.path:
+            await run_in_threadpool(MediaStorage.discard, staged)
+            return previous
+
+        try:
+            await AsyncPostService._acquire_blob(db, staged)
+            unlink_previous = bool(previous) and await AsyncPostService._release_blob(db, previous)
+            post.blobUrl = staged.path
+            await db.execute(MediaStorage.cancel_removal_stmt(staged.path))
+            await run_in_threadpool(MediaStorage.publish, staged)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            await run_in_threadpool(MediaStorage.discard, staged)
+            raise
+
+        if unlink_previous:
+            blob_janitor.wake()
+
+        derivative_worker.submit(staged.path)
+
+        return staged.path
@@ -1,16 +1,32 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from datetime import timedelta
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin
-from app.utils.security import get_password_hash, verify_password, create_access_token
+from app.utils.security import create_access_token
+from app.utils.hashing import password_hasher
 from app.config import settings
 
 class AuthService:
+    # Signup and signin await the hasher instead of blocking on it, so a
+    # threadpool thread is only held for the queries around the hash
+
+    @staticmethod
+    def get_user_by_email(db: Session, email: str) -> User:
+        return db.query(User).filter(User.email == email).first()
+
     @staticmethod
-    def create_user(db: Session, user: UserCreate) -> User:
+    def save(db: Session, db_user: User) -> User:
+        db.add(db_user)
+        db.commit()
+        db.refresh(db_user)
+        return db_user
+
+    @staticmethod
+    async def create_user(db: Session, user: UserCreate) -> User:
         # Check if user exists
-        db_user = db.query(User).filter(User.email == user.email).first()
+        db_user = await run_in_threadpool(AuthService.get_user_by_email, db, user.email)
         if db_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -18,7 +34,7 @@ class AuthService:
             )
         
         # Create new user
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await password_hasher.hash_async(user.password)
         db_user = User(
             email=user.email,
             firstName=user.firstName,
@@ -27,22 +43,25 @@ class AuthService:
             birthday=user.birthday
         )
         
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        
-        return db_user
+        return await run_in_threadpool(AuthService.save, db, db_user)
     
     @staticmethod
-    def authenticate_user(db: Session, user_login: UserLogin) -> str:
-        user = db.query(User).filter(User.email == user_login.email).first()
-        if not user or not verify_password(user_login.password, user.password):
+    async def authenticate_user(db: Session, user_login: UserLogin) -> str:
+        user = await run_in_threadpool(AuthService.get_user_by_email, db, user_login.email)
+        if user:
+            verified, new_hash = await password_hasher.verify_and_update_async(user_login.password, user.password)
+        if not user or not verified:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        # Upgrade hashes made with a different bcrypt cost
+        if new_hash:
+            user.password = new_hash
+            await run_in_threadpool(db.commit)
+        
         access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
         access_token = create_access_token(
             data={"sub": user.id}, 
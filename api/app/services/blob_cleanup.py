@@ -0,0 +1,211 @@
+import logging
+import os
+import threading
+import time
+from typing import Iterator, List, Optional, Set
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.media import BlobDeletion, MediaBlob, MediaVariant
+from app.models.post import Post
+from app.services.media_storage import MediaStorage
+from app.utils.metrics import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TEMP_DIR = ".tmp"
+
+files_removed = metrics.counter("postly_media_files_removed_total", "Media files removed from the upload dir", ("reason",))
+
+class BlobJanitor:
+    """Background thread that removes media files outside of requests.
+
+    Requests release files by writing `blob_deletions` rows in the same
+    transaction as the change, so a rolled back delete keeps its file and a
+    committed one is never forgotten. The janitor drains those rows after
+    commit, and every `gc_interval` sweeps the upload dir for files nothing
+    references (uploads whose commit failed or that a crash interrupted).
+    """
+
+    def __init__(self, poll_interval: int, gc_interval: int, gc_grace: int, batch_size: int):
+        self.poll_interval = poll_interval
+        self.gc_interval = gc_interval
+        self.gc_grace = gc_grace
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="blob-janitor", daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        """Drain the queue now rather than at the next poll; a no-op when not started here"""
+        self._wake.set()
+
+    def shutdown(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        next_sweep = time.monotonic()
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                self.drain()
+                if self.gc_interval > 0 and time.monotonic() >= next_sweep:
+                    next_sweep = time.monotonic() + self.gc_interval
+                    self.sweep()
+            except Exception:
+                logger.exception("Media cleanup failed")
+            self._wake.wait(self.poll_interval)
+
+    @staticmethod
+    def _is_referenced(db: Session, path: str) -> bool:
+        if db.execute(select(MediaBlob.path).where(MediaBlob.path == path, MediaBlob.refCount > 0)).first():
+            return True
+        # Files uploaded before content addressing are referenced by posts directly
+        return MediaStorage.content_hash(path) is None and db.execute(
+            select(Post.id).where(Post.blobUrl == path).limit(1)
+        ).first() is not None
+
+    def drain(self) -> int:
+        """Remove the files queued by committed transactions, returning how many were processed"""
+        processed = 0
+        last_id = 0
+        db = SessionLocal()
+        try:
+            while True:
+                rows = db.execute(
+                    select(BlobDeletion.id, BlobDeletion.path)
+                    .where(BlobDeletion.id > last_id)
+                    .order_by(BlobDeletion.id)
+                    .limit(self.batch_size)
+                ).all()
+                db.rollback()
+                if not rows:
+                    return processed
+                for row in rows:
+                    last_id = row.id
+                    try:
+                        # Claiming the row locks out an upload cancelling it until the
+                        # file is gone, so a file is never removed under a new reference
+                        claimed = db.execute(delete(BlobDeletion).where(BlobDeletion.id == row.id)).rowcount
+                        if claimed and not self._is_referenced(db, row.path):
+                            MediaStorage.remove(row.path)
+                            files_removed.inc("deleted")
+                        db.commit()
+                        processed += 1
+                    except OSError:
+                        # Left queued and retried at the next poll
+                        db.rollback()
+                        logger.warning("Could not remove %s", row.path, exc_info=True)
+        finally:
+            db.close()
+
+    def _stored_files(self) -> Iterator[str]:
+        """Yield every file under the upload dir as a stored path, without listing it all at once"""
+        root = settings.upload_dir
+        pending = [""]
+        while pending:
+            prefix = pending.pop()
+            try:
+                entries = os.scandir(os.path.join(root, prefix))
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    path = f"{prefix}{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(f"{path}/")
+                    elif entry.is_file(follow_symlinks=False):
+                        yield path
+
+    def _old_enough(self, path: str, cutoff: float) -> bool:
+        try:
+            return os.stat(MediaStorage.full_path(path)).st_mtime < cutoff
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _referenced(db: Session, paths: List[str]) -> Set[str]:
+        referenced = set(db.scalars(select(MediaBlob.path).where(MediaBlob.path.in_(paths))))
+        referenced.update(db.scalars(select(MediaVariant.path).where(MediaVariant.path.in_(paths))))
+        referenced.update(db.scalars(select(Post.blobUrl).where(Post.blobUrl.in_(paths))))
+        return referenced
+
+    def _collect(self, db: Session, paths: List[str], cutoff: float) -> int:
+        removed = 0
+        referenced = self._referenced(db, paths)
+        db.rollback()
+        for path in paths:
+            # Checked again, an upload may have refreshed it since it was listed
+            if path in referenced or not self._old_enough(path, cutoff):
+                continue
+            try:
+                os.remove(MediaStorage.full_path(path))
+            except FileNotFoundError:
+                continue
+            removed += 1
+        files_removed.inc("orphaned", amount=removed)
+        return removed
+
+    def sweep(self) -> int:
+        """Remove unreferenced files older than the grace period, returning how many were removed.
+
+        The upload dir is walked in batches of `batch_size` files, each
+        checked against the blob, variant and post tables with indexed
+        lookups, so memory stays flat however many files there are. Leftover
+        staging files are removed once they are as old.
+
+        Only content-addressed files are collected. Files uploaded before
+        content addressing can be referenced by posts that still hold a bare
+        filename or a full URL, so they are left to migrate_blob_urls.py.
+        """
+        cutoff = time.time() - self.gc_grace
+        removed = 0
+        batch: List[str] = []
+        db = SessionLocal()
+        try:
+            for path in self._stored_files():
+                if self._stopping:
+                    break
+                if not self._old_enough(path, cutoff):
+                    continue
+                if path.startswith(f"{TEMP_DIR}/"):
+                    try:
+                        os.remove(MediaStorage.full_path(path))
+                        removed += 1
+                        files_removed.inc("orphaned")
+                    except FileNotFoundError:
+                        pass
+                    continue
+                if MediaStorage.content_hash(path) is None:
+                    continue
+                batch.append(path)
+                if len(batch) >= self.batch_size:
+                    removed += self._collect(db, batch, cutoff)
+                    batch = []
+            if batch:
+                removed += self._collect(db, batch, cutoff)
+        finally:
+            db.close()
+        if removed:
+            logger.info("Removed %d orphaned media files", removed)
+        return removed
+
+blob_janitor = BlobJanitor(
+    settings.blob_cleanup_interval,
+    settings.blob_gc_interval,
+    settings.blob_gc_grace,
+    settings.blob_gc_batch_size,
+)
@@ -0,0 +1,121 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import sessionmaker
+from app.models.post import Post
+
+class BlobMigration:
+    """A rewrite of posts.blobUrl values, applied by BlobMigrationRunner.
+
+    `migrate` runs on worker threads, so it may touch the filesystem. It
+    returns the new value, the same value to leave the row alone, or None to
+    clear the blob.
+    """
+
+    name = "blob-migration"
+
+    def migrate(self, blob_url: str) -> Optional[str]:
+        raise NotImplementedError
+
+class BlobMigrationRunner:
+    """Streams posts with a blob in id order and rewrites them in committed batches.
+
+    After every batch the last post id is written to a checkpoint file, so an
+    interrupted run resumes where it stopped. In dry-run mode nothing is
+    written and the counts describe what a real run would do.
+    """
+
+    def __init__(
+        self,
+        migration: BlobMigration,
+        session_factory: sessionmaker,
+        batch_size: int = 1000,
+        workers: int = 16,
+        checkpoint_path: Optional[str] = None,
+        dry_run: bool = False,
+        progress: Callable[[str], None] = print,
+    ):
+        self.migration = migration
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.workers = workers
+        self.checkpoint_path = checkpoint_path
+        self.dry_run = dry_run
+        self.progress = progress
+
+    def _load_checkpoint(self) -> Dict:
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("migration") == self.migration.name:
+                return checkpoint
+        return {"migration": self.migration.name, "last_id": None, "counts": {}}
+
+    def _save_checkpoint(self, checkpoint: Dict) -> None:
+        if not self.checkpoint_path or self.dry_run:
+            return
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    @staticmethod
+    def update_stmt():
+        return (
+            update(Post)
+            .where(Post.id == bindparam("post_id"))
+            .values(blobUrl=bindparam("new_url"))
+        )
+
+    def run(self) -> Dict[str, int]:
+        checkpoint = self._load_checkpoint()
+        counts = {"scanned": 0, "unchanged": 0, "updated": 0, "cleared": 0}
+        counts.update(checkpoint["counts"])
+        if checkpoint["last_id"] is not None:
+            self.progress(f"Resuming {self.migration.name} after post {checkpoint['last_id']}")
+
+        stmt = select(Post.id, Post.blobUrl).where(Post.blobUrl.isnot(None)).order_by(Post.id)
+        if checkpoint["last_id"] is not None:
+            stmt = stmt.where(Post.id > checkpoint["last_id"])
+
+        started = time.perf_counter()
+        # Separate sessions: the reader keeps its cursor open while the writer
+        # commits, which SQLite allows in WAL mode
+        reader = self.session_factory()
+        writer = self.session_factory()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # yield_per streams rows instead of loading the whole result
+                result = reader.execute(stmt.execution_options(yield_per=self.batch_size))
+                for rows in result.partitions():
+                    new_urls = executor.map(self.migration.migrate, [row.blobUrl for row in rows])
+                    changes = []
+                    for row, new_url in zip(rows, new_urls):
+                        if new_url == row.blobUrl:
+                            counts["unchanged"] += 1
+                            continue
+                        counts["updated" if new_url is not None else "cleared"] += 1
+                        changes.append({"post_id": row.id, "new_url": new_url})
+                    counts["scanned"] += len(rows)
+
+                    if changes and not self.dry_run:
+                        writer.connection().execute(self.update_stmt(), changes)
+                        writer.commit()
+                    checkpoint["last_id"] = rows[-1].id
+                    checkpoint["counts"] = counts
+                    self._save_checkpoint(checkpoint)
+                    self.progress(
+                        f"{counts['scanned']} scanned, {counts['updated']} updated, "
+                        f"{counts['cleared']} cleared ({time.perf_counter() - started:.1f}s)"
+                    )
+        finally:
+            reader.close()
+            writer.close()
+
+        # A finished migration starts from the beginning when run again
+        if self.checkpoint_path and not self.dry_run and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return counts
@@ -0,0 +1,102 @@
+from sqlalchemy import update, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from typing import List
+from app.models.follow import Follow, FollowStats
+from app.models.user import User
+from app.database import upsert
+from app.services.timeline_fanout import TimelineFanout
+from app.config import settings
+
+class FollowService:
+    @staticmethod
+    def _check_followee(followee_id: str, current_user: User) -> None:
+        if followee_id == current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You cannot follow yourself"
+            )
+    
+    @staticmethod
+    def _user_not_found() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    @staticmethod
+    def increment_stmt(user_id: str):
+        """Count a new follower, switching the account to fan-out-on-read at the threshold.
+
+        A single upsert, so concurrent first follows of an account add up
+        instead of both inserting its stats row.
+        """
+        threshold = settings.timeline_celebrity_threshold
+        stmt = upsert(FollowStats).values(userId=user_id, followerCount=1, fanoutOnRead=threshold <= 1)
+        return stmt.on_conflict_do_update(
+            index_elements=[FollowStats.userId],
+            set_={
+                "followerCount": FollowStats.followerCount + 1,
+                "fanoutOnRead": or_(FollowStats.fanoutOnRead, FollowStats.followerCount + 1 >= threshold),
+            },
+        )
+    
+    @staticmethod
+    def decrement_stmt(user_id: str):
+        return (
+            update(FollowStats)
+            .where(FollowStats.userId == user_id)
+            .values(followerCount=FollowStats.followerCount - 1)
+        )
+    
+    @staticmethod
+    def add_follow(db: Session, follower_id: str, followee_id: str) -> bool:
+        """Insert the follow row, False when a concurrent request (a double-clicked follow) inserted it first"""
+        db.add(Follow(followerId=follower_id, followeeId=followee_id))
+        try:
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            return False
+        return True
+    
+    @staticmethod
+    def follow(db: Session, followee_id: str, current_user: User) -> bool:
+        """Follow an account and copy its recent posts into the follower's timeline"""
+        FollowService._check_followee(followee_id, current_user)
+        if db.get(User, followee_id) is None:
+            raise FollowService._user_not_found()
+        if db.get(Follow, (current_user.id, followee_id)) is not None:
+            return False
+        
+        if not FollowService.add_follow(db, current_user.id, followee_id):
+            return False
+        db.execute(FollowService.increment_stmt(followee_id))
+        db.execute(TimelineFanout.backfill_stmt(current_user.id, followee_id, settings.timeline_backfill))
+        db.commit()
+        
+        return True
+    
+    @staticmethod
+    def unfollow(db: Session, followee_id: str, current_user: User) -> bool:
+        follow = db.get(Follow, (current_user.id, followee_id))
+        if follow is None:
+            return False
+        
+        db.delete(follow)
+        db.execute(FollowService.decrement_stmt(followee_id))
+        db.execute(TimelineFanout.prune_stmt(current_user.id, followee_id))
+        db.commit()
+        
+        return True
+    
+    @staticmethod
+    def get_followers(db: Session, user_id: str, skip: int = 0, limit: int = 10) -> List[User]:
+        query = db.query(User).join(Follow, Follow.followerId == User.id).filter(Follow.followeeId == user_id)
+        return query.order_by(Follow.createdAt.desc()).offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def get_following(db: Session, user_id: str, skip: int = 0, limit: int = 10) -> List[User]:
+        query = db.query(User).join(Follow, Follow.followeeId == User.id).filter(Follow.followerId == user_id)
+        return query.order_by(Follow.createdAt.desc()).offset(skip).limit(limit).all()
@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from app.database import SessionLocal
+from app.models.media import MediaBlob, MediaVariant
+from app.services.media_storage import MediaStorage
+from app.config import settings
+
+try:
+    from PIL import Image, UnidentifiedImageError
+except ImportError:  # Pillow is optional, originals are served when it is missing
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp", "bmp", "tiff"}
+
+@lru_cache(maxsize=4096)
+def _image_width(path: str) -> Optional[int]:
+    """Width of a stored image read from its header, cached since content-addressed files never change"""
+    try:
+        with Image.open(MediaStorage.full_path(path)) as image:
+            return image.width
+    except (OSError, UnidentifiedImageError):
+        return None
+
+class DerivativeWorker:
+    """Bounded background pool that writes resized WebP copies of uploaded images.
+
+    Pillow releases the GIL while decoding and resizing, so a small thread pool
+    is enough. Jobs beyond `queue_limit` are skipped rather than queued; those
+    images keep being served at their original size.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None and self.workers > 0 and bool(settings.media_variant_widths)
+
+    def can_produce(self, path: str, width: int) -> bool:
+        """Whether a copy of a stored file at `width` can exist, now or once its job runs"""
+        extension = os.path.splitext(path)[1].lstrip(".")
+        if not self.enabled or extension not in IMAGE_EXTENSIONS:
+            return False
+        # Copies as wide as the original are never made, see _generate
+        source_width = _image_width(path)
+        return source_width is not None and width < source_width
+
+    def submit(self, path: str) -> bool:
+        """Queue derivative generation for a stored file without waiting for it"""
+        extension = os.path.splitext(path)[1].lstrip(".")
+        if not self.enabled or extension not in IMAGE_EXTENSIONS:
+            return False
+        with self._lock:
+            if self._pending >= self.queue_limit:
+                logger.warning("Derivative queue full, skipping %s", path)
+                return False
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="media-derivatives")
+        future = self._executor.submit(self._generate, path)
+        future.add_done_callback(self._done)
+        return True
+
+    def _done(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+        if future.exception() is not None:
+            logger.error("Derivative generation failed", exc_info=future.exception())
+
+    def _generate(self, path: str) -> None:
+        db = SessionLocal()
+        try:
+            if db.get(MediaBlob, path) is None:
+                return  # Deleted before the job ran
+            done = {width for (width,) in db.query(MediaVariant.width).filter(MediaVariant.blobPath == path)}
+
+            try:
+                image = Image.open(MediaStorage.full_path(path))
+                image.load()
+            except (OSError, UnidentifiedImageError):
+                return
+
+            if image.mode not in ("RGB", "RGBA"):
+                has_alpha = "A" in image.getbands() or "transparency" in image.info
+                image = image.convert("RGBA" if has_alpha else "RGB")
+
+            for width in sorted(settings.media_variant_widths):
+                # Never upscale, clients fall back to the original instead
+                if width in done or width >= image.width:
+                    continue
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS)
+
+                variant_path = MediaStorage.variant_path(path, width)
+                full_path = MediaStorage.full_path(variant_path)
+                temp_path = f"{full_path}.{uuid.uuid4().hex}.tmp"
+                resized.save(temp_path, format="WEBP", quality=settings.media_variant_quality)
+                os.replace(temp_path, full_path)
+
+                db.add(MediaVariant(blobPath=path, width=width, path=variant_path, size=os.path.getsize(full_path)))
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Another job for the same content recorded it first
+                    db.rollback()
+        finally:
+            db.close()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+derivative_worker = DerivativeWorker(settings.media_workers, settings.media_queue_limit)
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import re
+import uuid
+from typing import BinaryIO, NamedTuple, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import update, delete, insert
+from app.models.media import BlobDeletion, MediaBlob, MediaVariant
+from app.database import upsert
+from app.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64}(?:_w[0-9]+)?)(?:\.[a-z0-9]+)?$")
+
+class StagedMedia(NamedTuple):
+    path: str  # final path relative to the upload dir
+    size: int
+    temp_path: str
+
+class MediaStorage:
+    """Content-addressed media files under `<upload_dir>/ab/cd/<sha256>.<ext>`.
+
+    Uploads are staged to a temp file while hashed, then moved into place just
+    before the database change referencing them commits, so a committed row
+    never points at a missing file; one left behind by a failed commit is
+    collected by the orphan sweep. Identical content is stored once and shared
+    through the `media_blobs` reference counts. Files that lose their last
+    reference are queued for the blob janitor to remove.
+    """
+
+    @staticmethod
+    def _extension(filename: Optional[str]) -> str:
+        if not filename or "." not in filename:
+            return ""
+        return re.sub(r"[^a-z0-9]", "", filename.rsplit(".", 1)[-1].lower())[:10]
+
+    @staticmethod
+    def full_path(path: str) -> str:
+        return os.path.join(settings.upload_dir, path)
+
+    @staticmethod
+    def content_hash(path: str) -> Optional[str]:
+        """Return the SHA-256 (plus any variant suffix) of a content-addressed path, None for legacy names"""
+        match = CONTENT_ADDRESSED_NAME.match(path)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def resolve(path: str) -> Optional[str]:
+        """Map a stored path to a file on disk, refusing anything outside the upload dir"""
+        root = os.path.realpath(settings.upload_dir)
+        full_path = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, full_path]) != root:
+            return None
+        return full_path
+
+    @staticmethod
+    def stage(source: BinaryIO, filename: Optional[str]) -> StagedMedia:
+        """Stream an upload to a temp file in chunks, hashing as it goes"""
+        temp_dir = os.path.join(settings.upload_dir, ".tmp")
+        os.makedirs(temp_dir, exist_ok=True)
+        temp_path = os.path.join(temp_dir, uuid.uuid4().hex)
+        
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as buffer:
+                while chunk := source.read(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > settings.max_file_size:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"File too large. Maximum size is {settings.max_file_size} bytes"
+                        )
+                    digest.update(chunk)
+                    buffer.write(chunk)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        
+        sha = digest.hexdigest()
+        extension = MediaStorage._extension(filename)
+        name = f"{sha}.{extension}" if extension else sha
+        return StagedMedia(path=f"{sha[:2]}/{sha[2:4]}/{name}", size=size, temp_path=temp_path)
+
+    @staticmethod
+    def publish(staged: StagedMedia) -> None:
+        """Move a staged file into place, or drop it when the content already exists"""
+        final_path = MediaStorage.full_path(staged.path)
+        if os.path.exists(final_path):
+            os.remove(staged.temp_path)
+            # Mark it as fresh, so the orphan sweep leaves it to this upload's commit
+            os.utime(final_path)
+            return
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(staged.temp_path, final_path)
+
+    @staticmethod
+    def discard(staged: StagedMedia) -> None:
+        if os.path.exists(staged.temp_path):
+            os.remove(staged.temp_path)
+
+    @staticmethod
+    def variant_path(path: str, width: int) -> str:
+        """Path of the resized WebP copy of a stored file, e.g. "ab/cd/<sha256>_w320.webp" """
+        stem = os.path.splitext(path)[0]
+        return f"{stem}_w{width}.webp"
+
+    @staticmethod
+    def remove(path: str) -> None:
+        """Remove a stored file together with any derivatives generated from it"""
+        full_path = MediaStorage.resolve(path)
+        if not full_path:
+            return
+        if os.path.exists(full_path):
+            os.remove(full_path)
+        
+        directory = os.path.dirname(full_path)
+        variant_prefix = os.path.splitext(os.path.basename(full_path))[0] + "_w"
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.startswith(variant_prefix):
+                    os.remove(os.path.join(directory, name))
+
+    # Reference counting statements, shared by the sync and async services
+
+    @staticmethod
+    def acquire_stmt(staged: StagedMedia):
+        # One statement, so concurrent uploads of the same new file both count instead of colliding
+        stmt = upsert(MediaBlob).values(path=staged.path, size=staged.size, refCount=1)
+        return stmt.on_conflict_do_update(
+            index_elements=[MediaBlob.path],
+            set_={"refCount": MediaBlob.refCount + 1},
+        )
+
+    @staticmethod
+    def decrement_stmt(path: str):
+        return (
+            update(MediaBlob)
+            .where(MediaBlob.path == path)
+            .values(refCount=MediaBlob.refCount - 1)
+            .returning(MediaBlob.refCount)
+        )
+
+    @staticmethod
+    def delete_unreferenced_stmt(path: str):
+        return delete(MediaBlob).where(MediaBlob.path == path, MediaBlob.refCount <= 0)
+
+    @staticmethod
+    def delete_variants_stmt(path: str):
+        return delete(MediaVariant).where(MediaVariant.blobPath == path)
+
+    @staticmethod
+    def schedule_removal_stmt(path: str):
+        """Queue a released file for the blob janitor, in the transaction releasing it"""
+        return insert(BlobDeletion).values(path=path)
+
+    @staticmethod
+    def cancel_removal_stmt(path: str):
+        """Keep a file queued for removal that an upload is about to reference again"""
+        return delete(BlobDeletion).where(BlobDeletion.path == path)
@@ -0,0 +1,136 @@
+import importlib
+import itertools
+import time
+from typing import Any, Iterable, List, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.media import MediaVariant
+from app.models.post import Post
+from app.models.user import User
+from app.utils.cache import CacheBackend, InMemoryLRUBackend, NullBackend
+from app.config import settings
+
+# Tags: "post:<id>", "owner:<userId>" and "blob:<path>" mark entries built from
+# that row; "feed:*" and "user:<id>:*" mark pages whose membership shifts when
+# posts are added or removed. Keyset pages after a cursor never gain newly
+# created posts, so only the first page ("head") is dropped on create.
+
+def _build_backend() -> CacheBackend:
+    name = settings.post_cache_backend
+    if name == "none" or settings.post_cache_size <= 0:
+        return NullBackend()
+    if name == "memory":
+        return InMemoryLRUBackend(settings.post_cache_size)
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+class PostCache:
+    """Read-through cache for serialized post reads, invalidated on commit"""
+
+    def __init__(self, backend: CacheBackend, ttl: int, replica_lag: int = 0):
+        self.backend = backend
+        self.ttl = ttl
+        self.replica_lag = replica_lag
+        self._generation = itertools.count()
+        self.generation = next(self._generation)
+        self._invalidated_at = float("-inf")
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.backend.get(key)
+
+    def begin(self, from_replica: bool = False) -> int:
+        """Snapshot taken before loading, so a fill that raced a commit is dropped.
+        
+        A replica may not have a commit yet for a while after it, so fills
+        read from one in that window are dropped too.
+        """
+        if from_replica and time.monotonic() - self._invalidated_at < self.replica_lag:
+            return -1
+        return self.generation
+
+    def set(self, key: str, value: Any, tags: Iterable[str], token: int) -> None:
+        if token == self.generation:
+            self.backend.set(key, value, tags, self.ttl)
+
+    def invalidate(self, tags: Set[str]) -> None:
+        if tags:
+            self.generation = next(self._generation)
+            self._invalidated_at = time.monotonic()
+            self.backend.invalidate_tags(tags)
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+    @staticmethod
+    def tags_for(posts: List[Post], *extra: str) -> Set[str]:
+        tags = set(extra)
+        for post in posts:
+            tags.add(f"post:{post.id}")
+            tags.add(f"owner:{post.userId}")
+            if post.blobUrl:
+                tags.add(f"blob:{post.blobUrl}")
+        return tags
+
+    @staticmethod
+    def feed_key(skip: int, limit: int) -> str:
+        return f"feed:offset:{skip}:{limit}"
+
+    @staticmethod
+    def feed_page_key(cursor: Optional[str], limit: int) -> str:
+        return f"feed:cursor:{cursor or ''}:{limit}"
+
+    @staticmethod
+    def feed_page_tag(cursor: Optional[str]) -> str:
+        return "feed:head" if not cursor else "feed:cursor"
+
+    @staticmethod
+    def user_key(user_id: str, skip: int, limit: int) -> str:
+        return f"user:{user_id}:offset:{skip}:{limit}"
+
+    @staticmethod
+    def user_page_key(user_id: str, cursor: Optional[str], limit: int) -> str:
+        return f"user:{user_id}:cursor:{cursor or ''}:{limit}"
+
+    @staticmethod
+    def user_page_tag(user_id: str, cursor: Optional[str]) -> str:
+        return f"user:{user_id}:head" if not cursor else f"user:{user_id}:cursor"
+
+    @staticmethod
+    def post_key(post_id: str) -> str:
+        return f"post:{post_id}"
+
+    @staticmethod
+    def trending_key(limit: int) -> str:
+        # Cached without tags: counts move with every post, so staleness is bounded by the TTL alone
+        return f"trending:{limit}"
+
+post_cache = PostCache(_build_backend(), settings.post_cache_ttl, settings.db_read_your_writes_window)
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    tags = session.info.setdefault("post_cache_tags", set())
+    for obj in session.new:
+        if isinstance(obj, Post):
+            tags.update(("feed:head", "feed:offset", f"user:{obj.userId}:head", f"user:{obj.userId}:offset"))
+        elif isinstance(obj, MediaVariant):
+            tags.add(f"blob:{obj.blobPath}")
+    for obj in session.dirty:
+        if isinstance(obj, Post) and session.is_modified(obj):
+            tags.add(f"post:{obj.id}")
+        elif isinstance(obj, User) and session.is_modified(obj):
+            tags.add(f"owner:{obj.id}")
+    for obj in session.deleted:
+        if isinstance(obj, Post):
+            tags.update((f"post:{obj.id}", "feed:offset", f"user:{obj.userId}:offset"))
+        elif isinstance(obj, User):
+            tags.add(f"owner:{obj.id}")
+        elif isinstance(obj, MediaVariant):
+            tags.add(f"blob:{obj.blobPath}")
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    post_cache.invalidate(session.info.pop("post_cache_tags", set()))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("post_cache_tags", None)
@@ -0,0 +1,268 @@
+import asyncio
+import importlib
+import itertools
+import logging
+import uuid
+from collections import deque
+from typing import Callable, List, Optional
+import orjson
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models.post import Post
+from app.utils.metrics import CallbackGauge, metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Post columns sent with created and updated events. Owners and media are
+# left out: clients that need them fetch the posts with GET /posts?ids=.
+EVENT_FIELDS = ("id", "userId", "text", "createdAt", "updatedAt")
+
+stream_dropped = metrics.counter("postly_stream_dropped_total", "Stream connections dropped for falling behind")
+
+class PostEventBroker:
+    """Carries post events between the workers that share a stream.
+
+    publish() is called from any thread once a transaction commits. The
+    broker calls the `deliver` callback given to start() for every event,
+    including this worker's own, from any thread. A Redis broker would
+    PUBLISH in publish() and run a listener thread calling deliver. An event
+    may carry an integer "id" shared by all workers (for example from INCR),
+    otherwise each worker numbers the events it receives, prefixing the
+    numbers with a random epoch of its own.
+    """
+
+    def start(self, deliver: Callable[[dict], None]) -> None:
+        raise NotImplementedError
+
+    def publish(self, event: dict) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+class LocalBroker(PostEventBroker):
+    """Delivers events within this process only"""
+
+    def __init__(self):
+        self._deliver = None
+
+    def start(self, deliver: Callable[[dict], None]) -> None:
+        self._deliver = deliver
+
+    def publish(self, event: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(event)
+
+    def close(self) -> None:
+        self._deliver = None
+
+def _build_broker() -> PostEventBroker:
+    name = settings.post_stream_broker
+    if name == "local":
+        return LocalBroker()
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+class StreamEvent:
+    """An event encoded once for every connection it is sent to.
+
+    Its id is the sequence number, prefixed with "<epoch>-" when the worker
+    numbered it rather than the broker.
+    """
+    __slots__ = ("prefix", "seq", "id", "json", "sse")
+
+    def __init__(self, prefix: str, seq: int, kind: str, payload: dict):
+        self.prefix = prefix
+        self.seq = seq
+        self.id = event_id = f"{prefix}{seq}"
+        self.json = orjson.dumps({"id": event_id, "type": kind, **payload}).decode()
+        self.sse = f"id: {event_id}\nevent: {kind}\ndata: {self.json}\n\n".encode()
+
+class Subscription:
+    """Events waiting to be sent on one connection.
+
+    The queue is bounded: a consumer that falls behind is dropped rather than
+    holding events in memory, and can resume from its last id.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.events = deque()
+        self.dropped = False
+        self.closed = False
+        self.heartbeat = False
+        self._ready = asyncio.Event()
+
+    def push(self, stream_event: StreamEvent) -> None:
+        if self.dropped:
+            return
+        if len(self.events) >= self.max_size:
+            self.dropped = True
+            self.events.clear()
+        else:
+            self.events.append(stream_event)
+        self._ready.set()
+
+    def wake(self, heartbeat: bool = False) -> None:
+        self.heartbeat = self.heartbeat or heartbeat
+        self._ready.set()
+
+    async def wait(self) -> None:
+        """Wait until there are events, a heartbeat is due, or the stream must end"""
+        if not self.events and not self.dropped and not self.closed and not self.heartbeat:
+            self._ready.clear()
+            await self._ready.wait()
+
+class PostEventBus:
+    """In-process pub/sub of post changes for the live stream endpoints.
+
+    Events are published after commit, from any thread, and dispatched on
+    the event loop to every subscription. The latest ones are kept so a
+    reconnecting client can resume after the last id it received. Idle
+    connections cost nothing but their queue: one task wakes them all for
+    heartbeats.
+    """
+
+    def __init__(self, broker: PostEventBroker, queue_size: int, replay_size: int, heartbeat: int):
+        self.broker = broker
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self._recent = deque(maxlen=max(replay_size, 1))
+        self._ids = itertools.count(1)
+        # Ids this worker numbers are only meaningful to it: another worker, or
+        # this one after a restart, resets clients resuming from them
+        self._prefix = f"{uuid.uuid4().hex[:8]}-"
+        self._subscriptions = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._heartbeat_task = None
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self.broker.start(self._receive)
+        if self.heartbeat > 0:
+            self._heartbeat_task = loop.create_task(self._beat())
+
+    def shutdown(self) -> None:
+        self.broker.close()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        for subscription in list(self._subscriptions):
+            subscription.closed = True
+            subscription.wake()
+        self._loop = None
+
+    def publish(self, events: List[dict]) -> None:
+        for post_event in events:
+            try:
+                self.broker.publish(post_event)
+            except Exception:
+                logger.exception("Failed to publish post event")
+
+    def _receive(self, post_event: dict) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._dispatch, post_event)
+
+    def _dispatch(self, post_event: dict) -> None:
+        post_event = dict(post_event)
+        shared_id = post_event.pop("id", None)
+        if shared_id is not None:
+            prefix, seq = "", int(shared_id)
+        else:
+            prefix, seq = self._prefix, next(self._ids)
+        stream_event = StreamEvent(prefix, seq, post_event.pop("type"), post_event)
+        self._recent.append(stream_event)
+        for subscription in self._subscriptions:
+            was_dropped = subscription.dropped
+            subscription.push(stream_event)
+            if subscription.dropped and not was_dropped:
+                stream_dropped.inc()
+
+    async def _beat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            for subscription in self._subscriptions:
+                subscription.wake(heartbeat=True)
+
+    @property
+    def connections(self) -> int:
+        return len(self._subscriptions)
+
+    def _after(self, after_id: str) -> Optional[List[StreamEvent]]:
+        """The retained events after `after_id`, None when they cannot be told"""
+        prefix, seq = (self._recent[-1].prefix, self._recent[-1].seq) if self._recent else (self._prefix, 0)
+        oldest = self._recent[0].seq if self._recent else seq + 1
+        if not after_id.startswith(prefix) or not after_id[len(prefix):].isdigit():
+            return None
+        after = int(after_id[len(prefix):])
+        if after > seq or after < oldest - 1:
+            return None
+        return [stream_event for stream_event in self._recent if stream_event.seq > after]
+
+    def subscribe(self, after_id: Optional[str] = None) -> Subscription:
+        """Register a connection, queueing the retained events after `after_id`.
+
+        When events after `after_id` are no longer retained, or the id comes
+        from another numbering (another worker, or this one before a
+        restart), a "reset" event with the latest id is queued instead: the
+        client reloads, then keeps streaming.
+        """
+        subscription = Subscription(self.queue_size)
+        if after_id is not None:
+            replay = self._after(after_id)
+            if replay is None:
+                latest = self._recent[-1] if self._recent else None
+                subscription.events.append(StreamEvent(
+                    latest.prefix if latest else self._prefix, latest.seq if latest else 0, "reset", {}
+                ))
+            else:
+                # Retained events are replayed on top of the live queue bound
+                subscription.events.extend(replay)
+                subscription.max_size += len(subscription.events)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+post_events = PostEventBus(
+    _build_broker(),
+    settings.post_stream_queue_size,
+    settings.post_stream_replay,
+    settings.post_stream_heartbeat,
+)
+
+metrics.register(CallbackGauge(
+    "postly_stream_connections", "Open live post stream connections", (),
+    lambda: [((), post_events.connections)]
+))
+
+def _payload(post: Post) -> dict:
+    # Only values already loaded: a lazy load here would run inside the flush
+    loaded = inspect(post).dict
+    return {field: loaded.get(field) for field in EVENT_FIELDS}
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session, flush_context):
+    events = session.info.setdefault("post_events", [])
+    for obj in session.new:
+        if isinstance(obj, Post):
+            events.append({"type": "created", "post": _payload(obj)})
+    for obj in session.dirty:
+        if isinstance(obj, Post) and session.is_modified(obj):
+            events.append({"type": "updated", "post": _payload(obj)})
+    for obj in session.deleted:
+        if isinstance(obj, Post):
+            events.append({"type": "deleted", "post": {"id": obj.id, "userId": obj.userId}})
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session):
+    events = session.info.pop("post_events", None)
+    if events:
+        post_events.publish(events)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_events(session):
+    session.info.pop("post_events", None)
@@ -0,0 +1,131 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+from app.database import SessionLocal
+from app.models.post import Post
+from app.services.tag_service import TagService
+from app.services.timeline_fanout import timeline_fanout
+from app.utils.metrics import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+group_commit_rows = metrics.histogram(
+    "postly_post_group_commit_rows", "Posts inserted per group commit transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+class PostGroupCommit:
+    """Inserts concurrently created posts in shared transactions.
+
+    Callers queue a fully generated row and wait on a future. One writer
+    thread takes the first queued row plus everything queued behind it, up
+    to `max_rows`, optionally waiting `window_ms` for more, and commits them
+    together: a burst pays for one commit (and its fsync, where commits
+    sync) instead of one per post. Rows arriving during a commit form the next
+    batch, so batches grow with load without adding latency when idle. If
+    the shared transaction fails, its rows are retried one by one so only
+    the callers whose row fails get the error.
+    """
+
+    def __init__(self, window_ms: float, max_rows: int):
+        self.window = window_ms / 1000
+        self.max_rows = max(max_rows, 1)
+        self._queue: "queue.Queue[Optional[Tuple[dict, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, row: dict) -> Future:
+        """Queue a post's column values; the future resolves to the committed Post"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="post-group-commit", daemon=True)
+                self._thread.start()
+        future: Future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def _next_batch(self, first: Tuple[dict, Future]) -> Tuple[List[Tuple[dict, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_rows:
+            try:
+                remaining = deadline - time.monotonic()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._next_batch(first)
+            try:
+                self._write(batch)
+            except Exception as exc:
+                logger.exception("Group commit failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _write(self, batch: List[Tuple[dict, Future]]) -> None:
+        # Attributes stay loaded after commit, the posts are handed to other threads detached
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            posts = [Post(**row) for row, _ in batch]
+            db.add_all(posts)
+            try:
+                TagService.index_new(db, [row for row, _ in batch])
+                db.commit()
+                results: List[Optional[Post]] = posts
+            except Exception:
+                db.rollback()
+                results = self._write_each(db, batch)
+        finally:
+            db.close()
+        group_commit_rows.observe(len(batch))
+
+        committed = [post.id for post in results if post is not None]
+        if committed:
+            timeline_fanout.submit(committed)
+        for post, (_, future) in zip(results, batch):
+            if post is not None:
+                future.set_result(post)
+
+    @staticmethod
+    def _write_each(db, batch: List[Tuple[dict, Future]]) -> List[Optional[Post]]:
+        """Commit rows one at a time, failing only the futures of rows that cannot be inserted"""
+        results = []
+        for row, future in batch:
+            post = Post(**row)
+            db.add(post)
+            try:
+                TagService.index_new(db, [row])
+                db.commit()
+                # A later row's rollback would expire it otherwise
+                db.expunge(post)
+            except Exception as exc:
+                db.rollback()
+                future.set_exception(exc)
+                post = None
+            results.append(post)
+        return results
+
+    def shutdown(self) -> None:
+        """Commit what is queued, then stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+post_group_commit = PostGroupCommit(settings.post_group_commit_window_ms, settings.post_group_commit_max_rows)
@@ -1,31 +1,115 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, Query, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import HTTPException, status, UploadFile
-from typing import List, Optional
-import os
-import shutil
+from typing import Collection, List, Optional, Tuple
+from datetime import datetime, timedelta
 import uuid
 from app.models.post import Post
+from app.models.tag import PostMention, PostTag
 from app.models.user import User
 from app.schemas.post import PostCreate, PostUpdate
+from app.services.media_storage import MediaStorage, StagedMedia
+from app.services.media_derivatives import derivative_worker
+from app.services.blob_cleanup import blob_janitor
+from app.services.post_group_commit import post_group_commit
+from app.services.tag_service import TagService
+from app.services.timeline_fanout import TimelineFanout, timeline_fanout
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.database import pin_writer
 from app.config import settings
 
 class PostService:
     @staticmethod
     def create_post(db: Session, post: PostCreate, current_user: User) -> Post:
-        db_post = Post(
-            userId=current_user.id,
-            text=post.text
-        )
+        row = PostService._new_post_rows([post], current_user)[0]
+        if settings.post_group_commit:
+            # Inserted together with concurrent creates; blocks until that commit
+            db_post = post_group_commit.submit(row).result()
+            pin_writer(db)
+        else:
+            db_post = Post(**row)
+            db.add(db_post)
+            TagService.index_new(db, [row])
+            db.commit()
+            timeline_fanout.submit([row["id"]])
+        # Every column was generated here, the owner is the caller and a new
+        # post has no media, so no refresh or lazy load is needed
+        PostService._mark_loaded(db_post, row, current_user)
         
-        db.add(db_post)
+        return db_post
+    
+    @staticmethod
+    def _check_batch_size(count: int, maximum: int) -> None:
+        if count == 0 or count > maximum:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A batch must contain between 1 and {maximum} items"
+            )
+    
+    @staticmethod
+    def _new_post_rows(posts: List[PostCreate], current_user: User) -> List[dict]:
+        """Column values for new posts, generated here so no refresh is needed after insert"""
+        now = datetime.utcnow()
+        return [
+            {
+                "id": str(uuid.uuid4()),
+                "userId": current_user.id,
+                "text": post.text,
+                "blobUrl": None,
+                # Spread timestamps so the feed keeps the submitted order
+                "createdAt": now + timedelta(microseconds=index),
+                "updatedAt": None,
+            }
+            for index, post in enumerate(posts)
+        ]
+    
+    @staticmethod
+    def _mark_loaded(db_post: Post, row: dict, current_user: User) -> None:
+        for key, value in row.items():
+            set_committed_value(db_post, key, value)
+        set_committed_value(db_post, "owner", current_user)
+        set_committed_value(db_post, "mediaVariants", [])
+    
+    @staticmethod
+    def create_posts(db: Session, posts: List[PostCreate], current_user: User) -> List[Post]:
+        """Insert many posts in one transaction with a single executemany INSERT"""
+        PostService._check_batch_size(len(posts), settings.batch_max_posts)
+        rows = PostService._new_post_rows(posts, current_user)
+        db_posts = [Post(**row) for row in rows]
+        
+        db.add_all(db_posts)
+        TagService.index_new(db, rows)
         db.commit()
-        db.refresh(db_post)
+        for db_post, row in zip(db_posts, rows):
+            PostService._mark_loaded(db_post, row, current_user)
+        timeline_fanout.submit([row["id"] for row in rows])
         
-        return db_post
+        return db_posts
+    
+    @staticmethod
+    def get_posts_by_ids(db: Session, post_ids: List[str], cached: Collection[str] = ()) -> List[Post]:
+        """Fetch posts with their owners in one query, in the requested order.
+        
+        The whole request is checked against the batch limit, but posts in
+        `cached` (the caller already has them) are not loaded.
+        """
+        PostService._check_batch_size(len(post_ids), settings.batch_max_ids)
+        missing = [post_id for post_id in dict.fromkeys(post_ids) if post_id not in cached]
+        if not missing:
+            return []
+        posts = PostService._with_owner(db).filter(Post.id.in_(missing)).all()
+        by_id = {post.id: post for post in posts}
+        return [by_id[post_id] for post_id in missing if post_id in by_id]
+    
+    @staticmethod
+    def _with_owner(db: Session) -> Query:
+        """Query posts with their owner joined and their media variants batch-loaded"""
+        return db.query(Post).options(joinedload(Post.owner), selectinload(Post.mediaVariants))
     
     @staticmethod
     def get_post_by_id(db: Session, post_id: str) -> Post:
-        post = db.query(Post).filter(Post.id == post_id).first()
+        post = PostService._with_owner(db).filter(Post.id == post_id).first()
         if not post:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -33,13 +117,61 @@ class PostService:
             )
         return post
     
+    @staticmethod
+    def _newest_first(query: Query, key=(Post.createdAt, Post.id)) -> Query:
+        return query.order_by(*(column.desc() for column in key))
+    
+    @staticmethod
+    def _keyset_page(query: Query, limit: int, cursor: Optional[str], key=(Post.createdAt, Post.id)) -> Tuple[List[Post], Optional[str]]:
+        """Fetch one page after the cursor position, using the (createdAt, id) index.
+        
+        `key` swaps in the columns of a joined index that copies them, such as
+        a tag's (createdAt, postId), so the page is a scan of that index.
+        """
+        limit = max(limit, 1)
+        position = decode_cursor(cursor)
+        if position is not None:
+            query = query.filter(tuple_(*key) < position)
+        
+        # Fetch one extra row to know whether another page exists
+        posts = PostService._newest_first(query, key).limit(limit + 1).all()
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = encode_cursor(posts[-1].createdAt, posts[-1].id)
+        return posts, next_cursor
+    
     @staticmethod
     def get_posts(db: Session, skip: int = 0, limit: int = 10) -> List[Post]:
-        return db.query(Post).offset(skip).limit(limit).all()
+        return PostService._newest_first(PostService._with_owner(db)).offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def get_posts_page(db: Session, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        return PostService._keyset_page(PostService._with_owner(db), limit, cursor)
     
     @staticmethod
     def get_user_posts(db: Session, user_id: str, skip: int = 0, limit: int = 10) -> List[Post]:
-        return db.query(Post).filter(Post.userId == user_id).offset(skip).limit(limit).all()
+        query = PostService._with_owner(db).filter(Post.userId == user_id)
+        return PostService._newest_first(query).offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def get_user_posts_page(db: Session, user_id: str, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        return PostService._keyset_page(PostService._with_owner(db).filter(Post.userId == user_id), limit, cursor)
+    
+    @staticmethod
+    def get_tag_page(db: Session, tag: str, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        """Posts using a hashtag, newest first"""
+        tag = TagService.normalize_tag(tag)
+        if tag is None:
+            return [], None
+        query = PostService._with_owner(db).join(PostTag, PostTag.postId == Post.id).filter(PostTag.tag == tag)
+        return PostService._keyset_page(query, limit, cursor, (PostTag.createdAt, PostTag.postId))
+    
+    @staticmethod
+    def get_mention_page(db: Session, user_id: str, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        """Posts mentioning a user, newest first"""
+        query = PostService._with_owner(db).join(PostMention, PostMention.postId == Post.id).filter(PostMention.userId == user_id)
+        return PostService._keyset_page(query, limit, cursor, (PostMention.createdAt, PostMention.postId))
     
     @staticmethod
     def update_post(db: Session, post_id: str, post_update: PostUpdate, current_user: User) -> Post:
@@ -51,10 +183,12 @@ class PostService:
             )
         
         if post_update.text is not None:
+            TagService.reindex(db, post.id, post.createdAt, post.text, post_update.text)
             post.text = post_update.text
         
         db.commit()
         db.refresh(post)
+        set_committed_value(post, "owner", current_user)
         
         return post
     
@@ -67,15 +201,35 @@ class PostService:
                 detail="Post not found or you don't have permission to delete it"
             )
         
-        # Delete associated file if exists
-        if post.blobUrl:
-            file_path = f"{settings.upload_dir}/{post.blobUrl}"
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        blob_url = post.blobUrl
+        unlink_blob = bool(blob_url) and PostService._release_blob(db, blob_url)
         
+        db.execute(TimelineFanout.delete_post_stmt(post.id))
+        TagService.unindex(db, post.id, post.createdAt)
         db.delete(post)
         db.commit()
         
+        # The file is removed by the janitor, and only if the delete committed
+        if unlink_blob:
+            blob_janitor.wake()
+        
+        return True
+    
+    @staticmethod
+    def _acquire_blob(db: Session, staged: StagedMedia) -> None:
+        db.execute(MediaStorage.acquire_stmt(staged))
+    
+    @staticmethod
+    def _release_blob(db: Session, path: str) -> bool:
+        """Drop one reference and, when the file is no longer used, queue it for removal"""
+        remaining = db.execute(MediaStorage.decrement_stmt(path)).scalar()
+        if remaining is not None and remaining > 0:
+            return False
+        # Files uploaded before content addressing are not reference counted
+        if remaining is not None:
+            db.execute(MediaStorage.delete_variants_stmt(path))
+            db.execute(MediaStorage.delete_unreferenced_stmt(path))
+        db.execute(MediaStorage.schedule_removal_stmt(path))
         return True
     
     @staticmethod
@@ -88,26 +242,31 @@ class PostService:
                 detail="Post not found or you don't have permission to modify it"
             )
         
-        # Validate file size
-        if file.size > settings.max_file_size:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File too large. Maximum size is {settings.max_file_size} bytes"
-            )
+        staged = MediaStorage.stage(file.file, file.filename)
+        previous = post.blobUrl
+        if previous == staged.path:
+            MediaStorage.discard(staged)
+            return previous
         
-        # Create uploads directory if it doesn't exist
-        os.makedirs(settings.upload_dir, exist_ok=True)
+        try:
+            PostService._acquire_blob(db, staged)
+            unlink_previous = bool(previous) and PostService._release_blob(db, previous)
+            # Store the relative path, it is served through the media endpoint
+            post.blobUrl = staged.path
+            # The same content may be queued for removal since an earlier delete
+            db.execute(MediaStorage.cancel_removal_stmt(staged.path))
+            # Publish before committing so a committed row never points at a missing file
+            MediaStorage.publish(staged)
+            db.commit()
+        except Exception:
+            db.rollback()
+            MediaStorage.discard(staged)
+            raise
         
-        # Save file
-        file_extension = file.filename.split(".")[-1] if "." in file.filename else ""
-        file_name = f"{uuid.uuid4()}.{file_extension}"
-        file_path = f"{settings.upload_dir}/{file_name}"
+        if unlink_previous:
+            blob_janitor.wake()
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Update post with file URL (store just the filename for serving via endpoint)
-        post.blobUrl = file_name
-        db.commit()
+        # Resized copies are produced in the background, the original is served until then
+        derivative_worker.submit(staged.path)
         
-        return file_name
\ No newline at end of file
+        return staged.path
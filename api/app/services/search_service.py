@@ -0,0 +1,155 @@
+import re
+from typing import List, Optional, Tuple
+from sqlalchemy import text, bindparam, column, Float
+from fastapi import HTTPException, status
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.post import Post
+from app.models.types import CompactUUID
+from app.services.post_service import PostService
+from app.services.async_post_service import AsyncPostService
+from app.utils.pagination import encode_rank_cursor, decode_rank_cursor
+
+# SQLite: an external-content FTS5 table over posts.text, kept in sync by
+# triggers. It is keyed by the posts rowid, which VACUUM may renumber, so run
+# SearchService.rebuild_index() after a VACUUM.
+SQLITE_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        text, content='posts', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, text) VALUES (new.rowid, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF text ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+        INSERT INTO posts_fts(rowid, text) VALUES (new.rowid, new.text);
+    END""",
+]
+
+# Postgres: a generated tsvector column, maintained by the database, with a GIN index
+POSTGRES_INDEX_DDL = [
+    """ALTER TABLE posts ADD COLUMN IF NOT EXISTS "textSearch" tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', coalesce(text, ''))) STORED""",
+    """CREATE INDEX IF NOT EXISTS ix_posts_text_search ON posts USING GIN ("textSearch")""",
+]
+
+# Scores are normalised so that higher is better on both backends; bm25() is
+# negative with the best match lowest.
+SQLITE_SEARCH = """
+    SELECT posts.id AS id, -bm25(posts_fts) AS score
+    FROM posts_fts JOIN posts ON posts.rowid = posts_fts.rowid
+    WHERE posts_fts MATCH :query {filters}
+    ORDER BY score DESC, posts.id
+    LIMIT :limit
+"""
+
+POSTGRES_SEARCH = """
+    SELECT id, score FROM (
+        SELECT posts.id AS id, ts_rank_cd(posts."textSearch", query) AS score, posts."userId" AS "userId"
+        FROM posts, plainto_tsquery('simple', :query) AS query
+        WHERE posts."textSearch" @@ query
+    ) AS matches
+    WHERE TRUE {filters}
+    ORDER BY score DESC, id
+    LIMIT :limit
+"""
+
+class SearchService:
+    @staticmethod
+    def install_index(engine: Engine) -> None:
+        """Create the full-text index for the configured backend, backfilling it once"""
+        dialect = engine.dialect.name
+        with engine.begin() as connection:
+            if dialect == "sqlite":
+                exists = connection.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'")
+                ).first()
+                for statement in SQLITE_INDEX_DDL:
+                    connection.execute(text(statement))
+                if not exists:
+                    connection.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+            elif dialect == "postgresql":
+                for statement in POSTGRES_INDEX_DDL:
+                    connection.execute(text(statement))
+
+    @staticmethod
+    def rebuild_index(engine: Engine) -> None:
+        if engine.dialect.name == "sqlite":
+            with engine.begin() as connection:
+                connection.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+
+    @staticmethod
+    def _terms(query: str) -> List[str]:
+        return re.findall(r"\w+", query.lower())
+
+    @staticmethod
+    def _statement(dialect: str, query: str, limit: int, cursor: Optional[str], user_id: Optional[str]):
+        terms = SearchService._terms(query)
+        if not terms:
+            return None
+        params = {"limit": limit + 1}
+        filters = []
+        if dialect == "sqlite":
+            # Quote every term so user input cannot use FTS5 query syntax
+            params["query"] = " ".join(f'"{term}"' for term in terms)
+            score_expr, id_expr, user_expr = "-bm25(posts_fts)", "posts.id", 'posts."userId"'
+            template = SQLITE_SEARCH
+        elif dialect == "postgresql":
+            params["query"] = " ".join(terms)
+            score_expr, id_expr, user_expr = "score", "id", '"userId"'
+            template = POSTGRES_SEARCH
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail=f"Full-text search is not available for {dialect}"
+            )
+
+        if user_id:
+            filters.append(f"AND {user_expr} = :user_id")
+            params["user_id"] = user_id
+        position = decode_rank_cursor(cursor)
+        if position is not None:
+            filters.append(f"AND ({score_expr} < :score OR ({score_expr} = :score AND {id_expr} > :after_id))")
+            params["score"], params["after_id"] = position
+        # Typed, so ids go through CompactUUID in both directions
+        statement = text(template.format(filters=" ".join(filters))).bindparams(
+            *(bindparam(name, type_=CompactUUID) for name in ("user_id", "after_id") if name in params)
+        ).columns(column("id", CompactUUID), column("score", Float))
+        return statement, params
+
+    @staticmethod
+    def _page(rows, limit: int) -> Tuple[List[str], Optional[str]]:
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_rank_cursor(rows[-1].score, rows[-1].id)
+        return [row.id for row in rows], next_cursor
+
+    @staticmethod
+    def _in_order(posts: List[Post], ids: List[str]) -> List[Post]:
+        by_id = {post.id: post for post in posts}
+        return [by_id[post_id] for post_id in ids if post_id in by_id]
+
+    @staticmethod
+    def search(db: Session, query: str, limit: int = 10, cursor: Optional[str] = None, user_id: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        limit = max(limit, 1)
+        statement = SearchService._statement(db.get_bind().dialect.name, query, limit, cursor, user_id)
+        if statement is None:
+            return [], None
+        ids, next_cursor = SearchService._page(db.execute(*statement).all(), limit)
+        posts = PostService._with_owner(db).filter(Post.id.in_(ids)).all() if ids else []
+        return SearchService._in_order(posts, ids), next_cursor
+
+    @staticmethod
+    async def search_async(db: AsyncSession, query: str, limit: int = 10, cursor: Optional[str] = None, user_id: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        limit = max(limit, 1)
+        statement = SearchService._statement(db.get_bind().dialect.name, query, limit, cursor, user_id)
+        if statement is None:
+            return [], None
+        ids, next_cursor = SearchService._page((await db.execute(*statement)).all(), limit)
+        posts = list(await db.scalars(AsyncPostService._with_owner().where(Post.id.in_(ids)))) if ids else []
+        return SearchService._in_order(posts, ids), next_cursor
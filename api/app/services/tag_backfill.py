@@ -0,0 +1,91 @@
+import json
+import os
+import time
+from typing import Callable, Dict, Optional
+from sqlalchemy import or_, select
+from sqlalchemy.orm import sessionmaker
+from app.models.post import Post
+from app.services.tag_service import TagService
+
+class TagBackfillRunner:
+    """Streams posts in id order and indexes their hashtags and mentions in committed batches.
+
+    Tags and mentions already recorded are skipped, so the backfill can run
+    while the API indexes new posts and can be run again safely. After every
+    batch the last post id is written to a checkpoint file, so an interrupted
+    run resumes where it stopped.
+    """
+
+    name = "post-tags"
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        batch_size: int = 1000,
+        checkpoint_path: Optional[str] = None,
+        progress: Callable[[str], None] = print,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        self.progress = progress
+
+    def _load_checkpoint(self) -> Dict:
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("backfill") == self.name:
+                return checkpoint
+        return {"backfill": self.name, "last_id": None, "counts": {}}
+
+    def _save_checkpoint(self, checkpoint: Dict) -> None:
+        if not self.checkpoint_path:
+            return
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def run(self) -> Dict[str, int]:
+        checkpoint = self._load_checkpoint()
+        counts = {"scanned": 0, "tags": 0, "mentions": 0}
+        counts.update(checkpoint["counts"])
+        if checkpoint["last_id"] is not None:
+            self.progress(f"Resuming the {self.name} backfill after post {checkpoint['last_id']}")
+
+        # Posts without either character cannot have tags or mentions
+        stmt = (
+            select(Post.id, Post.text, Post.createdAt)
+            .where(or_(Post.text.contains("#"), Post.text.contains("@")))
+            .order_by(Post.id)
+        )
+        if checkpoint["last_id"] is not None:
+            stmt = stmt.where(Post.id > checkpoint["last_id"])
+
+        started = time.perf_counter()
+        # Separate sessions: the reader keeps its cursor open while the writer commits
+        reader = self.session_factory()
+        writer = self.session_factory()
+        try:
+            result = reader.execute(stmt.execution_options(yield_per=self.batch_size))
+            for rows in result.partitions():
+                tags, mentions = TagService.backfill(writer, [row._asdict() for row in rows])
+                writer.commit()
+                counts["scanned"] += len(rows)
+                counts["tags"] += tags
+                counts["mentions"] += mentions
+                checkpoint["last_id"] = rows[-1].id
+                checkpoint["counts"] = counts
+                self._save_checkpoint(checkpoint)
+                self.progress(
+                    f"{counts['scanned']} scanned, {counts['tags']} tags and "
+                    f"{counts['mentions']} mentions added ({time.perf_counter() - started:.1f}s)"
+                )
+        finally:
+            reader.close()
+            writer.close()
+
+        # A finished backfill starts from the beginning when run again
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return counts
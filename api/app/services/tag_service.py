@@ -0,0 +1,286 @@
+import re
+import unicodedata
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import DateTime, delete, insert, literal, select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.tag import PostMention, PostTag, TagCount
+from app.models.types import CompactUUID
+from app.models.user import User
+from app.config import settings
+from app.database import upsert
+
+MAX_TAG_LENGTH = 64
+
+# Not inside a word, a URL fragment or an HTML entity ("&#39;")
+HASHTAG = re.compile(r"(?<![\w&#/])#(\w+)")
+# Users are mentioned by id, "@" inside a word is an email address
+MENTION = re.compile(r"(?<![\w@])@([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})\b", re.IGNORECASE)
+WORD = re.compile(r"\w+")
+
+EPOCH = datetime(1970, 1, 1)
+
+# Deltas to apply to tag_counts, keyed by (tag, bucket)
+Deltas = Dict[Tuple[str, datetime], int]
+
+class TagService:
+    """Hashtags and mentions, indexed from post text in the transaction that writes it.
+
+    "#Topic" is stored as "topic" in post_tags and "@<user id>" in
+    post_mentions, each with a copy of the post's createdAt so tag and
+    mention feeds are keyset scans of one index. Every tag use also adds one
+    to a per-tag counter for the time bucket the post was created in, so
+    trending tags are a sum over the recent buckets instead of a count over
+    posts. Edits and deletes subtract what the post added; buckets older than
+    the trending window are not counted and are pruned.
+    """
+
+    # Start of the oldest bucket kept when tag_counts was last pruned by this process
+    _pruned_before: Optional[datetime] = None
+
+    @staticmethod
+    def normalize_tag(tag: str) -> Optional[str]:
+        """Fold a tag to its stored form, or None if it is not a valid tag"""
+        tag = unicodedata.normalize("NFKC", tag.lstrip("#")).casefold()
+        if len(tag) > MAX_TAG_LENGTH or tag.isdigit() or not WORD.fullmatch(tag):
+            return None
+        return tag
+
+    @staticmethod
+    def extract_tags(text: Optional[str]) -> Set[str]:
+        tags = (TagService.normalize_tag(match) for match in HASHTAG.findall(text or ""))
+        return {tag for tag in tags if tag}
+
+    @staticmethod
+    def extract_mentions(text: Optional[str]) -> Set[str]:
+        return {str(uuid.UUID(match)) for match in MENTION.findall(text or "")}
+
+    @staticmethod
+    def bucket_of(moment: datetime) -> datetime:
+        width = settings.trending_bucket_minutes * 60
+        return EPOCH + timedelta(seconds=int((moment - EPOCH).total_seconds()) // width * width)
+
+    @staticmethod
+    def trending_cutoff() -> datetime:
+        """Start of the oldest bucket in the trending window"""
+        return TagService.bucket_of(datetime.utcnow() - timedelta(hours=settings.trending_window_hours))
+
+    @staticmethod
+    def _tag_rows(post_id: str, created_at: datetime, tags: Iterable[str]) -> List[dict]:
+        return [{"postId": post_id, "tag": tag, "createdAt": created_at} for tag in sorted(tags)]
+
+    @staticmethod
+    def mentions_stmt(post_id: str, created_at: datetime, user_ids: Iterable[str]):
+        """Record mentions of the users that exist, unknown ids stay plain text"""
+        users = select(literal(post_id, CompactUUID), User.id, literal(created_at, DateTime)).where(User.id.in_(sorted(user_ids)))
+        return insert(PostMention).from_select(["postId", "userId", "createdAt"], users)
+
+    @staticmethod
+    def remove_tags_stmt(post_id: str, tags: Optional[Set[str]] = None):
+        """Delete a post's tags, or only the given ones, returning the tags that were recorded"""
+        stmt = delete(PostTag).where(PostTag.postId == post_id)
+        if tags is not None:
+            stmt = stmt.where(PostTag.tag.in_(sorted(tags)))
+        return stmt.returning(PostTag.tag)
+
+    @staticmethod
+    def remove_mentions_stmt(post_id: str, user_ids: Optional[Set[str]] = None):
+        stmt = delete(PostMention).where(PostMention.postId == post_id)
+        if user_ids is not None:
+            stmt = stmt.where(PostMention.userId.in_(sorted(user_ids)))
+        return stmt
+
+    @staticmethod
+    def count_stmt(tag: str, bucket: datetime, delta: int):
+        return (
+            update(TagCount)
+            .where(TagCount.tag == tag, TagCount.bucket == bucket)
+            .values(count=TagCount.count + delta)
+        )
+
+    @staticmethod
+    def add_count_stmt(tag: str, bucket: datetime, delta: int):
+        # One statement, so concurrent first uses of a tag in a bucket add up instead of colliding
+        stmt = upsert(TagCount).values(tag=tag, bucket=bucket, count=delta)
+        return stmt.on_conflict_do_update(
+            index_elements=[TagCount.tag, TagCount.bucket],
+            set_={"count": TagCount.count + stmt.excluded["count"]},
+        )
+
+    @staticmethod
+    def prune_stmt(before: datetime):
+        return delete(TagCount).where(TagCount.bucket < before)
+
+    @staticmethod
+    def trending_stmt(limit: int):
+        total = func.sum(TagCount.count)
+        return (
+            select(TagCount.tag, total.label("count"))
+            .where(TagCount.bucket >= TagService.trending_cutoff())
+            .group_by(TagCount.tag)
+            .having(total > 0)
+            .order_by(total.desc(), TagCount.tag)
+            .limit(max(limit, 1))
+        )
+
+    @staticmethod
+    def _plan_new(rows: List[dict], existing_tags: Set[Tuple[str, str]], existing_mentions: Set[Tuple[str, str]]):
+        """Tag rows, mention statements and counter deltas for posts not indexed yet"""
+        tag_rows, mention_stmts, deltas = [], [], Counter()
+        for row in rows:
+            tags = {tag for tag in TagService.extract_tags(row["text"]) if (row["id"], tag) not in existing_tags}
+            tag_rows.extend(TagService._tag_rows(row["id"], row["createdAt"], tags))
+            bucket = TagService.bucket_of(row["createdAt"])
+            deltas.update((tag, bucket) for tag in tags)
+            mentions = {user_id for user_id in TagService.extract_mentions(row["text"]) if (row["id"], user_id) not in existing_mentions}
+            if mentions:
+                mention_stmts.append(TagService.mentions_stmt(row["id"], row["createdAt"], mentions))
+        return tag_rows, mention_stmts, deltas
+
+    @staticmethod
+    def _plan_edit(old_text: Optional[str], new_text: Optional[str]):
+        old_tags, new_tags = TagService.extract_tags(old_text), TagService.extract_tags(new_text)
+        old_mentions, new_mentions = TagService.extract_mentions(old_text), TagService.extract_mentions(new_text)
+        return old_tags - new_tags, new_tags - old_tags, old_mentions - new_mentions, new_mentions - old_mentions
+
+    @staticmethod
+    def _count_plan(deltas: Deltas) -> Tuple[List[Tuple[str, datetime, int]], Optional[datetime]]:
+        """Counter updates inside the trending window, plus a cutoff to prune before once per bucket.
+
+        Updates are in key order so concurrent transactions lock counter rows
+        in the same order.
+        """
+        cutoff = TagService.trending_cutoff()
+        updates = [(tag, bucket, delta) for (tag, bucket), delta in sorted(deltas.items()) if delta and bucket >= cutoff]
+        prune = None
+        if updates and TagService._pruned_before != cutoff:
+            TagService._pruned_before = prune = cutoff
+        return updates, prune
+
+    @staticmethod
+    def _count_stmt(tag: str, bucket: datetime, delta: int):
+        # A removal only lowers a row its post was counted in, so only additions insert
+        if delta > 0:
+            return TagService.add_count_stmt(tag, bucket, delta)
+        return TagService.count_stmt(tag, bucket, delta)
+
+    @staticmethod
+    def _count(db: Session, deltas: Deltas) -> None:
+        updates, prune = TagService._count_plan(deltas)
+        for tag, bucket, delta in updates:
+            db.execute(TagService._count_stmt(tag, bucket, delta))
+        if prune is not None:
+            db.execute(TagService.prune_stmt(prune))
+
+    @staticmethod
+    def _index(db: Session, rows: List[dict], existing_tags: Set[Tuple[str, str]], existing_mentions: Set[Tuple[str, str]]) -> Tuple[int, int]:
+        tag_rows, mention_stmts, deltas = TagService._plan_new(rows, existing_tags, existing_mentions)
+        if not tag_rows and not mention_stmts:
+            return 0, 0
+        # The posts must exist for the foreign keys
+        db.flush()
+        if tag_rows:
+            db.execute(insert(PostTag), tag_rows)
+        mentions = sum(db.execute(stmt).rowcount for stmt in mention_stmts)
+        TagService._count(db, deltas)
+        return len(tag_rows), mentions
+
+    @staticmethod
+    def index_new(db: Session, rows: List[dict]) -> None:
+        """Index posts added in this transaction from their column values (id, text, createdAt)"""
+        TagService._index(db, rows, set(), set())
+
+    @staticmethod
+    def reindex(db: Session, post_id: str, created_at: datetime, old_text: Optional[str], new_text: Optional[str]) -> None:
+        """Apply an edit of a post's text to its tags, mentions and counters"""
+        removed_tags, added_tags, removed_mentions, added_mentions = TagService._plan_edit(old_text, new_text)
+        bucket = TagService.bucket_of(created_at)
+        deltas = Counter()
+        if removed_tags:
+            for tag in db.execute(TagService.remove_tags_stmt(post_id, removed_tags)).scalars():
+                deltas[(tag, bucket)] -= 1
+        if added_tags:
+            db.execute(insert(PostTag), TagService._tag_rows(post_id, created_at, added_tags))
+            deltas.update((tag, bucket) for tag in added_tags)
+        if removed_mentions:
+            db.execute(TagService.remove_mentions_stmt(post_id, removed_mentions))
+        if added_mentions:
+            db.execute(TagService.mentions_stmt(post_id, created_at, added_mentions))
+        TagService._count(db, deltas)
+
+    @staticmethod
+    def unindex(db: Session, post_id: str, created_at: datetime) -> None:
+        """Remove a post being deleted from the tag and mention indexes and its counters"""
+        bucket = TagService.bucket_of(created_at)
+        tags = db.execute(TagService.remove_tags_stmt(post_id)).scalars().all()
+        db.execute(TagService.remove_mentions_stmt(post_id))
+        TagService._count(db, {(tag, bucket): -1 for tag in tags})
+
+    @staticmethod
+    def backfill(db: Session, rows: List[dict]) -> Tuple[int, int]:
+        """Index existing posts, adding only the tags and mentions not recorded yet.
+
+        Returns the number of tags and mentions added; running it again over
+        the same posts adds and counts nothing.
+        """
+        post_ids = [row["id"] for row in rows]
+        existing_tags = set(db.execute(select(PostTag.postId, PostTag.tag).where(PostTag.postId.in_(post_ids))).tuples())
+        existing_mentions = set(db.execute(select(PostMention.postId, PostMention.userId).where(PostMention.postId.in_(post_ids))).tuples())
+        return TagService._index(db, rows, existing_tags, existing_mentions)
+
+    @staticmethod
+    def trending(db: Session, limit: int = 10) -> List[Tuple[str, int]]:
+        return [(row.tag, row.count) for row in db.execute(TagService.trending_stmt(limit))]
+
+    # AsyncSession counterparts
+
+    @staticmethod
+    async def _count_async(db: AsyncSession, deltas: Deltas) -> None:
+        updates, prune = TagService._count_plan(deltas)
+        for tag, bucket, delta in updates:
+            await db.execute(TagService._count_stmt(tag, bucket, delta))
+        if prune is not None:
+            await db.execute(TagService.prune_stmt(prune))
+
+    @staticmethod
+    async def index_new_async(db: AsyncSession, rows: List[dict]) -> None:
+        tag_rows, mention_stmts, deltas = TagService._plan_new(rows, set(), set())
+        if not tag_rows and not mention_stmts:
+            return
+        await db.flush()
+        if tag_rows:
+            await db.execute(insert(PostTag), tag_rows)
+        for stmt in mention_stmts:
+            await db.execute(stmt)
+        await TagService._count_async(db, deltas)
+
+    @staticmethod
+    async def reindex_async(db: AsyncSession, post_id: str, created_at: datetime, old_text: Optional[str], new_text: Optional[str]) -> None:
+        removed_tags, added_tags, removed_mentions, added_mentions = TagService._plan_edit(old_text, new_text)
+        bucket = TagService.bucket_of(created_at)
+        deltas = Counter()
+        if removed_tags:
+            for tag in (await db.execute(TagService.remove_tags_stmt(post_id, removed_tags))).scalars():
+                deltas[(tag, bucket)] -= 1
+        if added_tags:
+            await db.execute(insert(PostTag), TagService._tag_rows(post_id, created_at, added_tags))
+            deltas.update((tag, bucket) for tag in added_tags)
+        if removed_mentions:
+            await db.execute(TagService.remove_mentions_stmt(post_id, removed_mentions))
+        if added_mentions:
+            await db.execute(TagService.mentions_stmt(post_id, created_at, added_mentions))
+        await TagService._count_async(db, deltas)
+
+    @staticmethod
+    async def unindex_async(db: AsyncSession, post_id: str, created_at: datetime) -> None:
+        bucket = TagService.bucket_of(created_at)
+        tags = (await db.execute(TagService.remove_tags_stmt(post_id))).scalars().all()
+        await db.execute(TagService.remove_mentions_stmt(post_id))
+        await TagService._count_async(db, {(tag, bucket): -1 for tag in tags})
+
+    @staticmethod
+    async def trending_async(db: AsyncSession, limit: int = 10) -> List[Tuple[str, int]]:
+        return [(row.tag, row.count) for row in await db.execute(TagService.trending_stmt(limit))]
@@ -0,0 +1,100 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from sqlalchemy import select, delete, insert, literal, union_all, Select
+from app.database import SessionLocal
+from app.models.follow import Follow, FollowStats
+from app.models.post import Post
+from app.models.timeline import TimelineEntry
+from app.models.types import CompactUUID
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_COLUMNS = ["userId", "postId", "authorId", "createdAt"]
+
+class TimelineFanout:
+    """Background pool that copies new posts into their followers' timelines.
+
+    Each job is one INSERT ... SELECT over the author's followers, so it costs
+    the same statement count for ten followers as for ten thousand. Jobs are
+    small and are never dropped; they are lost only if the process exits first.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, post_ids: List[str]) -> None:
+        """Queue fan-out of committed posts without waiting for it"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max(self.workers, 1), thread_name_prefix="timeline-fanout")
+        self._executor.submit(self.fan_out, post_ids).add_done_callback(self._done)
+
+    def _done(self, future) -> None:
+        if future.exception() is not None:
+            logger.error("Timeline fan-out failed", exc_info=future.exception())
+
+    def fan_out(self, post_ids: List[str]) -> None:
+        db = SessionLocal()
+        try:
+            for post_id in post_ids:
+                db.execute(TimelineFanout.fanout_stmt(post_id))
+            db.commit()
+        finally:
+            db.close()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    @staticmethod
+    def _not_delivered(rows: Select, user_column) -> Select:
+        delivered = select(TimelineEntry.postId).where(
+            TimelineEntry.userId == user_column, TimelineEntry.postId == Post.id
+        ).correlate_except(TimelineEntry)
+        return rows.where(~delivered.exists())
+
+    @staticmethod
+    def fanout_stmt(post_id: str):
+        """Deliver a post to its author and, unless the author fans out on read, to every follower"""
+        to_author = select(Post.userId, Post.id, Post.userId, Post.createdAt).where(Post.id == post_id)
+        fans_out_on_read = select(FollowStats.userId).where(
+            FollowStats.userId == Post.userId, FollowStats.fanoutOnRead.is_(True)
+        ).correlate(Post)
+        to_followers = (
+            select(Follow.followerId, Post.id, Post.userId, Post.createdAt)
+            .join(Post, Post.userId == Follow.followeeId)
+            .where(Post.id == post_id, ~fans_out_on_read.exists())
+        )
+        rows = union_all(
+            TimelineFanout._not_delivered(to_author, Post.userId),
+            TimelineFanout._not_delivered(to_followers, Follow.followerId),
+        )
+        return insert(TimelineEntry).from_select(TIMELINE_COLUMNS, rows)
+
+    @staticmethod
+    def backfill_stmt(follower_id: str, followee_id: str, limit: int):
+        """Copy a newly followed account's latest posts into the follower's timeline"""
+        rows = (
+            select(literal(follower_id, CompactUUID), Post.id, Post.userId, Post.createdAt)
+            .where(Post.userId == followee_id)
+            .order_by(Post.createdAt.desc(), Post.id.desc())
+            .limit(limit)
+        )
+        rows = TimelineFanout._not_delivered(rows, literal(follower_id, CompactUUID))
+        return insert(TimelineEntry).from_select(TIMELINE_COLUMNS, rows)
+
+    @staticmethod
+    def prune_stmt(follower_id: str, followee_id: str):
+        return delete(TimelineEntry).where(TimelineEntry.userId == follower_id, TimelineEntry.authorId == followee_id)
+
+    @staticmethod
+    def delete_post_stmt(post_id: str):
+        return delete(TimelineEntry).where(TimelineEntry.postId == post_id)
+
+timeline_fanout = TimelineFanout(settings.timeline_workers)
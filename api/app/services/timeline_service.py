@@ -0,0 +1,79 @@
+from sqlalchemy import select, tuple_, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, Query
+from typing import List, Optional, Tuple
+from app.models.follow import Follow, FollowStats
+from app.models.post import Post
+from app.models.timeline import TimelineEntry
+from app.services.post_service import PostService
+from app.services.async_post_service import AsyncPostService
+from app.utils.pagination import encode_cursor, decode_cursor
+
+class TimelineService:
+    """Home timelines: posts are fanned out on write into timeline_entries, except
+    for accounts with fanoutOnRead set, whose posts are merged in when reading."""
+
+    @staticmethod
+    def fanout_on_read_stmt(user_id: str) -> Select:
+        """Followed accounts whose posts are not in timeline_entries"""
+        return (
+            select(Follow.followeeId)
+            .join(FollowStats, FollowStats.userId == Follow.followeeId)
+            .where(Follow.followerId == user_id, FollowStats.fanoutOnRead.is_(True))
+        )
+
+    @staticmethod
+    def _after(query, columns, cursor: Optional[str]):
+        position = decode_cursor(cursor)
+        if position is not None:
+            query = query.where(tuple_(*columns) < position)
+        return query.order_by(*(column.desc() for column in columns))
+
+    # The page builders below take either a Query or a Select, so the async
+    # service shares them
+    @staticmethod
+    def _timeline_query(query: Query, user_id: str, limit: int, cursor: Optional[str]) -> Query:
+        query = query.join(TimelineEntry, TimelineEntry.postId == Post.id).where(TimelineEntry.userId == user_id)
+        return TimelineService._after(query, (TimelineEntry.createdAt, TimelineEntry.postId), cursor).limit(limit + 1)
+
+    @staticmethod
+    def _authors_query(query: Query, author_ids: List[str], limit: int, cursor: Optional[str]) -> Query:
+        query = query.where(Post.userId.in_(author_ids))
+        return TimelineService._after(query, (Post.createdAt, Post.id), cursor).limit(limit + 1)
+
+    @staticmethod
+    def _merge_page(timeline: List[Post], merged: List[Post], limit: int) -> Tuple[List[Post], Optional[str]]:
+        """Merge fanned-out and read-time posts newest first; both lists hold up to limit + 1 rows"""
+        posts = {post.id: post for post in timeline}
+        for post in merged:
+            posts.setdefault(post.id, post)
+        ordered = sorted(posts.values(), key=lambda post: (post.createdAt, post.id), reverse=True)
+        next_cursor = None
+        if len(ordered) > limit:
+            ordered = ordered[:limit]
+            next_cursor = encode_cursor(ordered[-1].createdAt, ordered[-1].id)
+        return ordered, next_cursor
+
+    @staticmethod
+    def get_home_page(db: Session, user_id: str, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        limit = max(limit, 1)
+        timeline = TimelineService._timeline_query(PostService._with_owner(db), user_id, limit, cursor).all()
+        authors = db.scalars(TimelineService.fanout_on_read_stmt(user_id)).all()
+        merged = []
+        if authors:
+            merged = TimelineService._authors_query(PostService._with_owner(db), authors, limit, cursor).all()
+        return TimelineService._merge_page(timeline, merged, limit)
+
+    @staticmethod
+    async def get_home_page_async(db: AsyncSession, user_id: str, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        limit = max(limit, 1)
+        timeline = list(await db.scalars(
+            TimelineService._timeline_query(AsyncPostService._with_owner(), user_id, limit, cursor)
+        ))
+        authors = list(await db.scalars(TimelineService.fanout_on_read_stmt(user_id)))
+        merged = []
+        if authors:
+            merged = list(await db.scalars(
+                TimelineService._authors_query(AsyncPostService._with_owner(), authors, limit, cursor)
+            ))
+        return TimelineService._merge_page(timeline, merged, limit)
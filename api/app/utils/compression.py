@@ -0,0 +1,156 @@
+import gzip
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+# Compressing would hold back events until the buffer fills
+UNBUFFERED_TYPES = ("text/event-stream",)
+
+def _accepted(accept_encoding: str) -> dict:
+    """Codings from an Accept-Encoding header with their q-values"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip, preferring the client's higher q-value and then br"""
+    accepted = _accepted(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = [
+        (accepted.get(coding, wildcard), rank, coding)
+        for rank, coding in enumerate(("gzip", "br"))
+        if coding == "gzip" or brotli is not None
+    ]
+    quality, _, coding = max(candidates)
+    return coding if quality > 0 else None
+
+class _Compressor:
+    def __init__(self, coding: str, gzip_level: int, brotli_quality: int):
+        if coding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress, self._flush = self._compressor.process, self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._compress, self._flush = self._compressor.compress, self._compressor.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._flush()
+
+def compress(coding: str, body: bytes, gzip_level: int, brotli_quality: int) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip compression of text responses of at least minimum_size bytes.
+
+    Single-message bodies are compressed in one call; streamed bodies are
+    compressed chunk by chunk. Bodies that are already encoded, partial
+    (206) responses, binary media and event streams pass through untouched:
+    a Content-Range counts bytes of the unencoded body. A strong ETag is
+    weakened on compressed responses, since it names the unencoded bytes.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        coding = negotiate(accept_encoding) if accept_encoding else None
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = {name.lower(): value for name, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                compressible = content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(UNBUFFERED_TYPES)
+                if compressible:
+                    message = dict(message, headers=self._vary(message.get("headers", [])))
+                partial = message["status"] == 206 or b"content-range" in headers
+                if coding is None or not compressible or partial or b"content-encoding" in headers:
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows how large the body is
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body:
+                    if len(body) < self.minimum_size:
+                        await send(start)
+                    else:
+                        body = compress(coding, body, self.gzip_level, self.brotli_quality)
+                        await send(self._encoded(start, coding, len(body)))
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                compressor = _Compressor(coding, self.gzip_level, self.brotli_quality)
+                await send(self._encoded(start, coding, None))
+            chunk = compressor.compress(body)
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _vary(headers):
+        headers = list(headers)
+        for index, (name, value) in enumerate(headers):
+            if name.lower() == b"vary":
+                if b"accept-encoding" not in value.lower():
+                    headers[index] = (name, value + b", Accept-Encoding")
+                return headers
+        headers.append((b"vary", b"Accept-Encoding"))
+        return headers
+
+    @staticmethod
+    def _encoded(start, coding: str, length: Optional[int]):
+        headers = []
+        for name, value in start["headers"]:
+            lowered = name.lower()
+            if lowered in (b"content-length", b"accept-ranges"):
+                # Both would count bytes of the unencoded body
+                continue
+            if lowered == b"etag" and not value.startswith(b"W/"):
+                value = b"W/" + value
+            headers.append((name, value))
+        headers.append((b"content-encoding", coding.encode()))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return dict(start, headers=headers)
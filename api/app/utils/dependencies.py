@@ -1,28 +1,79 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
+from typing import Optional
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_async_db, get_read_db, get_async_read_db, on_replica
 from app.models.user import User
-from app.utils.security import verify_token
+from app.utils.security import decode_token
+from app.utils.principal_cache import principal_cache
+from app.utils.profiling import admin_token_matches
+from app.config import settings
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db)
+) -> User:
+    credentials_exception = _credentials_exception()
+    
+    token = credentials.credentials
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
     
-    user_id = verify_token(credentials.credentials)
-    if user_id is None:
+    payload = decode_token(token)
+    if payload is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).filter(User.id == payload["sub"]).first()
+    if user is None and on_replica(db):
+        # Just signed up: the replica may not have the account yet
+        user = primary_db.query(User).filter(User.id == payload["sub"]).first()
     if user is None:
         raise credentials_exception
     
-    return user
\ No newline at end of file
+    principal_cache.put(token, user, payload.get("exp", float("inf")))
+    return user
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db),
+    primary_db: AsyncSession = Depends(get_async_db)
+) -> User:
+    token = credentials.credentials
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+    
+    payload = decode_token(token)
+    if payload is None:
+        raise _credentials_exception()
+    
+    user = await db.get(User, payload["sub"])
+    if user is None and on_replica(db):
+        user = await primary_db.get(User, payload["sub"])
+    if user is None:
+        raise _credentials_exception()
+    
+    principal_cache.put(token, user, payload.get("exp", float("inf")))
+    return user
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Guard for operator endpoints, which stay hidden unless ADMIN_TOKEN is set"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not admin_token_matches(x_admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin token"
+        )
@@ -0,0 +1,73 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from app.utils import security
+from app.config import settings
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated process pool so hashing bursts do not
+    occupy request threads or the GIL.
+
+    At most `workers + queue_limit` hashes are in flight; beyond that callers
+    get a 503 with Retry-After instead of queueing without bound. Callers
+    await the result on the event loop; waiting in a threadpool thread would
+    let a burst of sign-ins take the threads other sync routes run on.
+    """
+
+    def __init__(self, workers: Optional[int], queue_limit: int, retry_after: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = self.workers + queue_limit
+        self.retry_after = retry_after
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn avoids forking a process that already runs server threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many concurrent sign-ins, try again shortly",
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self._in_flight += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(security.get_password_hash, password))
+
+    async def verify_and_update_async(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        future = self._submit(security.verify_and_update_password, password, hashed_password)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+password_hasher = PasswordHasher(settings.hash_workers, settings.hash_queue_limit, settings.hash_retry_after)
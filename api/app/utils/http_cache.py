@@ -0,0 +1,38 @@
+import hashlib
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Optional
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = _opaque_tag(etag)
+    return any(_opaque_tag(candidate.strip()) == target for candidate in if_none_match.split(","))
+
+def not_modified_since(if_modified_since: Optional[str], mtime: float) -> bool:
+    """True when the resource has not changed since the If-Modified-Since date"""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one second resolution
+    return int(mtime) <= since.timestamp()
+
+def page_etag(items: Iterable, *variant: str) -> str:
+    """Weak ETag for a list of post responses.
+    
+    Built from each post's id, last change and resized copies rather than the
+    serialized body, so a matching request can skip serialization. `variant`
+    distinguishes other representations of the same page.
+    """
+    parts = ["|".join(variant)]
+    parts.extend(f"{item.id} {item.updatedAt or item.createdAt} {sorted(item.variants)}" for item in items)
+    digest = hashlib.sha1("\n".join(parts).encode()).hexdigest()
+    return f'W/"{digest[:24]}"'
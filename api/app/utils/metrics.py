@@ -0,0 +1,256 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# A small Prometheus-compatible registry. Recording is a dict lookup and an
+# addition under a per-metric lock, so it stays cheap enough to leave on.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        super().__init__(name, description, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+class CallbackGauge(Metric):
+    """Gauge read from a callback when the registry is rendered"""
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str], collect: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]):
+        super().__init__(name, description, labels)
+        self.collect = collect
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in self.collect()]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        lines = []
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                bucket_labels = _format_labels(self.labels, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, description: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, description, labels, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format, version 0.0.4"""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+metrics = MetricsRegistry()
+
+# Startup phases are measured from the first import of this module, which
+# app.main imports before the rest of the application
+_imported_at = time.perf_counter()
+
+http_requests = metrics.counter("postly_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = metrics.histogram("postly_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+http_in_flight = metrics.gauge("postly_http_requests_in_flight", "HTTP requests being served", ("method",))
+db_queries = metrics.counter("postly_db_queries_total", "SQL statements executed", ("engine",))
+db_query_latency = metrics.histogram("postly_db_query_duration_seconds", "SQL statement latency", ("engine",), QUERY_BUCKETS)
+db_request_queries = metrics.histogram("postly_db_queries_per_request", "SQL statements issued per HTTP request", ("route",), COUNT_BUCKETS)
+db_request_time = metrics.histogram("postly_db_time_per_request_seconds", "Time spent in SQL per HTTP request", ("route",))
+worker_startup = metrics.gauge("postly_worker_startup_seconds", "Seconds from app import to each startup phase of this worker", ("phase",))
+db_pool_wait = metrics.histogram("postly_db_pool_checkout_seconds", "Time waiting for a pooled connection", ("engine",), QUERY_BUCKETS)
+
+_pool_collectors: List[Callable[[], list]] = []
+db_pool_checked_out = metrics.register(CallbackGauge(
+    "postly_db_pool_checked_out", "Connections checked out of the pool", ("engine",),
+    lambda: [sample for collect in _pool_collectors for sample in collect()]
+))
+
+def record_startup(phase: str) -> float:
+    elapsed = time.perf_counter() - _imported_at
+    worker_startup.set(elapsed, phase)
+    return elapsed
+
+class RequestStats:
+    __slots__ = ("queries", "query_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+
+# The stats object is shared with threadpool workers, which copy the context
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Count statements, statement time and pool checkout wait for an engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        db_queries.inc(name)
+        db_query_latency.observe(elapsed, name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_time += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        if context.connection is not None and context.connection.info.get("query_start"):
+            context.connection.info["query_start"].pop()
+
+    # Pool has no event before checkout, so time the public connect() call
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - start, name)
+
+    pool.connect = timed_connect
+
+    def pool_usage():
+        status = getattr(pool, "checkedout", None)
+        return [((name,), status())] if status else []
+
+    _pool_collectors.append(pool_usage)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status codes and SQL work per route.
+
+    Routes are labelled with their path template, and requests that match no
+    route share the "unmatched" label, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._served = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not self._served:
+            self._served = True
+            record_startup("first_request")
+
+        method = scope["method"]
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        http_in_flight.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec(method)
+            _request_stats.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_requests.inc(method, route, str(status_code[0]))
+            http_latency.observe(elapsed, method, route)
+            db_request_queries.observe(stats.queries, route)
+            db_request_time.observe(stats.query_time, route)
@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, status
+
+def _encode(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode(cursor: str) -> List[Any]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
+
+def encode_cursor(created_at: datetime, post_id: str) -> str:
+    """Encode a (createdAt, id) position into an opaque cursor"""
+    return _encode([created_at.isoformat(), post_id])
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    """Decode an opaque cursor, an empty cursor means the first page"""
+    if not cursor:
+        return None
+    try:
+        created_at, post_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), str(post_id)
+    except (ValueError, TypeError):
+        raise _invalid_cursor()
+
+def encode_rank_cursor(score: float, post_id: str) -> str:
+    """Encode a (score, id) position of a ranked result list"""
+    return _encode([score, post_id])
+
+def decode_rank_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+    if not cursor:
+        return None
+    try:
+        score, post_id = _decode(cursor)
+        return float(score), str(post_id)
+    except (ValueError, TypeError):
+        raise _invalid_cursor()
@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from app.models.user import User
+from app.config import settings
+
+class PrincipalCache:
+    """Bounded LRU of authenticated users keyed by bearer token.
+
+    Entries expire at the earlier of the token's `exp` and the configured TTL,
+    so a hit never outlives the token that produced it.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, token: str) -> Optional[User]:
+        """Return a detached copy of the cached user, or None on a miss"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    self._discard(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            data = entry[1]
+
+        # A fresh instance per request, so sessions never share the object
+        user = User(**data)
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, token: str, user: User, token_exp: float) -> None:
+        if not self.enabled:
+            return
+        expires_at = min(token_exp, time.time() + self.ttl)
+        data = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        with self._lock:
+            if token in self._entries:
+                self._discard(token)
+            self._entries[token] = (expires_at, data)
+            self._tokens_by_user.setdefault(data["id"], set()).add(token)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._discard(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _discard(self, token: str) -> None:
+        _, data = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(data["id"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[data["id"]]
+
+principal_cache = PrincipalCache(settings.auth_cache_size, settings.auth_cache_ttl)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
@@ -0,0 +1,204 @@
+import cProfile
+import functools
+import inspect
+import io
+import itertools
+import logging
+import pstats
+import random
+import secrets
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_TOP_FUNCTIONS = 40
+EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+
+class ProfileSession:
+    """CPU profiles and SQL statements collected while serving one request"""
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []
+        self.statements: List[dict] = []
+        self._lock = threading.Lock()
+
+    def add_profile(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self.profiles.append(profile)
+
+    def add_statement(self, statement: str, elapsed: float) -> None:
+        with self._lock:
+            self.statements.append({"statement": statement, "duration_ms": round(elapsed * 1000, 3)})
+
+    def report(self) -> str:
+        profiles = [profile for profile in self.profiles if profile.getstats()]
+        if not profiles:
+            return ""
+        output = io.StringIO()
+        stats = pstats.Stats(*profiles, stream=output)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        return output.getvalue()
+
+_session: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+class ProfileBuffer:
+    """Bounded, thread-safe ring buffer of the latest request profiles"""
+
+    def __init__(self, size: int):
+        self._entries = deque(maxlen=max(size, 1))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, entry: dict) -> None:
+        with self._lock:
+            entry["id"] = next(self._ids)
+            self._entries.append(entry)
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+profile_buffer = ProfileBuffer(settings.profile_buffer_size)
+
+def admin_token_matches(token: Optional[str]) -> bool:
+    return bool(settings.admin_token) and token is not None and secrets.compare_digest(token, settings.admin_token)
+
+def _requested(scope) -> bool:
+    if not settings.admin_token:
+        return False
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return admin_token_matches(value.decode("latin-1"))
+    return settings.profile_sample_rate > 0 and random.random() < settings.profile_sample_rate
+
+class ProfilingMiddleware:
+    """Profile requests that send `X-Profile: <admin token>`, or a random sample.
+
+    The event-loop thread is profiled for the whole request, so async handlers
+    and response serialization are covered; code from other requests running
+    on the loop at the same time shows up too. Sync handlers are profiled on
+    their worker thread by ProfiledRoute. Only one request is profiled at a time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._active = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _requested(scope) or not self._active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        session = ProfileSession()
+        token = _session.set(session)
+        profile = cProfile.Profile()
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            _session.reset(token)
+            self._active.release()
+            session.add_profile(profile)
+            profile_buffer.add({
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status_code[0],
+                "started_at": started_at.isoformat(),
+                "duration_ms": round(elapsed * 1000, 3),
+                "sql_time_ms": round(sum(item["duration_ms"] for item in session.statements), 3),
+                "sql": session.statements,
+                "profile": session.report(),
+            })
+
+def profiled(endpoint):
+    """Wrap a sync endpoint so it is profiled on the worker thread that runs it"""
+    if inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        session = _session.get()
+        if session is None:
+            return endpoint(*args, **kwargs)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profile.disable()
+            session.add_profile(profile)
+
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, profiled(endpoint), **kwargs)
+
+def _explain(conn, statement: str, parameters) -> str:
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}.get(conn.dialect.name)
+    if prefix is None:
+        return "(no EXPLAIN for this backend)"
+    # A raw DBAPI cursor, so the EXPLAIN does not re-enter these events
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+def watch_engine(engine: Engine) -> None:
+    """Feed statements to the active profile and log slow ones with their plan"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["profile_query_start"].pop()
+        session = _session.get()
+        if session is not None:
+            session.add_statement(statement, elapsed)
+        if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+            plan = "(not explained)"
+            if not executemany and statement.lstrip().lower().startswith(EXPLAINABLE):
+                try:
+                    plan = _explain(conn, statement, parameters)
+                except Exception as exc:
+                    plan = f"(EXPLAIN failed: {exc})"
+            if settings.slow_query_log_parameters:
+                logger.warning("Slow query (%.1f ms): %s\nParameters: %r\nPlan:\n%s", elapsed * 1000, statement, parameters, plan)
+            else:
+                # Parameters carry password hashes, emails and post text
+                logger.warning("Slow query (%.1f ms): %s\nPlan:\n%s", elapsed * 1000, statement, plan)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        if context.connection is not None and context.connection.info.get("profile_query_start"):
+            context.connection.info["profile_query_start"].pop()
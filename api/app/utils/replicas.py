@@ -0,0 +1,142 @@
+import hashlib
+import importlib
+import itertools
+import logging
+import threading
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.utils.cache import CacheBackend, InMemoryLRUBackend
+from app.utils.metrics import CallbackGauge, metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Pins are tiny and short-lived, the bound only stops a flood of writers growing it
+STICKY_CACHE_SIZE = 100000
+
+replica_reads = metrics.counter("postly_db_read_sessions_total", "Read-only request sessions by where they were served", ("target",))
+
+def build_sticky_backend() -> CacheBackend:
+    name = settings.db_sticky_backend
+    if name == "memory":
+        return InMemoryLRUBackend(STICKY_CACHE_SIZE)
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+class Replica:
+    """A read replica, with the session factories bound to it"""
+
+    def __init__(self, name: str, engine: Engine, sessions, async_engine=None, async_sessions=None):
+        self.name = name
+        self.engine = engine
+        self.sessions = sessions
+        self.async_engine = async_engine
+        self.async_sessions = async_sessions
+        self.healthy = True
+        self.in_use = 0
+
+class ReplicaRouter:
+    """Chooses where read-only request sessions run.
+
+    Reads go to a healthy replica, picked round-robin or by fewest sessions
+    in use, and to the primary when there is none. A client that commits is
+    pinned to the primary for `sticky_window` seconds so it reads its own
+    writes; pins are kept in a cache backend, which must be shared (e.g.
+    Redis) for the guarantee to hold across workers. A background thread
+    runs a trivial query against every replica, ejecting those that fail and
+    readmitting them once they answer again.
+    """
+
+    def __init__(self, replicas: List[Replica], balancing: str, sticky_window: int, health_interval: int, sticky_backend: CacheBackend):
+        if balancing not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica balancing {balancing!r}")
+        self.replicas = replicas
+        self.balancing = balancing
+        self.sticky_window = sticky_window
+        self.health_interval = health_interval
+        self.sticky = sticky_backend
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if replicas:
+            metrics.register(CallbackGauge(
+                "postly_db_replica_healthy", "Whether each read replica is receiving reads", ("replica",),
+                lambda: [((replica.name,), int(replica.healthy)) for replica in self.replicas]
+            ))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    @staticmethod
+    def client_key(authorization: Optional[str]) -> Optional[str]:
+        """Identify a client by its credentials, hashed so a shared backend never stores tokens"""
+        if not authorization:
+            return None
+        return "rw:" + hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
+    def pin(self, client: str) -> None:
+        if self.sticky_window > 0:
+            self.sticky.set(client, True, (), self.sticky_window)
+
+    def is_pinned(self, client: Optional[str]) -> bool:
+        return client is not None and self.sticky.get(client) is not None
+
+    def choose(self, client: Optional[str]) -> Optional[Replica]:
+        """Return the replica to read from, or None to read from the primary"""
+        if not self.replicas or self.is_pinned(client):
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.balancing == "least_connections":
+            return min(healthy, key=lambda replica: replica.in_use)
+        return healthy[next(self._turn) % len(healthy)]
+
+    def acquire(self, replica: Optional[Replica]) -> None:
+        replica_reads.inc("replica" if replica else "primary")
+        if replica is not None:
+            with self._lock:
+                replica.in_use += 1
+
+    def release(self, replica: Optional[Replica]) -> None:
+        if replica is not None:
+            with self._lock:
+                replica.in_use -= 1
+
+    def eject(self, replica: Replica) -> None:
+        """Stop reading from a replica until its next successful health check"""
+        if replica.healthy:
+            replica.healthy = False
+            logger.warning("Read replica %s ejected", replica.name)
+
+    def check(self) -> None:
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+            except Exception:
+                self.eject(replica)
+                continue
+            if not replica.healthy:
+                replica.healthy = True
+                logger.info("Read replica %s readmitted", replica.name)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            self.check()
+
+    def start(self) -> None:
+        if not self.replicas or self.health_interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
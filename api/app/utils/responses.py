@@ -0,0 +1,33 @@
+from functools import lru_cache
+from typing import Any, List
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: type) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for data that is already validated.
+
+    Routes return `FastJSONResponse(model)` to skip FastAPI validating and
+    serializing their response_model a second time. Models, and lists of a
+    single model, are encoded by their compiled Pydantic serializer, which is
+    faster than dumping them to dicts first; anything else goes through
+    orjson. Both produce the same JSON as the response_model path.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        if isinstance(content, list) and content and isinstance(content[0], BaseModel):
+            model = type(content[0])
+            if all(type(item) is model for item in content):
+                return _list_adapter(model).dump_json(content)
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
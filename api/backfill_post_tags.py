@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Backfill hashtags, mentions and trending counters for posts written before they were indexed.
+
+Run it once the API version that indexes them has started, which creates the
+tables. Posts are streamed and indexed in committed batches; an interrupted run
+resumes from its checkpoint file. Safe to run while the API is serving.
+"""
+
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.services.tag_backfill import TagBackfillRunner
+
+def backfill_post_tags(batch_size: int = 1000, checkpoint: str = ".backfill_post_tags.checkpoint"):
+    runner = TagBackfillRunner(SessionLocal, batch_size=batch_size, checkpoint_path=checkpoint)
+    try:
+        counts = runner.run()
+    except Exception as e:
+        print(f"Error during backfill: {e}")
+        print(f"Committed batches are kept, run again to resume from {checkpoint}")
+        raise SystemExit(1)
+
+    print("Backfill completed successfully!")
+    print(f"  Posts with a # or @: {counts['scanned']}")
+    print(f"  Tags added:          {counts['tags']}")
+    print(f"  Mentions added:      {counts['mentions']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000, help="posts per committed batch")
+    parser.add_argument("--checkpoint", default=".backfill_post_tags.checkpoint", help="file recording progress")
+    args = parser.parse_args()
+    backfill_post_tags(args.batch_size, args.checkpoint)
@@ -2,57 +2,70 @@
 """
 Migration script to update existing blob URLs from full paths to filenames.
 This ensures compatibility with the new blob serving endpoint.
+
+Rows are streamed and updated in committed batches; an interrupted run resumes
+from its checkpoint file. Use --dry-run to only print what would change.
 """
 
+import argparse
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from typing import Optional
 from app.database import SessionLocal
-from app.models.post import Post
-from app.models.user import User
+from app.services.blob_migration import BlobMigration, BlobMigrationRunner
+from app.services.media_storage import MediaStorage
 from app.config import settings
 
-def migrate_blob_urls():
-    """Migrate existing blob URLs from full paths to filenames"""
-    db = SessionLocal()
-    
-    try:
-        # Get all posts with blob URLs
-        posts_with_blobs = db.query(Post).filter(Post.blobUrl.isnot(None)).all()
-        
-        print(f"Found {len(posts_with_blobs)} posts with blob URLs")
-        
-        for post in posts_with_blobs:
-            if post.blobUrl:
-                print(f"Processing post {post.id}: {post.blobUrl}")
-                
-                # Check if it's already a filename (not a full path)
-                if not ('/' in post.blobUrl or '\\' in post.blobUrl):
-                    print(f"  Already a filename: {post.blobUrl}")
-                    continue
-                
-                # Extract filename from path
-                filename = os.path.basename(post.blobUrl)
-                
-                # Check if the file exists in uploads directory
-                file_path = os.path.join(settings.upload_dir, filename)
-                if os.path.exists(file_path):
-                    print(f"  Updating to filename: {filename}")
-                    post.blobUrl = filename
-                else:
-                    print(f"  File not found, removing blob URL: {file_path}")
-                    post.blobUrl = None
+class FilenameMigration(BlobMigration):
+    """Full paths become bare filenames; URLs whose file is missing are cleared"""
+
+    name = "blob-urls-to-filenames"
+
+    def migrate(self, blob_url: str) -> Optional[str]:
+        # Content-addressed paths ("ab/cd/<sha256>.jpg") are the current layout
+        if MediaStorage.content_hash(blob_url):
+            return blob_url
         
-        # Commit changes
-        db.commit()
-        print("Migration completed successfully!")
+        # Check if it's already a filename (not a full path)
+        if not ('/' in blob_url or '\\' in blob_url):
+            return blob_url
         
+        # Extract filename from path and check it exists in the uploads directory
+        filename = os.path.basename(blob_url.replace('\\', '/'))
+        if os.path.exists(os.path.join(settings.upload_dir, filename)):
+            return filename
+        return None
+
+def migrate_blob_urls(dry_run: bool = False, batch_size: int = 1000, workers: int = 16, checkpoint: str = ".migrate_blob_urls.checkpoint"):
+    """Migrate existing blob URLs from full paths to filenames"""
+    runner = BlobMigrationRunner(
+        FilenameMigration(),
+        SessionLocal,
+        batch_size=batch_size,
+        workers=workers,
+        checkpoint_path=checkpoint,
+        dry_run=dry_run,
+    )
+    try:
+        counts = runner.run()
     except Exception as e:
         print(f"Error during migration: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        print(f"Committed batches are kept, run again to resume from {checkpoint}")
+        raise SystemExit(1)
+    
+    print("Dry run, nothing was changed:" if dry_run else "Migration completed successfully!")
+    print(f"  Posts with a blob URL: {counts['scanned']}")
+    print(f"  Already up to date:    {counts['unchanged']}")
+    print(f"  Updated to filename:   {counts['updated']}")
+    print(f"  Cleared (file missing): {counts['cleared']}")
 
 if __name__ == "__main__":
-    migrate_blob_urls()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per committed batch")
+    parser.add_argument("--workers", type=int, default=16, help="threads checking files")
+    parser.add_argument("--checkpoint", default=".migrate_blob_urls.checkpoint", help="file recording progress")
+    args = parser.parse_args()
+    migrate_blob_urls(args.dry_run, args.batch_size, args.workers, args.checkpoint)
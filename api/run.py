@@ -1,16 +1,62 @@
+import logging
 import uvicorn
 import os
-from app.main import app
+
+logger = logging.getLogger("run")
 
 if __name__ == "__main__":
     # Get configuration from environment variables
     host = os.getenv("HOST", "0.0.0.0")  # Changed to 0.0.0.0 for Docker
     port = int(os.getenv("PORT", "8001"))
-    reload = os.getenv("ENVIRONMENT", "development") != "production"
+    production = os.getenv("ENVIRONMENT", "development") == "production"
     
-    uvicorn.run(
-        "app.main:app",
-        host=host,
-        port=port,
-        reload=reload
-    )
\ No newline at end of file
+    if not production:
+        uvicorn.run(
+            "app.main:app",
+            host=host,
+            port=port,
+            reload=True
+        )
+    else:
+        from app.config import settings
+        from app.database import engine
+        from app.main import init_database
+        from app.services.blob_cleanup import blob_janitor
+        
+        workers = int(os.getenv("WORKERS", os.cpu_count() or 1))
+        if workers > 1 and settings.post_stream_broker == "local":
+            logger.warning(
+                "POST_STREAM_BROKER is local with %d workers: stream clients only see posts "
+                "written through their own worker. Set a shared broker, or WORKERS=1.", workers
+            )
+        if workers > 1 and "post_cache_backend" not in settings.model_fields_set:
+            # The in-process cache only sees its own worker's writes, so others
+            # would serve edited and deleted posts until the TTL runs out
+            os.environ["POST_CACHE_BACKEND"] = "none"
+        elif workers > 1 and settings.post_cache_backend == "memory":
+            logger.warning(
+                "POST_CACHE_BACKEND is memory with %d workers: a changed post may be served "
+                "by other workers for up to POST_CACHE_TTL (%ds).", workers, settings.post_cache_ttl
+            )
+        
+        # Set up the schema once here, so workers neither repeat nor race the DDL
+        init_database()
+        engine.dispose()
+        os.environ["DB_INIT_ON_STARTUP"] = "false"
+        
+        # Likewise a single janitor removes deleted and orphaned media for all workers
+        blob_janitor.start()
+        os.environ["BLOB_CLEANUP_ENABLED"] = "false"
+        
+        # Workers are spawned and supervised by uvicorn, which replaces any that
+        # exit, including those recycled after MAX_REQUESTS
+        uvicorn.run(
+            "app.main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            limit_max_requests=int(os.getenv("MAX_REQUESTS", "10000")) or None,
+            limit_max_requests_jitter=int(os.getenv("MAX_REQUESTS_JITTER", "1000")),
+            timeout_graceful_shutdown=int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+        )
+        blob_janitor.shutdown()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Read and write throughput of the sync routes and of ASYNC_DB at several client concurrencies.
+
+Each mode runs in a fresh process on its own database, served by a
+one-worker server started through run.py, and is loaded with GET /posts
+(a 20-post cursor page, post cache off) and then POST /posts from each
+--concurrency level of clients for --duration seconds. The sync routes
+run each request on one of Starlette's 40 threadpool threads; the async
+routes run them on the event loop.
+"""
+
+import argparse
+import asyncio
+import common
+
+def run_mode(mode: str, levels, duration: float, posts: int) -> None:
+    # Reads go to the database rather than the response cache
+    common.prepare(async_db=str(mode == "async").lower(), post_cache_backend="none", slow_query_ms=0)
+    from app.main import init_database
+    init_database()
+    user_ids = common.seed(users=100, posts=posts)
+    headers = common.auth_headers(user_ids[0])
+
+    with common.server(workers=1) as base_url:
+        read = lambda client: client.get("/posts", params={"cursor": "", "limit": 20})
+        write = lambda client: client.post("/posts", json={"text": "benchmark post"}, headers=headers)
+        for label, request in (("read", read), ("write", write)):
+            for concurrency in levels:
+                rate, ok, errors = asyncio.run(common.load(base_url, request, concurrency, duration))
+                print(f"{mode:5s} {label:5s} c={concurrency:<5d} {rate:8.0f} req/s  {ok} ok, {errors} errors", flush=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", default="10,100,1000", help="comma-separated client concurrency levels")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per level")
+    parser.add_argument("--posts", type=int, default=10000, help="posts seeded before the run")
+    parser.add_argument("--mode", choices=["sync", "async"], help="run one mode in this process")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(",")]
+    if args.mode:
+        run_mode(args.mode, levels, args.duration, args.posts)
+    else:
+        for mode in ("sync", "async"):
+            common.rerun("--mode", mode, "--concurrency", args.concurrency, "--duration", str(args.duration),
+                         "--posts", str(args.posts))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Posts per second at several concurrency levels, committing each post on its own and with POST_GROUP_COMMIT.
+
+With --via direct (the default), --concurrency threads call
+PostService.create_post with their own session for --duration seconds per
+level. With --via http, as many clients send POST /posts to a one-worker
+server started through run.py. Each setting runs in its own process on its
+own database. Queued timeline fan-out is drained between levels so one level
+does not slow down the next. The average batch is read from the
+postly_post_group_commit_rows histogram.
+
+Group commit saves fsyncs, so its gain depends on the disk: set TMPDIR to
+put the database on the disk production uses.
+"""
+
+import argparse
+import asyncio
+import re
+import threading
+import time
+import common
+
+def batch_totals(rendered: str):
+    """(rows, transactions) recorded so far by the group commit histogram"""
+    totals = dict(re.findall(r"^postly_post_group_commit_rows_(sum|count) ([0-9.eE+-]+)$", rendered, re.MULTILINE))
+    return float(totals.get("sum", 0)), float(totals.get("count", 0))
+
+def report(group: bool, concurrency: int, rate: float, before, after, errors: int = 0) -> None:
+    line = f"{'group  ' if group else 'current'} c={concurrency:<4d} {rate:8.0f} posts/s"
+    if group and after[1] > before[1]:
+        line += f"  avg batch {(after[0] - before[0]) / (after[1] - before[1]):.1f}"
+    if errors:
+        line += f"  {errors} errors"
+    print(line, flush=True)
+
+def direct(group: bool, levels, duration: float) -> None:
+    common.prepare(post_group_commit=str(group).lower(), slow_query_ms=0)
+    from app.main import init_database
+    from app.database import SessionLocal
+    from app.models.user import User
+    from app.schemas.post import PostCreate
+    from app.services.post_group_commit import group_commit_rows, post_group_commit
+    from app.services.post_service import PostService
+    from app.services.timeline_fanout import timeline_fanout
+    init_database()
+    user_ids = common.seed(users=10, posts=1000)
+    db = SessionLocal()
+    user = db.get(User, user_ids[0])
+    db.expunge(user)
+    db.close()
+
+    for concurrency in levels:
+        created = []
+        stop = time.monotonic() + duration
+
+        def work():
+            session = SessionLocal()
+            count = 0
+            while time.monotonic() < stop:
+                PostService.create_post(session, PostCreate(text="benchmark post"), user)
+                count += 1
+            session.close()
+            created.append(count)
+
+        before = batch_totals(group_commit_rows.render())
+        threads = [threading.Thread(target=work) for _ in range(concurrency)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        rate = sum(created) / (time.monotonic() - started)
+        report(group, concurrency, rate, before, batch_totals(group_commit_rows.render()))
+        post_group_commit.shutdown()
+        timeline_fanout.shutdown()
+
+def http(group: bool, levels, duration: float) -> None:
+    common.prepare(post_group_commit=str(group).lower(), metrics_enabled="true", slow_query_ms=0)
+    import httpx
+    from app.main import init_database
+    init_database()
+    user_ids = common.seed(users=10, posts=1000)
+    headers = common.auth_headers(user_ids[0])
+
+    with common.server(workers=1) as base_url:
+        request = lambda client: client.post("/posts", json={"text": "benchmark post"}, headers=headers)
+        for concurrency in levels:
+            before = batch_totals(httpx.get(f"{base_url}/metrics").text)
+            rate, _, errors = asyncio.run(common.load(base_url, request, concurrency, duration))
+            report(group, concurrency, rate, before, batch_totals(httpx.get(f"{base_url}/metrics").text), errors)
+            # Let queued fan-out finish before the next level
+            time.sleep(2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", default="1,8,32,64", help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=5, help="seconds per level")
+    parser.add_argument("--via", choices=["direct", "http"], default="direct")
+    parser.add_argument("--mode", choices=["current", "group"], help="run one setting in this process")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(",")]
+    if args.mode:
+        (direct if args.via == "direct" else http)(args.mode == "group", levels, args.duration)
+    else:
+        for mode in ("current", "group"):
+            common.rerun("--mode", mode, "--via", args.via, "--concurrency", args.concurrency, "--duration", str(args.duration))
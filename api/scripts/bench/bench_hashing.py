@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+GET /posts throughput and latency on their own and during a burst of sign-ins.
+
+Starts the API in one uvicorn process, signs up --users users and creates
+posts through the API, then runs --feed-clients clients reading
+GET /posts?limit=20 for --duration seconds: first alone, then alongside
+--signin-clients clients signing in as fast as they can. Reported are feed
+requests/s with their median and 95th percentile latency, and sign-ins/s
+with any 503s from the hashing queue. The post cache is off, so every read
+queries the database.
+
+Everything goes through the HTTP API, so --api-dir can point at an older
+checkout's api/ directory (e.g. from `git worktree add /tmp/before
+<commit>`) for before/after numbers.
+"""
+
+import argparse
+import asyncio
+import time
+import common
+
+PASSWORD = "benchmark-password"
+
+async def drive(client, request, clients: int, duration: float):
+    """Send `request` from `clients` clients for `duration` seconds: (requests/s, latencies, status counts)"""
+    import httpx
+
+    samples = []
+    statuses = {}
+    stop = time.monotonic() + duration
+
+    async def worker():
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            try:
+                status = (await request(client)).status_code
+            except httpx.HTTPError:
+                status = "error"
+            if status == 200:
+                samples.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return len(samples) / (time.monotonic() - started), sorted(samples), statuses
+
+def summary(label: str, rate: float, samples, statuses) -> str:
+    line = f"{label:28s} {rate:7.1f} req/s"
+    if samples:
+        line += f"  median {samples[len(samples) // 2] * 1000:6.1f} ms  p95 {samples[int(len(samples) * 0.95)] * 1000:6.1f} ms"
+    failed = {status: count for status, count in statuses.items() if status != 200}
+    if failed:
+        line += "  " + ", ".join(f"{count} x {status}" for status, count in failed.items())
+    return line
+
+async def run(base_url: str, users: int, posts: int, feed_clients: int, signin_clients: int, duration: float) -> None:
+    import httpx
+
+    limits = httpx.Limits(max_connections=feed_clients + signin_clients)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        emails = [f"bench{i}@example.com" for i in range(users)]
+        for email in emails:
+            response = await client.post("/auth/signup", json={
+                "email": email, "password": PASSWORD, "firstName": "Bench", "lastName": "User",
+                "birthday": "2000-01-01T00:00:00"
+            })
+            response.raise_for_status()
+        response = await client.post("/auth/signin", json={"email": emails[0], "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for i in range(posts):
+            (await client.post("/posts", json={"text": f"post {i}"}, headers=headers)).raise_for_status()
+
+        feed = lambda client: client.get("/posts?limit=20")
+        signins = iter(range(1 << 62))
+        signin = lambda client: client.post("/auth/signin", json={"email": emails[next(signins) % users], "password": PASSWORD})
+
+        print(summary("feed alone", *await drive(client, feed, feed_clients, duration)), flush=True)
+        feed_result, signin_result = await asyncio.gather(
+            drive(client, feed, feed_clients, duration),
+            drive(client, signin, signin_clients, duration),
+        )
+        print(summary("feed during sign-ins", *feed_result), flush=True)
+        print(summary("sign-ins", *signin_result), flush=True)
+
+def main(api_dir: str, users: int, posts: int, feed_clients: int, signin_clients: int, duration: float) -> None:
+    common.prepare(post_cache_backend="none", slow_query_ms=0)
+    with common.uvicorn_server(api_dir) as base_url:
+        asyncio.run(run(base_url, users, posts, feed_clients, signin_clients, duration))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="users signing in")
+    parser.add_argument("--posts", type=int, default=200, help="posts created before the load")
+    parser.add_argument("--feed-clients", type=int, default=16, help="concurrent GET /posts clients")
+    parser.add_argument("--signin-clients", type=int, default=16, help="concurrent sign-in clients")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per phase")
+    parser.add_argument("--api-dir", default=common.API_DIR, help="the api/ directory of the checkout to benchmark")
+    args = parser.parse_args()
+    main(args.api_dir, args.users, args.posts, args.feed_clients, args.signin_clients, args.duration)
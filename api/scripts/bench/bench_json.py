@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Requests per second for a 100-post feed page, and the cost of encoding it.
+
+Serves GET /posts as a cursor page, an offset list and a compact page, each
+with 100 posts, through an in-process ASGI client, with the sync routes and
+then with ASYNC_DB (each in its own process). The post cache is left on as
+in production, so the numbers are dominated by validation and encoding
+rather than the query. Pass --api-dir to benchmark another checkout, e.g.
+`git worktree add /tmp/before <commit>` for before/after numbers.
+
+The last lines time encoding one page of PostResponse models with their
+compiled serializer (what FastJSONResponse does) and with orjson over
+model_dump().
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import common
+
+URLS = ("/posts?cursor=&limit=100", "/posts?limit=100", "/posts?cursor=&limit=100&compact=true")
+
+def run(async_db: bool, number: int) -> None:
+    common.prepare(async_db=str(async_db).lower(), metrics_enabled="false", compression_min_size=0)
+    import httpx
+    from app.main import app, init_database
+    init_database()
+    common.seed(users=20, posts=200, text=lambda i: f"post {i} " + "lorem ipsum " * 10)
+
+    async def measure():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for url in URLS:
+                response = await client.get(url)
+                assert response.status_code == 200, response.text
+                for _ in range(50):
+                    await client.get(url)
+                started = time.perf_counter()
+                for _ in range(number):
+                    await client.get(url)
+                rate = number / (time.perf_counter() - started)
+                print(f"{'async' if async_db else 'sync ':5s} {url:40s} {rate:8.0f} req/s  {len(response.content)} bytes", flush=True)
+
+    asyncio.run(measure())
+
+def encoding(number: int) -> None:
+    common.prepare()
+    import orjson
+    from pydantic import TypeAdapter
+    from typing import List
+    from app.main import init_database
+    from app.database import SessionLocal
+    from app.schemas.post import PostResponse
+    from app.services.post_service import PostService
+    init_database()
+    common.seed(users=20, posts=100, text=lambda i: f"post {i} " + "lorem ipsum " * 10)
+
+    db = SessionLocal()
+    page = [PostResponse.from_orm(post) for post in PostService._with_owner(db).limit(100)]
+    db.close()
+    adapter = TypeAdapter(List[PostResponse])
+    compiled = common.per_call(lambda: adapter.dump_json(page), number)
+    dumped = common.per_call(lambda: orjson.dumps([post.model_dump(mode="json") for post in page]), number)
+    print(f"encode 100 posts: compiled serializer {compiled * 1e6:.0f} us, orjson over model_dump {dumped * 1e6:.0f} us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=1000, help="timed requests per URL")
+    parser.add_argument("--api-dir", help="the api/ directory of another checkout to benchmark")
+    parser.add_argument("--mode", choices=["sync", "async", "encoding"], help="run one part in this process")
+    args = parser.parse_args()
+    if args.api_dir:
+        sys.path.insert(0, os.path.abspath(args.api_dir))
+    if args.mode == "encoding":
+        encoding(args.number)
+    elif args.mode:
+        run(args.mode == "async", args.number)
+    else:
+        extra = ["--api-dir", args.api_dir] if args.api_dir else []
+        for mode in ("sync", "async", "encoding"):
+            common.rerun("--mode", mode, "--number", str(args.number), *extra)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Size and query latency of the posts table with text UUID keys and with the compact 16-byte keys.
+
+Two SQLite databases receive the same --posts posts by --users users: one
+with the former schema, where ids and userId are 36-character strings, and
+one created by init_database() with the current CompactUUID columns. Both
+have the same indexes, so only key storage differs. Reported are the pages
+used by the table and each index (from dbstat) and the latency of a user's
+page and of a lookup by id.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timedelta
+import common
+
+LEGACY_SCHEMA = """
+CREATE TABLE posts (id VARCHAR PRIMARY KEY, userId VARCHAR, blobUrl VARCHAR, text TEXT, createdAt DATETIME, updatedAt DATETIME);
+CREATE INDEX ix_posts_createdAt_id ON posts (createdAt, id);
+CREATE INDEX ix_posts_userId_createdAt_id ON posts (userId, createdAt, id);
+CREATE INDEX ix_posts_blobUrl ON posts (blobUrl);
+"""
+
+def table_sizes(connection: sqlite3.Connection) -> dict:
+    names = [name for (name,) in connection.execute(
+        "SELECT name FROM sqlite_master WHERE tbl_name = 'posts' AND type IN ('table', 'index') ORDER BY type DESC, name"
+    )]
+    return {name: connection.execute("SELECT sum(pgsize) FROM dbstat WHERE name = ?", (name,)).fetchone()[0] for name in names}
+
+def per_query(connection: sqlite3.Connection, sql: str, args: list, number: int) -> float:
+    started = time.perf_counter()
+    for i in range(number):
+        connection.execute(sql, (args[i % len(args)],)).fetchall()
+    return (time.perf_counter() - started) / number
+
+def main(posts: int, users: int, number: int) -> None:
+    data_dir = common.prepare()
+    from app.main import init_database
+    init_database()
+    compact = sqlite3.connect(os.path.join(data_dir, "postly.db"))
+    # Only the posts table is compared, the search index is not
+    compact.execute("DROP TRIGGER IF EXISTS posts_fts_ai")
+    legacy = sqlite3.connect(os.path.join(data_dir, "legacy.db"))
+    legacy.executescript(LEGACY_SCHEMA)
+
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    started = datetime(2024, 1, 1)
+    post_ids = []
+    for offset in range(0, posts, 100000):
+        rows = [(uuid.uuid4(), user_ids[i % users], f"post {i}", (started + timedelta(seconds=i)).isoformat(" "))
+                for i in range(offset, min(offset + 100000, posts))]
+        post_ids.extend(row[0] for row in rows[::1000])
+        legacy.executemany("INSERT INTO posts (id, userId, text, createdAt) VALUES (?, ?, ?, ?)",
+                           [(str(a), str(b), text, created) for a, b, text, created in rows])
+        compact.executemany("INSERT INTO posts (id, userId, text, createdAt) VALUES (?, ?, ?, ?)",
+                            [(a.bytes, b.bytes, text, created) for a, b, text, created in rows])
+        legacy.commit()
+        compact.commit()
+
+    user_page = 'SELECT id FROM posts WHERE userId = ? ORDER BY createdAt DESC, id DESC LIMIT 20'
+    by_id = 'SELECT id, userId, text, createdAt FROM posts WHERE id = ?'
+    for label, connection, key in (("text keys", legacy, str), ("compact keys", compact, lambda value: value.bytes)):
+        sizes = table_sizes(connection)
+        print(f"{label}: {sum(sizes.values()) / 1024 / 1024:.1f} MB total, "
+              + ", ".join(f"{name} {size / 1024 / 1024:.1f} MB" for name, size in sizes.items()))
+        user_args = [key(user_id) for user_id in user_ids[:100]]
+        post_args = [key(post_id) for post_id in post_ids]
+        print(f"  user page {per_query(connection, user_page, user_args, number) * 1e6:.1f} us, "
+              f"by id {per_query(connection, by_id, post_args, number) * 1e6:.1f} us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=200000, help="posts in each database (10M needs several GB)")
+    parser.add_argument("--users", type=int, default=1000, help="users the posts are spread over")
+    parser.add_argument("--number", type=int, default=2000, help="timed queries per case")
+    args = parser.parse_args()
+    main(args.posts, args.users, args.number)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Bytes transferred and latency of GET /posts/media for first, repeat and partial fetches.
+
+A video of --size MB is uploaded through the API, then fetched in-process:
+a full download, revalidations with If-None-Match and If-Modified-Since
+(304, no body), single ranges of --chunk KB (206) and a multi-range request.
+The last lines compare a simulated scrub through the video, --seeks jumps
+each fetching one range, with downloading the whole file at every seek as
+clients did before range support.
+"""
+
+import argparse
+import io
+import os
+import random
+import common
+
+def report(label: str, client, path: str, headers: dict, number: int) -> int:
+    response = client.get(path, headers=headers)
+    median, p95 = common.latencies(lambda: client.get(path, headers=headers), number)
+    print(f"{label:22s} {response.status_code}  {len(response.content):>10d} bytes  "
+          f"median {median * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms")
+    return len(response.content)
+
+def main(size_mb: float, chunk_kb: int, seeks: int, number: int) -> None:
+    common.prepare()
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        user_ids = common.seed(users=1, posts=0)
+        headers = common.auth_headers(user_ids[0])
+        post_id = client.post("/posts", json={"text": "video"}, headers=headers).json()["id"]
+        data = os.urandom(int(size_mb * 1024 * 1024))
+        uploaded = client.post(f"/posts/{post_id}/upload", files={"file": ("clip.mp4", io.BytesIO(data), "video/mp4")}, headers=headers)
+        path = "/posts/media/" + uploaded.json()["blobUrl"].split("/posts/media/")[1]
+
+        first = client.get(path)
+        chunk = chunk_kb * 1024
+        full = report("full", client, path, {}, number)
+        report("If-None-Match", client, path, {"If-None-Match": first.headers["etag"]}, number)
+        report("If-Modified-Since", client, path, {"If-Modified-Since": first.headers["last-modified"]}, number)
+        report("Range (start)", client, path, {"Range": f"bytes=0-{chunk - 1}"}, number)
+        middle = len(data) // 2
+        report("Range (middle)", client, path, {"Range": f"bytes={middle}-{middle + chunk - 1}"}, number)
+        report("Range (2 parts)", client, path, {"Range": f"bytes=0-{chunk - 1},{middle}-{middle + chunk - 1}"}, number)
+
+        offsets = [random.randrange(0, len(data) - chunk) for _ in range(seeks)]
+        ranged = sum(len(client.get(path, headers={"Range": f"bytes={offset}-{offset + chunk - 1}"}).content) for offset in offsets)
+        print(f"scrub, {seeks} seeks: {ranged} bytes with ranges vs {full * seeks} bytes refetching the file")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=float, default=5, help="file size in MB (at most MAX_FILE_SIZE)")
+    parser.add_argument("--chunk", type=int, default=256, help="range size in KB")
+    parser.add_argument("--seeks", type=int, default=20, help="seeks in the simulated scrub")
+    parser.add_argument("--number", type=int, default=200, help="timed requests per case")
+    args = parser.parse_args()
+    main(args.size, args.chunk, args.seeks, args.number)
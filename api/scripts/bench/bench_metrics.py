@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Per-request cost of the /metrics instrumentation, with METRICS_ENABLED on and off.
+
+Each setting runs in its own process, since the middleware and engine hooks
+are installed when the app is built. Requests go through an in-process
+client to /health (middleware only) and GET /posts?limit=10 (middleware and
+SQL hooks, with the post cache off so every request queries the database).
+Reported times are the best mean of --repeat rounds of --number requests.
+"""
+
+import argparse
+import common
+
+def run(enabled: bool, number: int, repeat: int) -> None:
+    common.prepare(metrics_enabled=str(enabled).lower(), post_cache_backend="none", compression_min_size=0)
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        common.seed(users=100, posts=1000)
+        for path in ("/health", "/posts?limit=10"):
+            seconds = common.per_call(lambda: client.get(path), number, repeat, warmup=200)
+            print(f"metrics {'on ' if enabled else 'off'}  {path:16s} {seconds * 1e6:8.1f} us/request", flush=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="requests per round")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds, the fastest is reported")
+    parser.add_argument("--enabled", choices=["on", "off"], help="measure one setting in this process")
+    args = parser.parse_args()
+    if args.enabled:
+        run(args.enabled == "on", args.number, args.repeat)
+    else:
+        for enabled in ("off", "on"):
+            common.rerun("--enabled", enabled, "--number", str(args.number), "--repeat", str(args.repeat))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Write and read throughput of the API under concurrent uvicorn workers, with SQLite's stock pragmas and with the tuned ones.
+
+"stock" is what connections got before the pragmas were configurable:
+rollback journal, synchronous=FULL, a 2MB cache, no mmap and the 5s busy
+timeout that Python's sqlite3 module sets. "tuned" is the current default
+settings (WAL, synchronous=NORMAL, larger cache and mmap). Each runs in a
+fresh process on its own database, started through run.py with --workers
+workers, and is loaded with POST /posts and then GET /posts from
+--concurrency clients. Errors are mostly "database is locked" failures.
+"""
+
+import argparse
+import asyncio
+import common
+
+CONFIGS = {
+    "stock": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_BUSY_TIMEOUT": "5000",
+        "SQLITE_CACHE_SIZE": "-2000",
+        "SQLITE_MMAP_SIZE": "0",
+    },
+    "tuned": {},
+}
+
+def run_config(name: str, workers: int, concurrency: int, duration: float, posts: int) -> None:
+    # Reads go to the database rather than the response cache
+    common.prepare(post_cache_backend="none", **CONFIGS[name])
+    from app.main import init_database
+    init_database()
+    user_ids = common.seed(users=100, posts=posts)
+    headers = common.auth_headers(user_ids[0])
+
+    with common.server(workers=workers) as base_url:
+        write = lambda client: client.post("/posts", json={"text": "benchmark post"}, headers=headers)
+        read = lambda client: client.get("/posts", params={"limit": 20})
+        for label, request in (("write", write), ("read", read)):
+            rate, ok, errors = asyncio.run(common.load(base_url, request, concurrency, duration))
+            print(f"{name:6s} {label:6s} workers={workers} c={concurrency:<4d} {rate:8.0f} req/s  {ok} ok, {errors} errors", flush=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per workload")
+    parser.add_argument("--posts", type=int, default=10000, help="posts seeded before the run")
+    parser.add_argument("--config", choices=sorted(CONFIGS), help="run one configuration in this process")
+    args = parser.parse_args()
+    if args.config:
+        run_config(args.config, args.workers, args.concurrency, args.duration, args.posts)
+    else:
+        for name in CONFIGS:
+            common.rerun("--config", name, "--workers", str(args.workers), "--concurrency", str(args.concurrency),
+                         "--duration", str(args.duration), "--posts", str(args.posts))
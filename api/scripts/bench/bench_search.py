@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Full-text search latency over a generated corpus as it grows, compared with a LIKE scan.
+
+Posts are 8 to 20 words drawn from a --vocabulary word list with Zipf
+frequencies, so queries cover common, mid-frequency and rare terms. The
+corpus grows through each of --sizes, and at every size the script times
+SearchService.search (the query behind GET /posts/search, including loading
+the posts) for several queries and a second page. The last column is the
+`LIKE '%term%'` query a search without the index would run.
+"""
+
+import argparse
+import random
+import common
+
+def main(sizes, vocabulary_size: int, number: int) -> None:
+    # Bulk seeding: durability does not matter for a throwaway database, and
+    # the batch inserts and LIKE scans would all be logged as slow queries
+    common.prepare(sqlite_synchronous="OFF", slow_query_ms=0)
+    from sqlalchemy import select
+    from app.main import init_database
+    from app.database import SessionLocal
+    from app.models.post import Post
+    from app.services.search_service import SearchService
+    init_database()
+
+    generator = random.Random(42)
+    words = [f"w{rank}x" for rank in range(vocabulary_size)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary_size)]
+    text = lambda i: " ".join(generator.choices(words, weights, k=generator.randint(8, 20)))
+    user_ids = common.seed_users(1000)
+    queries = {
+        "common": words[0],
+        "mid": words[100],
+        "rare": words[vocabulary_size * 3 // 4],
+        "two terms": f"{words[5]} {words[50]}",
+        "common, by user": words[0],
+    }
+
+    print(f"{'posts':>9s} " + " ".join(f"{name:>16s}" for name in [*queries, "common, page 2", "LIKE rare"]) + "   (median ms)")
+    seeded = 0
+    db = SessionLocal()
+    for size in sizes:
+        common.seed_posts(user_ids, size, start=seeded, text=text)
+        seeded = size
+        timings = []
+        for name, query in queries.items():
+            user_id = user_ids[0] if name.endswith("by user") else None
+            timings.append(common.latencies(lambda: SearchService.search(db, query, 20, None, user_id), number)[0])
+        cursor = SearchService.search(db, queries["common"], 20)[1]
+        timings.append(common.latencies(lambda: SearchService.search(db, queries["common"], 20, cursor), number)[0])
+        like = select(Post.id).where(Post.text.like(f"%{queries['rare']}%")).order_by(Post.createdAt.desc()).limit(20)
+        timings.append(common.latencies(lambda: db.execute(like).all(), max(number // 10, 3))[0])
+        db.rollback()
+        print(f"{size:9d} " + " ".join(f"{seconds * 1000:16.2f}" for seconds in timings), flush=True)
+    db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated corpus sizes, ascending")
+    parser.add_argument("--vocabulary", type=int, default=20000, help="distinct words in the corpus")
+    parser.add_argument("--number", type=int, default=50, help="timed queries per case")
+    args = parser.parse_args()
+    main([int(size) for size in args.sizes.split(",")], args.vocabulary, args.number)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Import time of app.main and per-worker startup phases under run.py's production mode.
+
+First app.main is imported in --runs fresh interpreters, timing the import
+alone. Then run.py starts --workers workers on a seeded database; the script
+reports how long the server took to answer /health, and scrapes /metrics
+until it has each worker's postly_worker_startup_seconds: seconds from the
+app's import to the end of the import, to the end of startup ("ready"), and
+to its first request.
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+import common
+
+PHASES = ("import", "ready", "first_request")
+PHASE = re.compile(r'^postly_worker_startup_seconds\{phase="(\w+)"\} ([0-9.eE+-]+)$', re.MULTILINE)
+
+def import_times(runs: int):
+    code = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+    return [float(subprocess.run([sys.executable, "-c", code], cwd=common.API_DIR, check=True,
+                                 capture_output=True, text=True).stdout.split()[-1]) for _ in range(runs)]
+
+def main(workers: int, runs: int, posts: int) -> None:
+    common.prepare()
+    from app.main import init_database
+    init_database()
+    common.seed(users=100, posts=posts)
+
+    times = import_times(runs)
+    print(f"import app.main: median {statistics.median(times):.3f}s, min {min(times):.3f}s over {runs} runs")
+
+    import httpx
+    started = time.monotonic()
+    with common.server(workers=workers) as base_url:
+        print(f"{workers} workers answering /health {time.monotonic() - started:.2f}s after launch")
+        seen = set()
+        for _ in range(50 * workers):
+            # A new connection each time, so the scrapes are spread over the workers
+            phases = dict(PHASE.findall(httpx.get(f"{base_url}/metrics").text))
+            seen.add(tuple(float(phases.get(phase, "nan")) for phase in PHASES))
+            if len(seen) >= workers:
+                break
+        for i, phases in enumerate(sorted(seen)):
+            print(f"worker {i}: " + "  ".join(f"{phase} {seconds:.3f}s" for phase, seconds in zip(PHASES, phases)))
+        if len(seen) < workers:
+            print(f"({workers - len(seen)} workers were not reached)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2, help="worker processes")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters timing the import")
+    parser.add_argument("--posts", type=int, default=10000, help="posts seeded before startup")
+    args = parser.parse_args()
+    main(args.workers, args.runs, args.posts)
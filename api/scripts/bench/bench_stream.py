@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Server memory and CPU for idle live stream connections, and how fast a new post reaches all of them.
+
+Starts a one-worker server through run.py and opens --connections SSE
+connections to GET /posts/stream from this process. Reported are the
+server's resident memory before and after connecting, and its CPU use while
+the connections idle for --idle seconds (heartbeats every --heartbeat
+seconds included). Then --posts posts are created one at a time, each
+timed from POST /posts until every connection has received its event.
+Server figures come from /proc, so this runs on Linux only.
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import time
+from urllib.parse import urlsplit
+import common
+
+def server_pids():
+    """This script's descendant processes, which are the server"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    parents[int(entry)] = int(stat.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                pass
+    pids, found = {os.getpid()}, True
+    while found:
+        children = {pid for pid, parent in parents.items() if parent in pids} - pids
+        found = bool(children)
+        pids |= children
+    return pids - {os.getpid()}
+
+def server_usage():
+    """(resident MB, CPU seconds) summed over the server processes"""
+    rss = cpu = 0.0
+    for pid in server_pids():
+        try:
+            with open(f"/proc/{pid}/stat") as stat:
+                fields = stat.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        rss += int(fields[21]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    return rss, cpu
+
+class Listener:
+    """Counts the post events received by every connection"""
+
+    def __init__(self, connections: int):
+        self.connections = connections
+        self.received = 0
+        self.everyone = asyncio.Event()
+
+    async def connect(self, host: str, port: int):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(f"GET /posts/stream HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+        await writer.drain()
+        return reader, writer
+
+    async def listen(self, reader) -> None:
+        # Each event arrives in one chunk, so a data line is never split
+        while line := await reader.readline():
+            if line.startswith(b"data: ") and b'"type":"created"' in line:
+                self.received += 1
+                if self.received == self.connections:
+                    self.everyone.set()
+
+async def run(base_url: str, headers: dict, connections: int, idle: float, posts: int) -> None:
+    import httpx
+
+    url = urlsplit(base_url)
+    listener = Listener(connections)
+    rss_before, _ = server_usage()
+    streams = []
+    for offset in range(0, connections, 500):
+        # In batches, to stay within the listen backlog
+        streams.extend(await asyncio.gather(*(listener.connect(url.hostname, url.port)
+                                              for _ in range(offset, min(offset + 500, connections)))))
+    tasks = [asyncio.create_task(listener.listen(reader)) for reader, _ in streams]
+    await asyncio.sleep(2)
+    rss_after, cpu_before = server_usage()
+    print(f"{connections} connections: server RSS {rss_before:.0f} MB before, {rss_after:.0f} MB after, "
+          f"{(rss_after - rss_before) * 1024 / connections:.1f} KB each", flush=True)
+
+    started = time.monotonic()
+    await asyncio.sleep(idle)
+    _, cpu_after = server_usage()
+    print(f"idle: server CPU {(cpu_after - cpu_before) / (time.monotonic() - started) * 100:.1f}% of a core", flush=True)
+
+    fanout = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        for _ in range(posts):
+            listener.received = 0
+            listener.everyone.clear()
+            sent = time.perf_counter()
+            response = await client.post("/posts", json={"text": "benchmark post"}, headers=headers)
+            response.raise_for_status()
+            await asyncio.wait_for(listener.everyone.wait(), 60)
+            fanout.append(time.perf_counter() - sent)
+    fanout.sort()
+    print(f"post to all connections: median {statistics.median(fanout) * 1000:.0f} ms, "
+          f"max {fanout[-1] * 1000:.0f} ms over {posts} posts")
+
+    for task in tasks:
+        task.cancel()
+    for _, writer in streams:
+        writer.close()
+
+def main(connections: int, idle: float, posts: int, heartbeat: int) -> None:
+    # Each connection needs a descriptor here and one in the server, which inherits the limit
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = connections + 1000
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted if hard == resource.RLIM_INFINITY else min(wanted, hard), hard))
+    common.prepare(post_stream_heartbeat=heartbeat, slow_query_ms=0)
+    from app.main import init_database
+    init_database()
+    user_ids = common.seed(users=10, posts=100)
+    headers = common.auth_headers(user_ids[0])
+
+    with common.server(workers=1) as base_url:
+        asyncio.run(run(base_url, headers, connections, idle, posts))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--connections", type=int, default=10000, help="idle SSE connections")
+    parser.add_argument("--idle", type=float, default=30, help="seconds the connections idle while CPU is measured")
+    parser.add_argument("--posts", type=int, default=20, help="posts timed until every connection has them")
+    parser.add_argument("--heartbeat", type=int, default=15, help="POST_STREAM_HEARTBEAT for the server")
+    args = parser.parse_args()
+    main(args.connections, args.idle, args.posts, args.heartbeat)
@@ -0,0 +1,200 @@
+"""
+Shared setup for the benchmark scripts in this directory.
+
+Settings are read when app.config is imported, so a script calls prepare()
+before importing anything from app: it points the API at an empty SQLite
+database in a temporary directory that is removed on exit.
+"""
+
+import asyncio
+import atexit
+import contextlib
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+SEED_START = datetime(2024, 1, 1)
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, API_DIR)
+
+def prepare(**env) -> str:
+    """Use a fresh database and upload dir, returning their directory.
+
+    Keyword arguments are set as environment variables (upper-cased), so
+    they override .env like any deployment setting.
+    """
+    data_dir = tempfile.mkdtemp(prefix="postly-bench-")
+    atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+    os.environ["DATABASE_URL"] = f"sqlite:///{data_dir}/postly.db"
+    os.environ["UPLOAD_DIR"] = os.path.join(data_dir, "uploads")
+    os.environ.update({key.upper(): str(value) for key, value in env.items()})
+    return data_dir
+
+def seed_users(count: int) -> List[str]:
+    """Insert users straight into the database, returning their ids"""
+    from sqlalchemy import insert
+    from app.database import engine
+    from app.models.user import User
+
+    user_ids = [str(uuid.uuid4()) for _ in range(count)]
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {"id": user_id, "email": f"bench{i}@example.com", "firstName": "Bench", "lastName": str(i),
+             "password": "", "birthday": SEED_START, "creationDate": SEED_START}
+            for i, user_id in enumerate(user_ids)
+        ])
+    return user_ids
+
+def seed_posts(user_ids: List[str], stop: int, start: int = 0, text: Callable[[int], str] = lambda i: f"post {i}",
+               batch_size: int = 10000) -> None:
+    """Insert posts number `start` to `stop`, spread round-robin over the users and one second apart.
+
+    Much faster than the API; for SQLite the search triggers still run.
+    """
+    from sqlalchemy import insert
+    from app.database import engine
+    from app.models.post import Post
+
+    for offset in range(start, stop, batch_size):
+        with engine.begin() as connection:
+            connection.execute(insert(Post), [
+                {"id": str(uuid.uuid4()), "userId": user_ids[i % len(user_ids)], "text": text(i),
+                 "createdAt": SEED_START + timedelta(seconds=i)}
+                for i in range(offset, min(offset + batch_size, stop))
+            ])
+
+def seed(users: int, posts: int, text: Callable[[int], str] = lambda i: f"post {i}") -> List[str]:
+    """Insert users and posts, returning the user ids"""
+    user_ids = seed_users(users)
+    seed_posts(user_ids, posts, text=text)
+    return user_ids
+
+def auth_headers(user_id: str) -> Dict[str, str]:
+    """Bearer token for a seeded user, issued directly so no bcrypt hash is needed"""
+    from app.utils.security import create_access_token
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': user_id})}"}
+
+def per_call(fn: Callable[[], object], number: int, repeat: int = 5, warmup: int = 50) -> float:
+    """Seconds per call, the best mean over `repeat` rounds of `number` calls"""
+    for _ in range(warmup):
+        fn()
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - started) / number)
+    return min(rounds)
+
+def latencies(fn: Callable[[], object], number: int, warmup: int = 5) -> Tuple[float, float]:
+    """Median and 95th percentile seconds of `number` timed calls"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(number):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@contextlib.contextmanager
+def server(workers: int = 1, **env) -> Iterator[str]:
+    """Run the API through run.py's production mode on the prepared database, yielding its base URL.
+
+    That mode sets up the schema once and then starts `workers` uvicorn
+    worker processes. Keyword arguments are extra environment variables.
+    """
+    port = free_port()
+    process_env = dict(ENVIRONMENT="production", HOST="127.0.0.1", PORT=str(port), WORKERS=str(workers), MAX_REQUESTS="0")
+    process_env.update(env)
+    with _serve([sys.executable, "run.py"], API_DIR, port, process_env) as base_url:
+        yield base_url
+
+@contextlib.contextmanager
+def uvicorn_server(api_dir: str = API_DIR, **env) -> Iterator[str]:
+    """Run app.main:app from `api_dir` in one plain uvicorn process, yielding its base URL.
+
+    Unlike server(), this also works for checkouts older than run.py's
+    production mode, for before/after numbers.
+    """
+    port = free_port()
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)]
+    with _serve(command, api_dir, port, env) as base_url:
+        yield base_url
+
+@contextlib.contextmanager
+def _serve(command: List[str], cwd: str, port: int, env: dict) -> Iterator[str]:
+    import httpx
+
+    process_env = dict(os.environ)
+    process_env.update({key.upper(): str(value) for key, value in env.items()})
+    process = subprocess.Popen(command, cwd=cwd, env=process_env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited: {process.stderr.read().decode()[-2000:]}")
+            try:
+                if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("Server did not start within 60s")
+            time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+async def load(base_url: str, request: Callable[["httpx.AsyncClient"], Awaitable["httpx.Response"]],
+               concurrency: int, duration: float) -> Tuple[float, int, int]:
+    """Send `request` from `concurrency` clients for `duration` seconds: (requests/s, ok, errors)"""
+    import httpx
+
+    ok = errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        stop = time.monotonic() + duration
+
+        async def worker():
+            nonlocal ok, errors
+            while time.monotonic() < stop:
+                try:
+                    response = await request(client)
+                    if response.status_code < 400:
+                        ok += 1
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return ok / (time.monotonic() - started), ok, errors
+
+def rerun(*args: str, **env) -> None:
+    """Run this script again in a fresh process, for settings that are only read at import"""
+    process_env = dict(os.environ)
+    process_env.update({key.upper(): str(value) for key, value in env.items()})
+    subprocess.run([sys.executable, os.path.abspath(sys.argv[0]), *args], env=process_env, check=True)
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import uuid
+import pytest
+
+# Point the app at a throwaway database before app.config is imported
+_data_dir = tempfile.mkdtemp(prefix="postly-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_data_dir}/postly.db"
+os.environ["UPLOAD_DIR"] = os.path.join(_data_dir, "uploads")
+# Cached responses would hide the queries under test
+os.environ["POST_CACHE_BACKEND"] = "none"
+# The lowest bcrypt cost, so sign-ins in tests are fast
+os.environ["BCRYPT_ROUNDS"] = "4"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+@pytest.fixture(scope="session")
+def client():
+    # Entering the client runs the lifespan, which creates the schema
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def make_user(client):
+    """Insert a user, returning its id and bearer headers (no bcrypt hash needed)"""
+    from datetime import datetime
+    from app.database import SessionLocal
+    from app.models.user import User
+    from app.utils.security import create_access_token
+
+    def make(email: str = None):
+        db = SessionLocal()
+        user = User(email=email or f"{uuid.uuid4().hex}@example.com", firstName="Test", lastName="User",
+                    password="x", birthday=datetime(2000, 1, 1))
+        db.add(user)
+        db.commit()
+        user_id = str(user.id)
+        db.close()
+        return user_id, {"Authorization": f"Bearer {create_access_token(data={'sub': user_id})}"}
+    return make
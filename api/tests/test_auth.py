@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi import HTTPException
+from passlib.hash import bcrypt
+from app.database import SessionLocal
+from app.models.user import User
+from app.utils.hashing import PasswordHasher, password_hasher
+
+def signup(client, email: str, password: str = "secret-password"):
+    response = client.post("/auth/signup", json={
+        "email": email, "password": password, "firstName": "Test", "lastName": "User", "birthday": "2000-01-01T00:00:00"
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+def stored_hash(user_id: str) -> str:
+    db = SessionLocal()
+    try:
+        return db.get(User, user_id).password
+    finally:
+        db.close()
+
+def test_signin_rehashes_passwords_made_with_another_cost(client):
+    user_id = signup(client, "rehash@example.com")
+    assert bcrypt.from_string(stored_hash(user_id)).rounds == 4
+
+    # As if the hash was made before BCRYPT_ROUNDS changed
+    db = SessionLocal()
+    db.get(User, user_id).password = bcrypt.using(rounds=5).hash("secret-password")
+    db.commit()
+    db.close()
+
+    response = client.post("/auth/signin", json={"email": "rehash@example.com", "password": "secret-password"})
+    assert response.status_code == 200, response.text
+    assert bcrypt.from_string(stored_hash(user_id)).rounds == 4
+    # A wrong password neither signs in nor rewrites the hash
+    rehashed = stored_hash(user_id)
+    response = client.post("/auth/signin", json={"email": "rehash@example.com", "password": "wrong"})
+    assert response.status_code == 401
+    assert stored_hash(user_id) == rehashed
+
+def test_signin_returns_503_when_the_hasher_is_saturated(client, monkeypatch):
+    signup(client, "saturated@example.com")
+    monkeypatch.setattr(password_hasher, "capacity", 0)
+    response = client.post("/auth/signin", json={"email": "saturated@example.com", "password": "secret-password"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(password_hasher.retry_after)
+
+def test_hasher_rejects_work_beyond_workers_and_queue():
+    hasher = PasswordHasher(workers=2, queue_limit=1, retry_after=3)
+    hasher._executor = ThreadPoolExecutor(max_workers=2)
+    release = threading.Event()
+    try:
+        futures = [hasher._submit(release.wait) for _ in range(3)]
+        with pytest.raises(HTTPException) as raised:
+            hasher._submit(release.wait)
+        assert raised.value.status_code == 503
+        assert raised.value.headers == {"Retry-After": "3"}
+
+    finally:
+        release.set()
+        hasher.shutdown()
+    # Finished hashes free their slots
+    assert all(future.done() for future in futures)
+    assert hasher._in_flight == 0
@@ -0,0 +1,32 @@
+import pytest
+from app.config import settings
+from app.services.post_cache import post_cache
+from app.utils.cache import InMemoryLRUBackend
+
+@pytest.fixture
+def posts(client, make_user):
+    _, headers = make_user()
+    response = client.post("/posts/batch", json={"posts": [{"text": f"batch {i}"} for i in range(3)]}, headers=headers)
+    assert response.status_code == 200, response.text
+    return [post["id"] for post in response.json()]
+
+def test_get_by_ids_keeps_request_order(client, posts):
+    ids = [posts[2], "missing", posts[0]]
+    response = client.get("/posts", params={"ids": ",".join(ids)})
+    assert [post["id"] for post in response.json()] == [posts[2], posts[0]]
+
+@pytest.mark.parametrize("with_cache", [False, True])
+def test_batch_limits_apply_even_when_every_post_is_cached(client, posts, monkeypatch, with_cache):
+    if with_cache:
+        monkeypatch.setattr(post_cache, "backend", InMemoryLRUBackend(100))
+    monkeypatch.setattr(settings, "batch_max_ids", 2)
+    assert client.get("/posts", params={"ids": ",".join(posts[:2])}).status_code == 200
+    # Both posts are now cached, yet a third id is still one too many
+    assert client.get("/posts", params={"ids": ",".join(posts[:2] + posts[:1])}).status_code == 400
+    assert client.get("/posts", params={"ids": ""}).status_code == 400
+
+def test_batch_create_limit(client, make_user, monkeypatch):
+    _, headers = make_user()
+    monkeypatch.setattr(settings, "batch_max_posts", 2)
+    response = client.post("/posts/batch", json={"posts": [{"text": "x"}] * 3}, headers=headers)
+    assert response.status_code == 400
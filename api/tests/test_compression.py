@@ -0,0 +1,39 @@
+import random
+import string
+
+def upload_text(client, make_user, size: int):
+    """Create a post with a text attachment of `size` random bytes, returning its media path and content"""
+    _, headers = make_user()
+    post = client.post("/posts", json={"text": "with attachment"}, headers=headers).json()
+    generator = random.Random(size)
+    # Random letters compress, but not into a single repeated block
+    content = "".join(generator.choice(string.ascii_lowercase + " \n") for _ in range(size)).encode()
+    response = client.post(f"/posts/{post['id']}/upload", files={"file": ("notes.txt", content, "text/plain")}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["blobUrl"].split("/posts/media/", 1)[1], content
+
+def test_range_requests_are_not_compressed(client, make_user):
+    path, content = upload_text(client, make_user, 18890)
+    response = client.get(f"/posts/media/{path}", headers={"Range": "bytes=100-2099", "Accept-Encoding": "gzip"})
+    assert response.status_code == 206
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-range"] == f"bytes 100-2099/{len(content)}"
+    assert response.headers["content-length"] == "2000"
+    assert response.content == content[100:2100]
+
+def test_compressed_media_gets_a_weak_etag(client, make_user):
+    path, content = upload_text(client, make_user, 18890)
+    plain = client.get(f"/posts/media/{path}", headers={"Accept-Encoding": "identity"})
+    assert plain.headers["etag"].startswith('"')
+    assert plain.headers["accept-ranges"] == "bytes"
+
+    encoded = client.get(f"/posts/media/{path}", headers={"Accept-Encoding": "gzip"})
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.headers["etag"] == "W/" + plain.headers["etag"]
+    # The compressed body cannot be fetched in ranges
+    assert "accept-ranges" not in encoded.headers
+    assert encoded.content == content
+
+    # The weak tag still revalidates
+    response = client.get(f"/posts/media/{path}", headers={"Accept-Encoding": "gzip", "If-None-Match": encoded.headers["etag"]})
+    assert response.status_code == 304
@@ -0,0 +1,58 @@
+import threading
+import pytest
+from app.config import settings
+from app.database import SessionLocal
+from app.models.post import Post
+from app.models.user import User
+from app.schemas.post import PostCreate
+from app.services.post_group_commit import post_group_commit
+from app.services.post_service import PostService
+
+@pytest.fixture
+def group_commit(client, monkeypatch):
+    monkeypatch.setattr(settings, "post_group_commit", True)
+    # Long enough that the posts below share transactions
+    monkeypatch.setattr(post_group_commit, "window", 0.2)
+    yield post_group_commit
+    post_group_commit.shutdown()
+
+def test_concurrent_creates_are_committed_together(group_commit, make_user):
+    user_id, _ = make_user()
+    db = SessionLocal()
+    user = db.get(User, user_id)
+    db.expunge(user)
+    db.close()
+    rows = PostService._new_post_rows([PostCreate(text=f"grouped {i}") for i in range(10)], user)
+    futures = [group_commit.submit(row) for row in rows]
+    assert [future.result(10).id for future in futures] == [row["id"] for row in rows]
+    db = SessionLocal()
+    assert db.query(Post).filter(Post.userId == user_id).count() == 10
+    db.close()
+
+def test_a_failing_post_does_not_fail_the_rest_of_its_batch(group_commit, make_user):
+    user_id, headers = make_user()
+    db = SessionLocal()
+    user = db.get(User, user_id)
+    db.expunge(user)
+    db.close()
+    rows = PostService._new_post_rows([PostCreate(text=f"batch {i}") for i in range(4)], user)
+    rows[2]["id"] = rows[1]["id"]  # the same primary key twice
+    futures = [group_commit.submit(row) for row in rows]
+    results = [future.exception(10) for future in futures]
+    assert [exc is None for exc in results] == [True, True, False, True]
+
+def test_post_route_waits_for_the_group_commit(group_commit, client, make_user):
+    _, headers = make_user()
+    created = []
+
+    def create(i):
+        created.append(client.post("/posts", json={"text": f"route {i}"}, headers=headers))
+
+    threads = [threading.Thread(target=create, args=(i,)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [response.status_code for response in created] == [200] * 5
+    for response in created:
+        assert client.get(f"/posts/{response.json()['id']}").json()["text"] == response.json()["text"]
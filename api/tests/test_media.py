@@ -0,0 +1,79 @@
+import os
+import time
+from app.config import settings
+from app.database import SessionLocal
+from app.models.media import MediaBlob
+from app.services.media_storage import MediaStorage, StagedMedia
+
+def upload(client, headers, content: bytes, filename: str = "photo.jpg"):
+    post = client.post("/posts", json={"text": "with media"}, headers=headers).json()
+    response = client.post(f"/posts/{post['id']}/upload", files={"file": (filename, content, "image/jpeg")}, headers=headers)
+    assert response.status_code == 200, response.text
+    return post["id"], response.json()["blobUrl"].split("/posts/media/", 1)[1]
+
+def blob(path: str):
+    db = SessionLocal()
+    try:
+        row = db.get(MediaBlob, path)
+        return row.refCount if row else None
+    finally:
+        db.close()
+
+def test_identical_uploads_share_one_counted_file(client, make_user):
+    _, headers = make_user()
+    content = os.urandom(4096)
+    first_post, path = upload(client, headers, content)
+    second_post, second_path = upload(client, headers, content, "copy.jpg")
+    assert second_path == path
+    assert blob(path) == 2
+    with open(os.path.join(settings.upload_dir, path), "rb") as stored:
+        assert stored.read() == content
+
+    client.delete(f"/posts/{first_post}", headers=headers)
+    assert blob(path) == 1
+    client.delete(f"/posts/{second_post}", headers=headers)
+    assert blob(path) is None
+    # The janitor removes the file once the last delete has committed
+    deadline = time.monotonic() + 10
+    while os.path.exists(os.path.join(settings.upload_dir, path)) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not os.path.exists(os.path.join(settings.upload_dir, path))
+
+def test_acquire_counts_a_blob_inserted_by_a_concurrent_upload(client):
+    """Two uploads of a new file may both find no row; the later insert must count, not collide"""
+    staged = StagedMedia(path=f"ab/cd/{'ab' * 32}.jpg", size=10, temp_path="")
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        first.execute(MediaStorage.acquire_stmt(staged))
+        first.commit()
+        second.execute(MediaStorage.acquire_stmt(staged))
+        second.commit()
+    finally:
+        first.close()
+        second.close()
+    assert blob(staged.path) == 2
+
+def test_media_is_served_with_validators_and_ranges(client, make_user):
+    _, headers = make_user()
+    content = os.urandom(10000)
+    _, path = upload(client, headers, content)
+
+    full = client.get(f"/posts/media/{path}")
+    assert full.status_code == 200 and full.content == content
+    assert full.headers["cache-control"] == "public, max-age=31536000, immutable"
+    etag = full.headers["etag"]
+
+    assert client.get(f"/posts/media/{path}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/posts/media/{path}", headers={"If-Modified-Since": full.headers["last-modified"]}).status_code == 304
+
+    partial = client.get(f"/posts/media/{path}", headers={"Range": "bytes=-100"})
+    assert partial.status_code == 206
+    assert partial.content == content[-100:]
+    assert partial.headers["content-range"] == f"bytes 9900-9999/{len(content)}"
+    # A stale If-Range gets the whole file instead of a range of something else
+    stale = client.get(f"/posts/media/{path}", headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert stale.status_code == 200 and stale.content == content
+    assert client.get(f"/posts/media/{path}", headers={"Range": "bytes=20000-"}).status_code == 416
+
+def test_media_outside_the_upload_dir_is_not_served(client):
+    assert client.get("/posts/media/%2e%2e/app/config.py").status_code == 404
@@ -0,0 +1,56 @@
+from datetime import datetime
+import pytest
+from app.database import SessionLocal
+from app.models.post import Post
+
+@pytest.fixture(scope="module")
+def author(client):
+    """A user with 25 posts, several of them sharing a timestamp"""
+    from app.models.user import User
+    db = SessionLocal()
+    user = User(email="paged@example.com", firstName="Paged", lastName="User", password="x", birthday=datetime(2000, 1, 1))
+    db.add(user)
+    db.flush()
+    for i in range(25):
+        db.add(Post(userId=user.id, text=f"page {i}", createdAt=datetime(2023, 1, 1, 0, 0, i // 3)))
+    db.commit()
+    user_id = str(user.id)
+    db.close()
+    return user_id
+
+def walk(client, url: str, limit: int) -> list:
+    """Follow next_cursor from the first page to the last, collecting the posts"""
+    items, cursor, pages = [], "", 0
+    while cursor is not None:
+        body = client.get(url, params={"cursor": cursor, "limit": limit}).json()
+        items.extend(body["items"])
+        cursor = body["next_cursor"]
+        pages += 1
+        assert pages < 100
+    return items
+
+@pytest.mark.parametrize("limit", [1, 4, 25, 50])
+def test_cursor_pages_cover_every_post_once_newest_first(client, author, limit):
+    items = walk(client, f"/posts/users/{author}", limit)
+    assert len(items) == 25
+    assert len({item["id"] for item in items}) == 25
+    keys = [(item["createdAt"], item["id"]) for item in items]
+    assert keys == sorted(keys, reverse=True)
+
+def test_cursor_pages_match_offset_pages(client, author):
+    offset = client.get(f"/posts/users/{author}", params={"skip": 0, "limit": 25}).json()
+    assert [item["id"] for item in walk(client, f"/posts/users/{author}", 7)] == [item["id"] for item in offset]
+
+def test_posts_created_after_the_first_page_do_not_shift_later_pages(client, author):
+    first = client.get(f"/posts/users/{author}", params={"cursor": "", "limit": 5}).json()
+    db = SessionLocal()
+    db.add(Post(userId=author, text="newer", createdAt=datetime(2023, 6, 1)))
+    db.commit()
+    db.close()
+    second = client.get(f"/posts/users/{author}", params={"cursor": first["next_cursor"], "limit": 5}).json()
+    assert not {item["id"] for item in first["items"]} & {item["id"] for item in second["items"]}
+    assert "newer" not in [item["text"] for item in second["items"]]
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "W10", "eyJhIjoxfQ"])
+def test_malformed_cursor_is_rejected(client, cursor):
+    assert client.get("/posts", params={"cursor": cursor}).status_code == 400
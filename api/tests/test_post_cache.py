@@ -0,0 +1,60 @@
+import pytest
+from app.services.post_cache import post_cache
+from app.utils.cache import InMemoryLRUBackend
+
+@pytest.fixture
+def cache(client, monkeypatch):
+    """Turn the post cache on for one test (the suite runs with it off)"""
+    backend = InMemoryLRUBackend(1000)
+    monkeypatch.setattr(post_cache, "backend", backend)
+    return backend
+
+def texts(response) -> list:
+    body = response.json()
+    return [post["text"] for post in (body["items"] if isinstance(body, dict) else body)]
+
+def cached_get(client, cache, url: str):
+    """GET twice, checking the second response came from the cache"""
+    first = client.get(url)
+    hits = cache.hits
+    second = client.get(url)
+    assert cache.hits == hits + 1, url
+    assert second.json() == first.json()
+    return second
+
+@pytest.mark.parametrize("feed", ["/posts?limit=50", "/posts?cursor=&limit=50"])
+def test_create_update_and_delete_reach_the_feed(client, cache, make_user, feed):
+    _, headers = make_user()
+    cached_get(client, cache, feed)
+
+    post = client.post("/posts", json={"text": "fresh"}, headers=headers).json()
+    assert texts(cached_get(client, cache, feed))[0] == "fresh"
+
+    client.put(f"/posts/{post['id']}", json={"text": "edited"}, headers=headers)
+    assert texts(cached_get(client, cache, feed))[0] == "edited"
+
+    client.delete(f"/posts/{post['id']}", headers=headers)
+    assert "edited" not in texts(cached_get(client, cache, feed))
+
+@pytest.mark.parametrize("query", ["?limit=10", "?cursor=&limit=10"])
+def test_writes_invalidate_only_their_owners_pages(client, cache, make_user, query):
+    author, author_headers = make_user()
+    bystander, bystander_headers = make_user()
+    client.post("/posts", json={"text": "bystander's"}, headers=bystander_headers)
+    cached_get(client, cache, f"/posts/users/{author}{query}")
+    cached_get(client, cache, f"/posts/users/{bystander}{query}")
+
+    post = client.post("/posts", json={"text": "first"}, headers=author_headers).json()
+    assert texts(cached_get(client, cache, f"/posts/users/{author}{query}")) == ["first"]
+    # The other user's page was not touched
+    hits = cache.hits
+    assert texts(client.get(f"/posts/users/{bystander}{query}")) == ["bystander's"]
+    assert cache.hits == hits + 1
+
+    client.put(f"/posts/{post['id']}", json={"text": "second"}, headers=author_headers)
+    assert texts(cached_get(client, cache, f"/posts/users/{author}{query}")) == ["second"]
+    assert cached_get(client, cache, f"/posts/{post['id']}").json()["text"] == "second"
+
+    client.delete(f"/posts/{post['id']}", headers=author_headers)
+    assert texts(cached_get(client, cache, f"/posts/users/{author}{query}")) == []
+    assert client.get(f"/posts/{post['id']}").status_code == 404
@@ -0,0 +1,82 @@
+import asyncio
+import json
+from app.services.post_events import LocalBroker, PostEventBus
+
+def make_bus(queue_size: int = 10, replay_size: int = 5) -> PostEventBus:
+    bus = PostEventBus(LocalBroker(), queue_size, replay_size, heartbeat=0)
+    bus.start(asyncio.get_running_loop())
+    return bus
+
+async def publish(bus: PostEventBus, count: int) -> None:
+    bus.publish([{"type": "created", "post": {"id": str(i)}} for i in range(count)])
+    # Let the events handed over with call_soon_threadsafe be dispatched
+    await asyncio.sleep(0)
+
+def received(subscription):
+    return [json.loads(item.json) for item in subscription.events]
+
+def test_cursor_from_another_worker_is_reset():
+    async def run():
+        first, second = make_bus(), make_bus()
+        watcher = first.subscribe()
+        await publish(first, 3)
+        await publish(second, 3)
+        ids = [event["id"] for event in received(watcher)]
+
+        # Both workers numbered their events 1 to 3, yet the other one resets the client
+        for cursor in (ids[0], "1"):
+            assert [event["type"] for event in received(second.subscribe(cursor))] == ["reset"]
+        # The cursor still resumes on the worker that issued it
+        assert [event["id"] for event in received(first.subscribe(ids[0]))] == ids[1:]
+    asyncio.run(run())
+
+def test_slow_subscription_is_dropped():
+    async def run():
+        bus = make_bus(queue_size=2)
+        slow, fast = bus.subscribe(), bus.subscribe()
+        await publish(bus, 2)
+        fast.events.clear()
+        await publish(bus, 1)
+        assert slow.dropped and not slow.events
+        assert not fast.dropped and len(fast.events) == 1
+    asyncio.run(run())
+
+def test_resume_replays_retained_events_or_resets():
+    async def run():
+        bus = make_bus(replay_size=5)
+        watcher = bus.subscribe()
+        await publish(bus, 8)
+        ids = [event["id"] for event in received(watcher)]
+
+        # Events 4 to 8 are retained, so a client that saw 3 or later resumes
+        assert [event["id"] for event in received(bus.subscribe(ids[2]))] == ids[3:]
+        assert received(bus.subscribe(ids[-1])) == []
+        # Event 3 is gone, and an id past the latest is from some other numbering
+        for cursor in (ids[1], ids[-1][:-1] + "9", "not-an-id"):
+            assert received(bus.subscribe(cursor)) == [{"id": ids[-1], "type": "reset"}]
+    asyncio.run(run())
+
+def test_events_are_published_on_commit_only(client, make_user, monkeypatch):
+    import app.services.post_events as module
+    from app.database import SessionLocal
+    from app.models.post import Post
+
+    published = []
+    monkeypatch.setattr(module.post_events, "publish", published.extend)
+    user_id, _ = make_user()
+    db = SessionLocal()
+    db.add(Post(userId=user_id, text="rolled back"))
+    db.flush()
+    db.rollback()
+    db.add(Post(userId=user_id, text="committed"))
+    db.commit()
+    db.close()
+    assert [(event["type"], event["post"]["text"]) for event in published] == [("created", "committed")]
+
+def test_websocket_delivers_new_posts(client, make_user):
+    _, headers = make_user()
+    with client.websocket_connect("/posts/ws?cursor=stale") as websocket:
+        assert websocket.receive_json()["type"] == "reset"
+        post = client.post("/posts", json={"text": "live"}, headers=headers).json()
+        event = websocket.receive_json()
+    assert (event["type"], event["post"]["id"], event["post"]["text"]) == ("created", post["id"], "live")
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app.database import SessionLocal, engine
+from app.models.media import MediaBlob, MediaVariant
+from app.models.post import Post
+from app.models.user import User
+
+POSTS = 60
+
+@pytest.fixture(scope="module")
+def posts(client):
+    """POSTS posts, each by a different user and with its own image and two variants"""
+    db = SessionLocal()
+    start = datetime(2024, 1, 1)
+    for i in range(POSTS):
+        user = User(email=f"owner{i}@example.com", firstName="Owner", lastName=str(i), password="x", birthday=start)
+        path = f"{i:02d}/00/{i:064d}.jpg"
+        db.add(MediaBlob(path=path, size=1000))
+        db.add_all(MediaVariant(blobPath=path, width=width, path=f"{path[:-4]}.w{width}.jpg", size=100) for width in (320, 640))
+        db.add(Post(owner=user, text=f"post {i}", blobUrl=path, createdAt=start + timedelta(minutes=i)))
+    db.commit()
+    db.close()
+
+def count_statements(client, params) -> int:
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/posts", params=params)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+@pytest.mark.parametrize("mode", [{}, {"cursor": ""}], ids=["offset", "cursor"])
+def test_list_posts_query_count_does_not_grow_with_limit(client, posts, mode):
+    """Owners and media variants are loaded in batches, not once per post"""
+    counts = {limit: count_statements(client, {"limit": limit, **mode}) for limit in (1, 10, 50)}
+    assert len(set(counts.values())) == 1, counts
@@ -0,0 +1,19 @@
+import logging
+import pytest
+from sqlalchemy import text
+from app.config import settings
+from app.database import engine
+
+# Counts far enough to pass the 1 ms threshold below
+SLOW_QUERY = text("WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < :limit) "
+                  "SELECT count(*) FROM n WHERE :secret IS NOT NULL")
+
+@pytest.mark.parametrize("log_parameters", [False, True])
+def test_slow_query_log_leaves_out_parameters_unless_asked(client, caplog, monkeypatch, log_parameters):
+    monkeypatch.setattr(settings, "slow_query_ms", 1)
+    monkeypatch.setattr(settings, "slow_query_log_parameters", log_parameters)
+    with caplog.at_level(logging.WARNING, logger="app.utils.profiling"), engine.connect() as connection:
+        connection.execute(SLOW_QUERY, {"limit": 500000, "secret": "$2b$12$hash"})
+    [record] = [record for record in caplog.records if record.getMessage().startswith("Slow query")]
+    assert "WITH RECURSIVE" in record.getMessage()
+    assert ("$2b$12$hash" in record.getMessage()) == log_parameters
@@ -0,0 +1,65 @@
+import sqlite3
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.database import SessionLocal, replica_router
+from app.utils.cache import InMemoryLRUBackend
+from app.utils.replicas import Replica, ReplicaRouter
+
+def replica_of_primary(tmp_path, name: str = "replica") -> Replica:
+    """A copy of the primary database as it is now, so later writes are missing from it like replication lag"""
+    path = tmp_path / f"{name}.db"
+    primary = sqlite3.connect(settings.database_url.removeprefix("sqlite:///"))
+    copy = sqlite3.connect(path)
+    primary.backup(copy)
+    primary.close()
+    copy.close()
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    return Replica(name, engine, sessionmaker(bind=engine))
+
+def make_router(replicas, balancing: str = "round_robin") -> ReplicaRouter:
+    return ReplicaRouter(replicas, balancing, sticky_window=5, health_interval=0, sticky_backend=InMemoryLRUBackend(100))
+
+def test_round_robin_and_least_connections(client, tmp_path):
+    first, second = replica_of_primary(tmp_path, "first"), replica_of_primary(tmp_path, "second")
+    router = make_router([first, second])
+    assert [router.choose(None) for _ in range(4)] == [first, second, first, second]
+
+    router = make_router([first, second], "least_connections")
+    router.acquire(first)
+    assert router.choose(None) is second
+    router.acquire(second)
+    router.acquire(second)
+    assert router.choose(None) is first
+
+def test_pinned_clients_and_unhealthy_replicas_read_from_the_primary(client, tmp_path):
+    replica = replica_of_primary(tmp_path)
+    router = make_router([replica])
+    client_key = ReplicaRouter.client_key("Bearer token")
+    router.pin(client_key)
+    assert router.choose(client_key) is None
+    assert router.choose(ReplicaRouter.client_key("Bearer other")) is replica
+
+    broken = Replica("broken", create_engine(f"sqlite:///{tmp_path}/missing/dir.db"), None)
+    router = make_router([broken])
+    router.check()
+    assert not broken.healthy and router.choose(None) is None
+    (tmp_path / "missing").mkdir()
+    router.check()
+    assert broken.healthy and router.choose(None) is broken
+
+def test_committing_pins_the_client_to_the_primary(client, monkeypatch, tmp_path):
+    replica = replica_of_primary(tmp_path)
+    monkeypatch.setattr(replica_router, "replicas", [replica])
+    monkeypatch.setattr(replica_router, "sticky", InMemoryLRUBackend(100))
+    writer, reader = ReplicaRouter.client_key("Bearer writer"), ReplicaRouter.client_key("Bearer reader")
+
+    # get_read_db tags the request's primary session with its client
+    db = SessionLocal()
+    db.info["client"] = writer
+    db.execute(text("SELECT 1"))
+    db.commit()
+    db.close()
+    assert replica_router.choose(writer) is None
+    assert replica_router.choose(reader) is replica
@@ -0,0 +1,49 @@
+import uuid
+
+def unique_tag() -> str:
+    return f"topic{uuid.uuid4().hex[:8]}"
+
+def trending_count(client, tag: str) -> int:
+    counts = {row["tag"]: row["count"] for row in client.get("/posts/trending", params={"limit": 1000}).json()}
+    return counts.get(tag, 0)
+
+def tag_texts(client, tag: str) -> list:
+    return [item["text"] for item in client.get(f"/posts/tags/{tag}", params={"limit": 50}).json()["items"]]
+
+def test_hashtags_are_found_in_any_case_with_or_without_the_hash(client, make_user):
+    _, headers = make_user()
+    tag = unique_tag()
+    client.post("/posts", json={"text": f"hello #{tag.upper()}"}, headers=headers)
+    client.post("/posts", json={"text": f"not a tag: a&#{tag}; or /#{tag}"}, headers=headers)
+
+    assert tag_texts(client, tag) == [f"hello #{tag.upper()}"]
+    assert tag_texts(client, f"%23{tag.capitalize()}") == [f"hello #{tag.upper()}"]
+    assert trending_count(client, tag) == 1
+
+def test_editing_and_deleting_posts_updates_tag_feeds_and_counts(client, make_user):
+    _, headers = make_user()
+    tag, other = unique_tag(), unique_tag()
+    first = client.post("/posts", json={"text": f"#{tag} one"}, headers=headers).json()
+    second = client.post("/posts", json={"text": f"#{tag} #{tag} two"}, headers=headers).json()
+    assert trending_count(client, tag) == 2
+
+    client.put(f"/posts/{first['id']}", json={"text": f"#{other} one"}, headers=headers)
+    assert tag_texts(client, tag) == [second["text"]]
+    assert tag_texts(client, other) == [f"#{other} one"]
+    assert (trending_count(client, tag), trending_count(client, other)) == (1, 1)
+
+    client.delete(f"/posts/{second['id']}", headers=headers)
+    assert tag_texts(client, tag) == []
+    assert trending_count(client, tag) == 0
+
+def test_mentions_by_user_id_are_listed_for_that_user(client, make_user):
+    author, headers = make_user()
+    mentioned, _ = make_user()
+    post = client.post("/posts", json={"text": f"hi @{mentioned.upper()} and someone@{mentioned}"}, headers=headers).json()
+
+    items = client.get(f"/posts/mentions/{mentioned}").json()["items"]
+    assert [item["id"] for item in items] == [post["id"]]
+    assert client.get(f"/posts/mentions/{author}").json()["items"] == []
+
+    client.put(f"/posts/{post['id']}", json={"text": "nobody mentioned"}, headers=headers)
+    assert client.get(f"/posts/mentions/{mentioned}").json()["items"] == []
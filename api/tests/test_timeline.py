@@ -0,0 +1,57 @@
+from app.config import settings
+from app.services.timeline_fanout import timeline_fanout
+
+def post(client, headers, text: str) -> dict:
+    response = client.post("/posts", json={"text": text}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def timeline(client, headers) -> list:
+    # Fan-out runs on a background pool; wait for queued jobs first
+    timeline_fanout.shutdown()
+    return [item["text"] for item in client.get("/posts/timeline", params={"limit": 50}, headers=headers).json()["items"]]
+
+def test_following_backfills_and_new_posts_are_fanned_out(client, make_user):
+    reader_id, reader = make_user()
+    author_id, author = make_user()
+    post(client, author, "before the follow")
+    post(client, reader, "my own post")
+    assert timeline(client, reader) == ["my own post"]
+
+    assert client.post(f"/users/{author_id}/follow", headers=reader).json()["message"] == "User followed successfully"
+    assert timeline(client, reader) == ["my own post", "before the follow"]
+
+    post(client, author, "after the follow")
+    assert timeline(client, reader) == ["after the follow", "my own post", "before the follow"]
+
+    assert client.delete(f"/users/{author_id}/follow", headers=reader).json()["message"] == "User unfollowed successfully"
+    post(client, author, "after the unfollow")
+    assert timeline(client, reader) == ["my own post"]
+
+def test_following_twice_or_following_yourself(client, make_user):
+    reader_id, reader = make_user()
+    author_id, _ = make_user()
+    client.post(f"/users/{author_id}/follow", headers=reader)
+    assert client.post(f"/users/{author_id}/follow", headers=reader).json()["message"] == "Already following this user"
+    assert [user["id"] for user in client.get(f"/users/{author_id}/followers").json()] == [reader_id]
+
+    assert client.post(f"/users/{reader_id}/follow", headers=reader).status_code == 400
+    assert client.delete(f"/users/{reader_id}/follow", headers=reader).json()["message"] == "Not following this user"
+
+def test_posts_by_accounts_over_the_celebrity_threshold_are_merged_when_read(client, make_user, monkeypatch):
+    monkeypatch.setattr(settings, "timeline_celebrity_threshold", 2)
+    celebrity_id, celebrity = make_user()
+    first_id, first = make_user()
+    second_id, second = make_user()
+    client.post(f"/users/{celebrity_id}/follow", headers=first)
+    client.post(f"/users/{celebrity_id}/follow", headers=second)
+
+    post(client, celebrity, "merged at read time")
+    timeline_fanout.shutdown()
+    from app.database import SessionLocal
+    from app.models.timeline import TimelineEntry
+    db = SessionLocal()
+    assert db.query(TimelineEntry).filter(TimelineEntry.userId.in_([first_id, second_id])).count() == 0
+    db.close()
+    assert timeline(client, first) == ["merged at read time"]
+    assert timeline(client, second) == ["merged at read time"]